@@ -0,0 +1,194 @@
+"""
+Tajaa Output Capture
+Spill-to-disk storage for tool output with memory-mapped readback.
+Author: Tajaa
+"""
+
+import mmap
+import tempfile
+from array import array
+from collections import deque
+from typing import Iterator, List, Optional
+
+
+class OutputCapture:
+    """
+    Line-oriented output store for long-running tools.
+
+    Keeps a small tail of decoded lines in memory for display, buffers the
+    encoded output in chunks and spills each full chunk to an anonymous
+    temporary file. A line-offset index gives random access to any line,
+    served from a memory map of the spill file, so full output is kept
+    exactly once and nothing is dropped.
+    """
+
+    def __init__(self, tail_lines: int = 1000, chunk_size: int = 64 * 1024,
+                 spill_dir: Optional[str] = None):
+        self._tail: deque = deque(maxlen=tail_lines)
+        self._chunk_size = chunk_size
+        self._spill_dir = spill_dir
+
+        self._offsets = array('Q')      # Byte offset where each line starts
+        self._pending = bytearray()     # Encoded bytes not yet spilled
+        self._size = 0                  # Total bytes captured
+        self._spilled = 0               # Bytes already written to the file
+
+        self._file = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._mapped = 0
+
+    # =========================================================================
+    # WRITING
+    # =========================================================================
+
+    def append(self, line: str) -> None:
+        """Append a line (without trailing newline); embedded newlines split it."""
+        if '\n' in line:
+            for part in line.split('\n'):
+                self._append_line(part)
+            return
+        self._append_line(line)
+
+    def _append_line(self, line: str) -> None:
+        data = line.encode('utf-8', errors='replace')
+        self._offsets.append(self._size)
+        self._pending += data
+        self._pending += b'\n'
+        self._size += len(data) + 1
+        self._tail.append(line)
+
+        if len(self._pending) >= self._chunk_size:
+            self._spill()
+
+    def extend(self, lines: List[str]) -> None:
+        """Append several lines."""
+        for line in lines:
+            self.append(line)
+
+    def _spill(self) -> None:
+        """Write the pending chunk to the spill file."""
+        if not self._pending:
+            return
+        if self._file is None:
+            self._file = tempfile.TemporaryFile(prefix='tajaa_out_', dir=self._spill_dir)
+        self._file.write(self._pending)
+        self._file.flush()
+        self._spilled += len(self._pending)
+        self._pending = bytearray()
+
+    # =========================================================================
+    # READING
+    # =========================================================================
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __iter__(self) -> Iterator[str]:
+        for i in range(len(self._offsets)):
+            yield self.line(i)
+
+    @property
+    def size(self) -> int:
+        """Total captured bytes."""
+        return self._size
+
+    @property
+    def spilled(self) -> bool:
+        """True if part of the output lives on disk."""
+        return self._file is not None
+
+    def _view(self) -> Optional[mmap.mmap]:
+        """Return a memory map covering everything spilled so far."""
+        if self._file is None or self._spilled == 0:
+            return None
+        if self._mapped != self._spilled:
+            if self._mmap is not None:
+                self._mmap.close()
+            self._mmap = mmap.mmap(self._file.fileno(), self._spilled,
+                                   access=mmap.ACCESS_READ)
+            self._mapped = self._spilled
+        return self._mmap
+
+    def _read(self, start: int, end: int) -> bytes:
+        """Read captured bytes in [start, end)."""
+        if start >= self._spilled:
+            return bytes(self._pending[start - self._spilled:end - self._spilled])
+
+        view = self._view()
+        if end <= self._spilled:
+            return view[start:end]
+        return view[start:self._spilled] + bytes(self._pending[:end - self._spilled])
+
+    def _line_bounds(self, index: int) -> tuple:
+        """Byte range of a line, excluding its newline."""
+        start = self._offsets[index]
+        if index + 1 < len(self._offsets):
+            end = self._offsets[index + 1] - 1
+        else:
+            end = self._size - 1
+        return start, end
+
+    def line(self, index: int) -> str:
+        """Get a single line by index (negative indexes allowed)."""
+        if index < 0:
+            index += len(self._offsets)
+        if not 0 <= index < len(self._offsets):
+            raise IndexError("line index out of range")
+        start, end = self._line_bounds(index)
+        return self._read(start, end).decode('utf-8', errors='replace')
+
+    def lines(self, start: int = 0, stop: int = None) -> List[str]:
+        """Get a slice of lines."""
+        start, stop, _ = slice(start, stop).indices(len(self._offsets))
+        if start >= stop:
+            return []
+        begin = self._offsets[start]
+        end = self._line_bounds(stop - 1)[1]
+        return self._read(begin, end).decode('utf-8', errors='replace').split('\n')
+
+    def tail(self, count: int = None) -> List[str]:
+        """Get the most recent lines from the in-memory tail."""
+        if count is None or count >= len(self._tail):
+            return list(self._tail)
+        return list(self._tail)[-count:] if count > 0 else []
+
+    def iter_chunks(self, chunk_size: int = 1024 * 1024,
+                    final_newline: bool = True) -> Iterator[bytes]:
+        """
+        Iterate over the raw captured bytes in chunks.
+
+        Without final_newline, the chunks join to the encoded getvalue().
+        """
+        size = self._size if final_newline or not self._size else self._size - 1
+        for start in range(0, size, chunk_size):
+            yield self._read(start, min(start + chunk_size, size))
+
+    @property
+    def text_size(self) -> int:
+        """Size in bytes of the encoded getvalue()."""
+        return max(self._size - 1, 0)
+
+    def getvalue(self) -> str:
+        """Return the full output joined with newlines."""
+        if not self._size:
+            return ""
+        return self._read(0, self._size - 1).decode('utf-8', errors='replace')
+
+    def close(self) -> None:
+        """Release the memory map and delete the spill file."""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+            self._mapped = 0
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
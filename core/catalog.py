@@ -0,0 +1,161 @@
+"""
+Tajaa Tool Catalog
+Compiled, cached view of the YAML tool configurations.
+Author: Tajaa
+"""
+
+import os
+import pickle
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from .template import CommandTemplate
+
+
+class ToolCatalog:
+    """
+    Tool categories parsed from configs/*.yaml.
+
+    The parsed result is pickled to a cache file together with a
+    fingerprint of every config file (path, mtime, size). Later loads
+    compare fingerprints and only run the YAML parser when a file was
+    added, removed or changed.
+    """
+
+    # Bump when the cached structure changes
+    FORMAT_VERSION = 2
+
+    def __init__(self, configs_path: Path = None, cache_path: Path = None):
+        self.configs_path = Path(configs_path or "configs")
+        self.cache_path = Path(cache_path or "data/cache/catalog.pickle")
+
+        # (file name, categories) per config file, in load order
+        self.files: List[Tuple[str, Dict[str, Dict]]] = []
+        # (file name, error message) for files that failed to parse
+        self.errors: List[Tuple[str, str]] = []
+        # (file name, message) for tools whose command template is inconsistent
+        self.warnings: List[Tuple[str, str]] = []
+        self.from_cache = False
+        self.fingerprint: Optional[tuple] = None
+
+    # =========================================================================
+    # LOADING
+    # =========================================================================
+
+    def load(self, force: bool = False) -> "ToolCatalog":
+        """
+        Load the catalog, from cache when the configs are unchanged.
+
+        Args:
+            force: Re-check the config files even if already loaded
+        """
+        if self.fingerprint is not None and not force:
+            return self
+
+        config_files = self._config_files()
+        fingerprint = self._fingerprint(config_files)
+
+        cached = self._read_cache(fingerprint)
+        if cached is not None:
+            self.files, self.errors, self.warnings = cached
+            self.from_cache = True
+        else:
+            self._compile(config_files)
+            self._write_cache(fingerprint)
+            self.from_cache = False
+
+        self.fingerprint = fingerprint
+        return self
+
+    def _config_files(self) -> List[Path]:
+        if not self.configs_path.exists():
+            return []
+        return sorted(self.configs_path.glob("*.yaml"))
+
+    def _fingerprint(self, config_files: List[Path]) -> tuple:
+        """Identify the exact set of config file versions."""
+        entries = []
+        for path in config_files:
+            stat = path.stat()
+            entries.append((str(path.resolve()), stat.st_mtime_ns, stat.st_size))
+        return (self.FORMAT_VERSION, sys.version_info[:2], tuple(entries))
+
+    def _compile(self, config_files: List[Path]) -> None:
+        """Parse every config file and check its command templates."""
+        self.files = []
+        self.errors = []
+        self.warnings = []
+
+        for yaml_file in config_files:
+            try:
+                with open(yaml_file, 'r', encoding='utf-8') as f:
+                    data = yaml.safe_load(f)
+            except Exception as e:
+                self.errors.append((yaml_file.name, str(e)))
+                continue
+
+            if data and isinstance(data.get('categories'), dict):
+                self.files.append((yaml_file.name, data['categories']))
+                self._check_templates(yaml_file.name, data['categories'])
+
+    def _check_templates(self, file_name: str, categories: Dict[str, Dict]) -> None:
+        """Report placeholders without parameters and parameters without placeholders."""
+        for cat_id, cat_data in categories.items():
+            for tool_id, tool_data in (cat_data.get('tools') or {}).items():
+                if not tool_data:
+                    continue
+                template = CommandTemplate.compile(tool_data.get('command', ''))
+                params = [*tool_data.get('params', []), *(tool_data.get('defaults') or {})]
+                for problem in template.validate(params):
+                    self.warnings.append((file_name, f"{cat_id}.{tool_id}: {problem}"))
+
+    # =========================================================================
+    # CACHE
+    # =========================================================================
+
+    def _read_cache(self, fingerprint: tuple) -> Optional[tuple]:
+        try:
+            with open(self.cache_path, 'rb') as f:
+                cached = pickle.load(f)
+        except Exception:
+            return None
+
+        if not isinstance(cached, dict) or cached.get('fingerprint') != fingerprint:
+            return None
+        return cached['files'], cached['errors'], cached['warnings']
+
+    def _write_cache(self, fingerprint: tuple) -> None:
+        payload = {
+            'fingerprint': fingerprint,
+            'files': self.files,
+            'errors': self.errors,
+            'warnings': self.warnings,
+        }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.cache_path.with_suffix('.tmp')
+            with open(temp_path, 'wb') as f:
+                pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            # A read-only data dir just means no cache
+            pass
+
+    def invalidate(self) -> None:
+        """Delete the cache file, forcing a reparse on next load."""
+        self.cache_path.unlink(missing_ok=True)
+
+    # =========================================================================
+    # ACCESS
+    # =========================================================================
+
+    @property
+    def categories(self) -> Dict[str, Dict]:
+        """All categories, later files overriding earlier ones."""
+        merged: Dict[str, Dict] = {}
+        for _, categories in self.files:
+            merged.update(categories)
+        return merged
@@ -6,13 +6,20 @@ Author: Tajaa
 
 import asyncio
 import aiosqlite
+import hashlib
 import json
+import lzma
+import zlib
+from contextlib import asynccontextmanager
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import Any, AsyncIterator, Dict, List, Optional, Union
 from dataclasses import dataclass, asdict
 from enum import Enum
 
+from .portset import PortSet
+from .capture import OutputCapture
+
 
 class ScanStatus(Enum):
     """Scan execution status."""
@@ -37,6 +44,7 @@ class FindingType(Enum):
     TECHNOLOGY = "technology"
     CERTIFICATE = "certificate"
     DNS_RECORD = "dns_record"
+    DATABASE = "database"
 
 
 @dataclass
@@ -62,6 +70,7 @@ class Scan:
     output: str = ""
     exit_code: int = 0
     metadata: Dict = None
+    output_hash: str = ""
 
 
 @dataclass
@@ -93,33 +102,145 @@ class Session:
     active_target_id: Optional[int] = None
 
 
+# Scan columns loaded for listings; raw output lives in the blob store
+SCAN_COLUMNS = ("id, target_id, tool_name, command, status, started_at, "
+                "completed_at, exit_code, metadata, output_hash")
+
+# Supported output compression codecs
+BLOB_CODECS = {
+    'zlib': (lambda data: zlib.compress(data, 6), zlib.decompress),
+    'lzma': (lambda data: lzma.compress(data, preset=1), lzma.decompress),
+}
+
+# Incremental compressors producing the same formats, for captured output
+BLOB_COMPRESSORS = {
+    'zlib': lambda: zlib.compressobj(6),
+    'lzma': lambda: lzma.LZMACompressor(preset=1),
+}
+
+
+def _blob_text(codec: Optional[str], data: Optional[bytes]) -> str:
+    """SQL function fts_text(codec, data): a stored blob as text."""
+    if data is None:
+        return ""
+    _, decompress = BLOB_CODECS[codec]
+    return decompress(data).decode('utf-8', errors='replace')
+
+
+def _scan_text_sql(row: str) -> str:
+    """SQL for the text of a scan row: its blob, or the legacy output column."""
+    return (f"CASE WHEN {row}.output_hash IS NULL THEN coalesce({row}.output, '') "
+            f"ELSE coalesce((SELECT fts_text(codec, data) FROM blobs "
+            f"WHERE hash = {row}.output_hash), '') END")
+
+
+def _finding_text_sql(row: str) -> str:
+    """SQL for the searchable text of a finding row."""
+    return (f"trim(coalesce({row}.value, '') || ' ' || coalesce({row}.service, '') || ' ' || "
+            f"coalesce({row}.version, '') || ' ' || coalesce({row}.raw_data, ''))")
+
+
 class DatabaseManager:
     """
     Async SQLite database manager for Tajaa.
-    Handles all persistence operations with connection pooling.
+    Writes go through a single connection guarded by a lock; queries use
+    a pool of read-only connections so they never wait behind writes.
     """
 
-    def __init__(self, db_path: Union[str, Path] = "data/tajaa.db"):
+    def __init__(self, db_path: Union[str, Path] = "data/tajaa.db",
+                 blob_codec: str = "zlib", read_pool_size: int = 4):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         self._connection: Optional[aiosqlite.Connection] = None
         self._lock = asyncio.Lock()
+        self._fts_enabled = False
+
+        # Read-only connections, opened on demand. WAL lets them query
+        # while the writer connection is inside a transaction.
+        if str(db_path) == ":memory:":
+            read_pool_size = 0
+        self.read_pool_size = read_pool_size
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle_readers: List[aiosqlite.Connection] = []
+        self._read_slots = asyncio.Semaphore(max(read_pool_size, 1))
+
+        if blob_codec not in BLOB_CODECS:
+            raise ValueError(f"Unknown blob codec: {blob_codec}")
+        self.blob_codec = blob_codec
+
+        # Write-behind findings queue, group-committed by size or age
+        self.flush_size = 500
+        self.flush_interval = 0.5
+        self._finding_queue: List[tuple] = []
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._flush_tasks: set = set()
+        self._flush_error: Optional[Exception] = None
 
     async def connect(self) -> None:
         """Establish database connection."""
         if self._connection is None:
             self._connection = await aiosqlite.connect(str(self.db_path))
             self._connection.row_factory = aiosqlite.Row
+            await self._connection.create_function("fts_text", 2, _blob_text, deterministic=True)
             await self._connection.execute("PRAGMA foreign_keys = ON")
             await self._connection.execute("PRAGMA journal_mode = WAL")
             await self._init_schema()
 
     async def close(self) -> None:
-        """Close database connection."""
+        """Flush queued writes and close all database connections."""
+        readers, self._readers, self._idle_readers = self._readers, [], []
+        for reader in readers:
+            await reader.close()
         if self._connection:
+            await self.flush()
             await self._connection.close()
             self._connection = None
 
+    # =========================================================================
+    # READ POOL
+    # =========================================================================
+
+    async def _open_reader(self) -> aiosqlite.Connection:
+        uri = self.db_path.resolve().as_uri() + "?mode=ro"
+        reader = await aiosqlite.connect(uri, uri=True)
+        reader.row_factory = aiosqlite.Row
+        await reader.create_function("fts_text", 2, _blob_text, deterministic=True)
+        self._readers.append(reader)
+        return reader
+
+    @asynccontextmanager
+    async def _read(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Borrow a read-only connection for queries.
+
+        Readers only see committed data. Without a pool (in-memory
+        databases) queries run on the writer connection.
+        """
+        if not self.read_pool_size:
+            yield self._connection
+            return
+
+        async with self._read_slots:
+            if self._idle_readers:
+                reader = self._idle_readers.pop()
+            else:
+                reader = await self._open_reader()
+            try:
+                yield reader
+            finally:
+                if reader in self._readers:
+                    self._idle_readers.append(reader)
+
+    async def _fetchone(self, sql: str, params: tuple = ()) -> Optional[aiosqlite.Row]:
+        async with self._read() as reader:
+            cursor = await reader.execute(sql, params)
+            return await cursor.fetchone()
+
+    async def _fetchall(self, sql: str, params: tuple = ()) -> List[aiosqlite.Row]:
+        async with self._read() as reader:
+            cursor = await reader.execute(sql, params)
+            return await cursor.fetchall()
+
     async def _init_schema(self) -> None:
         """Initialize database schema."""
         schema = """
@@ -144,9 +265,18 @@ class DatabaseManager:
             output TEXT DEFAULT '',
             exit_code INTEGER DEFAULT 0,
             metadata TEXT DEFAULT '{}',
+            output_hash TEXT,
             FOREIGN KEY (target_id) REFERENCES targets(id) ON DELETE CASCADE
         );
 
+        -- Content-addressed, compressed tool output
+        CREATE TABLE IF NOT EXISTS blobs (
+            hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL DEFAULT 'zlib',
+            size INTEGER NOT NULL DEFAULT 0,
+            data BLOB NOT NULL
+        );
+
         -- Findings table
         CREATE TABLE IF NOT EXISTS findings (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -204,8 +334,217 @@ class DatabaseManager:
         CREATE INDEX IF NOT EXISTS idx_findings_port ON findings(port);
         """
         await self._connection.executescript(schema)
+        await self._migrate_schema()
+        await self._init_search_index()
+        await self._init_target_stats()
         await self._connection.commit()
 
+    async def _migrate_schema(self) -> None:
+        """Bring databases created by older versions up to date."""
+        cursor = await self._connection.execute("PRAGMA table_info(scans)")
+        columns = {row['name'] for row in await cursor.fetchall()}
+        if 'output_hash' not in columns:
+            await self._connection.execute("ALTER TABLE scans ADD COLUMN output_hash TEXT")
+
+    async def _init_search_index(self) -> None:
+        """
+        Create the FTS5 full-text indexes over scan outputs and findings.
+
+        Both are external-content tables: the index holds only tokens,
+        and text for snippets is read back through the scan_text and
+        finding_text views. Scan text comes from the compressed blob store
+        via fts_text(), so outputs are never stored uncompressed twice.
+
+        Triggers keep finding_fts in step with every write. scan_fts is
+        maintained from Python by create_scan and update_scan, which
+        already hold the output, so writes to scans never need fts_text()
+        and other SQLite clients can update or delete scans freely. Rows
+        they delete leave stale tokens that searches drop when joining
+        scans; rebuild_search_index() clears them.
+        """
+        cursor = await self._connection.execute(
+            "SELECT name FROM sqlite_master WHERE name IN ('scan_fts', 'output_fts')"
+        )
+        existing = {row['name'] for row in await cursor.fetchall()}
+
+        finding_new, finding_old = _finding_text_sql('new'), _finding_text_sql('old')
+        try:
+            await self._connection.executescript(f"""
+            -- Earlier versions kept a full copy of every output in output_fts
+            DROP TRIGGER IF EXISTS findings_fts_insert;
+            DROP TRIGGER IF EXISTS findings_fts_delete;
+            DROP TRIGGER IF EXISTS scans_fts_delete;
+            DROP TABLE IF EXISTS output_fts;
+            -- Scan triggers needed fts_text() on every connection touching scans
+            DROP TRIGGER IF EXISTS scan_fts_insert;
+            DROP TRIGGER IF EXISTS scan_fts_update;
+            DROP TRIGGER IF EXISTS scan_fts_delete;
+
+            CREATE VIEW IF NOT EXISTS scan_text AS
+                SELECT s.id AS id, {_scan_text_sql('s')} AS content FROM scans s;
+            CREATE VIEW IF NOT EXISTS finding_text AS
+                SELECT f.id AS id, {_finding_text_sql('f')} AS content FROM findings f;
+
+            CREATE VIRTUAL TABLE IF NOT EXISTS scan_fts USING fts5(
+                content, content='scan_text', content_rowid='id'
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS finding_fts USING fts5(
+                content, content='finding_text', content_rowid='id'
+            );
+
+            CREATE TRIGGER IF NOT EXISTS finding_fts_insert AFTER INSERT ON findings BEGIN
+                INSERT INTO finding_fts (rowid, content) VALUES (new.id, {finding_new});
+            END;
+            CREATE TRIGGER IF NOT EXISTS finding_fts_update
+            AFTER UPDATE OF value, service, version, raw_data ON findings BEGIN
+                INSERT INTO finding_fts (finding_fts, rowid, content)
+                VALUES ('delete', old.id, {finding_old});
+                INSERT INTO finding_fts (rowid, content) VALUES (new.id, {finding_new});
+            END;
+            CREATE TRIGGER IF NOT EXISTS finding_fts_delete AFTER DELETE ON findings BEGIN
+                INSERT INTO finding_fts (finding_fts, rowid, content)
+                VALUES ('delete', old.id, {finding_old});
+            END;
+            """)
+            self._fts_enabled = True
+        except Exception:
+            # SQLite built without FTS5
+            self._fts_enabled = False
+            return
+
+        if 'scan_fts' not in existing:
+            await self._rebuild_search_index()
+            if 'output_fts' in existing:
+                # Give the dropped copy's pages back
+                await self._connection.commit()
+                await self._connection.execute("VACUUM")
+
+    async def _rebuild_search_index(self) -> None:
+        """Re-read every finding and scan output into the indexes."""
+        await self._connection.execute("INSERT INTO scan_fts (scan_fts) VALUES ('rebuild')")
+        await self._connection.execute("INSERT INTO finding_fts (finding_fts) VALUES ('rebuild')")
+
+    async def rebuild_search_index(self) -> None:
+        """Rebuild the full-text index from scratch."""
+        if not self._fts_enabled:
+            return
+        await self.flush()
+        async with self._lock:
+            await self._rebuild_search_index()
+            await self._connection.commit()
+
+    async def _init_target_stats(self) -> None:
+        """
+        Create the per-target counters read by get_target_summary.
+
+        target_stats holds one (target_id, key) -> count row per counter:
+        'findings', 'severity:<level>', 'type:<finding type>', 'scans' and
+        'status:<scan status>'. Triggers keep it in step with every insert,
+        update and delete, so a summary never has to scan findings or scans.
+        """
+        cursor = await self._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'target_stats'"
+        )
+        exists = await cursor.fetchone() is not None
+
+        await self._connection.executescript("""
+        CREATE TABLE IF NOT EXISTS target_stats (
+            target_id INTEGER NOT NULL,
+            key TEXT NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (target_id, key)
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER IF NOT EXISTS findings_stats_insert AFTER INSERT ON findings BEGIN
+            INSERT INTO target_stats (target_id, key, count)
+            VALUES (new.target_id, 'findings', 1),
+                   (new.target_id, 'severity:' || coalesce(new.severity, 'info'), 1),
+                   (new.target_id, 'type:' || new.finding_type, 1)
+            ON CONFLICT (target_id, key) DO UPDATE SET count = count + 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS findings_stats_delete AFTER DELETE ON findings BEGIN
+            UPDATE target_stats SET count = count - 1
+            WHERE target_id = old.target_id AND key IN (
+                'findings',
+                'severity:' || coalesce(old.severity, 'info'),
+                'type:' || old.finding_type
+            );
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS findings_stats_update
+        AFTER UPDATE OF target_id, severity, finding_type ON findings BEGIN
+            UPDATE target_stats SET count = count - 1
+            WHERE target_id = old.target_id AND key IN (
+                'findings',
+                'severity:' || coalesce(old.severity, 'info'),
+                'type:' || old.finding_type
+            );
+            INSERT INTO target_stats (target_id, key, count)
+            VALUES (new.target_id, 'findings', 1),
+                   (new.target_id, 'severity:' || coalesce(new.severity, 'info'), 1),
+                   (new.target_id, 'type:' || new.finding_type, 1)
+            ON CONFLICT (target_id, key) DO UPDATE SET count = count + 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS scans_stats_insert AFTER INSERT ON scans BEGIN
+            INSERT INTO target_stats (target_id, key, count)
+            VALUES (new.target_id, 'scans', 1),
+                   (new.target_id, 'status:' || coalesce(new.status, 'pending'), 1)
+            ON CONFLICT (target_id, key) DO UPDATE SET count = count + 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS scans_stats_delete AFTER DELETE ON scans BEGIN
+            UPDATE target_stats SET count = count - 1
+            WHERE target_id = old.target_id
+              AND key IN ('scans', 'status:' || coalesce(old.status, 'pending'));
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS scans_stats_status
+        AFTER UPDATE OF status ON scans WHEN old.status IS NOT new.status BEGIN
+            UPDATE target_stats SET count = count - 1
+            WHERE target_id = old.target_id
+              AND key = 'status:' || coalesce(old.status, 'pending');
+            INSERT INTO target_stats (target_id, key, count)
+            VALUES (new.target_id, 'status:' || coalesce(new.status, 'pending'), 1)
+            ON CONFLICT (target_id, key) DO UPDATE SET count = count + 1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS targets_stats_delete AFTER DELETE ON targets BEGIN
+            DELETE FROM target_stats WHERE target_id = old.id;
+        END;
+        """)
+
+        if not exists:
+            await self._rebuild_target_stats()
+
+    async def _rebuild_target_stats(self) -> None:
+        """Recount every target's findings and scans."""
+        await self._connection.executescript("""
+        DELETE FROM target_stats;
+
+        INSERT INTO target_stats (target_id, key, count)
+        SELECT target_id, 'findings', count(*) FROM findings GROUP BY target_id
+        UNION ALL
+        SELECT target_id, 'severity:' || coalesce(severity, 'info'), count(*)
+        FROM findings GROUP BY target_id, 2
+        UNION ALL
+        SELECT target_id, 'type:' || finding_type, count(*)
+        FROM findings GROUP BY target_id, 2
+        UNION ALL
+        SELECT target_id, 'scans', count(*) FROM scans GROUP BY target_id
+        UNION ALL
+        SELECT target_id, 'status:' || coalesce(status, 'pending'), count(*)
+        FROM scans GROUP BY target_id, 2;
+        """)
+
+    async def rebuild_target_stats(self) -> None:
+        """Recount the per-target summary counters from scratch."""
+        await self.flush()
+        async with self._lock:
+            await self._rebuild_target_stats()
+            await self._connection.commit()
+
     # =========================================================================
     # TARGET OPERATIONS
     # =========================================================================
@@ -234,10 +573,9 @@ class DatabaseManager:
 
     async def get_target(self, target_id: int) -> Optional[Target]:
         """Get target by ID."""
-        cursor = await self._connection.execute(
+        row = await self._fetchone(
             "SELECT * FROM targets WHERE id = ?", (target_id,)
         )
-        row = await cursor.fetchone()
         if row:
             return Target(
                 id=row['id'],
@@ -250,10 +588,9 @@ class DatabaseManager:
 
     async def get_target_by_value(self, value: str) -> Optional[Target]:
         """Get target by value."""
-        cursor = await self._connection.execute(
+        row = await self._fetchone(
             "SELECT * FROM targets WHERE value = ?", (value,)
         )
-        row = await cursor.fetchone()
         if row:
             return Target(
                 id=row['id'],
@@ -266,10 +603,9 @@ class DatabaseManager:
 
     async def get_all_targets(self, limit: int = 100) -> List[Target]:
         """Get all targets."""
-        cursor = await self._connection.execute(
+        rows = await self._fetchall(
             "SELECT * FROM targets ORDER BY created_at DESC LIMIT ?", (limit,)
         )
-        rows = await cursor.fetchall()
         return [Target(
             id=row['id'],
             value=row['value'],
@@ -292,12 +628,20 @@ class DatabaseManager:
                 (target_id, tool_name, command, ScanStatus.RUNNING.value,
                  datetime.now().isoformat(), json.dumps(metadata or {}))
             )
+            if self._fts_enabled:
+                await self._connection.execute(
+                    "INSERT INTO scan_fts (rowid, content) VALUES (?, '')", (cursor.lastrowid,)
+                )
             await self._connection.commit()
             return cursor.lastrowid
 
     async def update_scan(self, scan_id: int, status: ScanStatus = None,
-                          output: str = None, exit_code: int = None) -> None:
-        """Update scan record."""
+                          output: Union[str, bytes, OutputCapture] = None,
+                          exit_code: int = None) -> None:
+        """
+        Update scan record. Output is stored in the blob store; an
+        OutputCapture is read chunk by chunk, never as one string.
+        """
         async with self._lock:
             updates = []
             values = []
@@ -310,8 +654,11 @@ class DatabaseManager:
                     values.append(datetime.now().isoformat())
 
             if output is not None:
-                updates.append("output = ?")
-                values.append(output)
+                if self._fts_enabled:
+                    await self._reindex_scan(scan_id, output)
+                updates.append("output_hash = ?")
+                values.append(await self._put_blob(output))
+                updates.append("output = ''")
 
             if exit_code is not None:
                 updates.append("exit_code = ?")
@@ -325,36 +672,48 @@ class DatabaseManager:
                 )
                 await self._connection.commit()
 
-    async def get_scan(self, scan_id: int) -> Optional[Scan]:
-        """Get scan by ID."""
+    async def _reindex_scan(self, scan_id: int,
+                            output: Union[str, bytes, OutputCapture]) -> None:
+        """
+        Replace a scan's scan_fts entry with the new output, before the
+        row is updated. Caller must hold the write lock.
+        """
         cursor = await self._connection.execute(
-            "SELECT * FROM scans WHERE id = ?", (scan_id,)
+            "SELECT output_hash, output FROM scans WHERE id = ?", (scan_id,)
         )
         row = await cursor.fetchone()
-        if row:
-            return Scan(
-                id=row['id'],
-                target_id=row['target_id'],
-                tool_name=row['tool_name'],
-                command=row['command'],
-                status=row['status'],
-                started_at=row['started_at'],
-                completed_at=row['completed_at'],
-                output=row['output'],
-                exit_code=row['exit_code'],
-                metadata=json.loads(row['metadata'])
+        if not row:
+            return
+
+        # The 'delete' command needs exactly the text that was indexed
+        old_text = row['output'] or ""
+        if row['output_hash']:
+            cursor = await self._connection.execute(
+                "SELECT codec, data FROM blobs WHERE hash = ?", (row['output_hash'],)
             )
-        return None
+            blob = await cursor.fetchone()
+            old_text = (await asyncio.to_thread(_blob_text, blob['codec'], blob['data'])
+                        if blob else "")
+
+        if isinstance(output, OutputCapture):
+            new_text = output.getvalue()
+        elif isinstance(output, bytes):
+            new_text = output.decode('utf-8', errors='replace')
+        else:
+            new_text = output
 
-    async def get_scans_for_target(self, target_id: int, limit: int = 50) -> List[Scan]:
-        """Get all scans for a target."""
-        cursor = await self._connection.execute(
-            """SELECT * FROM scans WHERE target_id = ?
-               ORDER BY started_at DESC LIMIT ?""",
-            (target_id, limit)
+        await self._connection.execute(
+            "INSERT INTO scan_fts (scan_fts, rowid, content) VALUES ('delete', ?, ?)",
+            (scan_id, old_text)
+        )
+        await self._connection.execute(
+            "INSERT INTO scan_fts (rowid, content) VALUES (?, ?)", (scan_id, new_text)
         )
-        rows = await cursor.fetchall()
-        return [Scan(
+
+    @staticmethod
+    def _row_to_scan(row, output: str = "") -> Scan:
+        """Build a Scan from a row selected with SCAN_COLUMNS."""
+        return Scan(
             id=row['id'],
             target_id=row['target_id'],
             tool_name=row['tool_name'],
@@ -362,30 +721,122 @@ class DatabaseManager:
             status=row['status'],
             started_at=row['started_at'],
             completed_at=row['completed_at'],
-            output=row['output'],
+            output=output,
             exit_code=row['exit_code'],
-            metadata=json.loads(row['metadata'])
-        ) for row in rows]
+            metadata=json.loads(row['metadata']),
+            output_hash=row['output_hash'] or "",
+        )
+
+    async def get_scan(self, scan_id: int, include_output: bool = True) -> Optional[Scan]:
+        """Get scan by ID, loading its output unless told not to."""
+        row = await self._fetchone(
+            f"SELECT {SCAN_COLUMNS} FROM scans WHERE id = ?", (scan_id,)
+        )
+        if row:
+            output = await self.get_scan_output(scan_id) if include_output else ""
+            return self._row_to_scan(row, output)
+        return None
+
+    async def get_scan_output(self, scan_id: int) -> str:
+        """Load and decompress the output of a scan."""
+        row = await self._fetchone(
+            "SELECT output_hash, output FROM scans WHERE id = ?", (scan_id,)
+        )
+        if not row:
+            return ""
+        if not row['output_hash']:
+            # Written before the blob store existed
+            return row['output'] or ""
+        data = await self._get_blob(row['output_hash'])
+        return data.decode('utf-8', errors='replace') if data is not None else ""
+
+    async def get_scans_for_target(self, target_id: int, limit: int = 50) -> List[Scan]:
+        """Get all scans for a target (metadata only, see get_scan_output)."""
+        rows = await self._fetchall(
+            f"""SELECT {SCAN_COLUMNS} FROM scans WHERE target_id = ?
+               ORDER BY started_at DESC LIMIT ?""",
+            (target_id, limit)
+        )
+        return [self._row_to_scan(row) for row in rows]
 
     async def get_running_scans(self) -> List[Scan]:
         """Get all currently running scans."""
-        cursor = await self._connection.execute(
-            "SELECT * FROM scans WHERE status = ?",
+        rows = await self._fetchall(
+            f"SELECT {SCAN_COLUMNS} FROM scans WHERE status = ?",
             (ScanStatus.RUNNING.value,)
         )
-        rows = await cursor.fetchall()
-        return [Scan(
-            id=row['id'],
-            target_id=row['target_id'],
-            tool_name=row['tool_name'],
-            command=row['command'],
-            status=row['status'],
-            started_at=row['started_at'],
-            completed_at=row['completed_at'],
-            output=row['output'],
-            exit_code=row['exit_code'],
-            metadata=json.loads(row['metadata'])
-        ) for row in rows]
+        return [self._row_to_scan(row) for row in rows]
+
+    # =========================================================================
+    # BLOB STORE
+    # =========================================================================
+
+    async def _put_blob(self, data: Union[str, bytes, OutputCapture]) -> str:
+        """
+        Store data compressed and keyed by its SHA-256 hash.
+        Identical outputs are stored once. Caller must hold the write lock.
+        """
+        if isinstance(data, OutputCapture):
+            capture = data
+            digest = await asyncio.to_thread(self._hash_chunks, capture)
+            size = capture.text_size
+        else:
+            if isinstance(data, str):
+                data = data.encode('utf-8', errors='replace')
+            digest = hashlib.sha256(data).hexdigest()
+            size = len(data)
+
+        cursor = await self._connection.execute(
+            "SELECT 1 FROM blobs WHERE hash = ?", (digest,)
+        )
+        if await cursor.fetchone():
+            return digest
+
+        if isinstance(data, OutputCapture):
+            packed = await asyncio.to_thread(self._compress_chunks, data, self.blob_codec)
+        else:
+            compress, _ = BLOB_CODECS[self.blob_codec]
+            packed = await asyncio.to_thread(compress, data)
+        await self._connection.execute(
+            "INSERT OR IGNORE INTO blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)",
+            (digest, self.blob_codec, size, packed)
+        )
+        return digest
+
+    @staticmethod
+    def _hash_chunks(capture: OutputCapture) -> str:
+        sha = hashlib.sha256()
+        for chunk in capture.iter_chunks(final_newline=False):
+            sha.update(chunk)
+        return sha.hexdigest()
+
+    @staticmethod
+    def _compress_chunks(capture: OutputCapture, codec: str) -> bytes:
+        compressor = BLOB_COMPRESSORS[codec]()
+        parts = [compressor.compress(chunk)
+                 for chunk in capture.iter_chunks(final_newline=False)]
+        parts.append(compressor.flush())
+        return b''.join(parts)
+
+    async def _get_blob(self, digest: str) -> Optional[bytes]:
+        """Load and decompress a blob."""
+        row = await self._fetchone(
+            "SELECT codec, data FROM blobs WHERE hash = ?", (digest,)
+        )
+        if not row:
+            return None
+        _, decompress = BLOB_CODECS[row['codec']]
+        return await asyncio.to_thread(decompress, row['data'])
+
+    async def prune_blobs(self) -> int:
+        """Delete blobs no longer referenced by any scan."""
+        async with self._lock:
+            cursor = await self._connection.execute(
+                """DELETE FROM blobs WHERE hash NOT IN
+                   (SELECT output_hash FROM scans WHERE output_hash IS NOT NULL)"""
+            )
+            await self._connection.commit()
+            return cursor.rowcount
 
     # =========================================================================
     # FINDING OPERATIONS
@@ -408,6 +859,77 @@ class DatabaseManager:
             await self._connection.commit()
             return cursor.lastrowid
 
+    def queue_finding(self, scan_id: int, target_id: int, finding_type: FindingType,
+                      value: str, port: int = None, protocol: str = "",
+                      service: str = "", version: str = "", severity: str = "info",
+                      confidence: float = 1.0, raw_data: str = "") -> None:
+        """
+        Queue a finding for a write-behind group commit.
+
+        Queued findings are inserted with a single executemany/commit once
+        flush_size rows are waiting or flush_interval seconds have passed.
+        Call flush() before reading findings that must be visible.
+        """
+        self._finding_queue.append(
+            (scan_id, target_id, finding_type.value, value, port, protocol,
+             service, version, severity, confidence, raw_data)
+        )
+
+        if len(self._finding_queue) >= self.flush_size:
+            self._start_flush()
+        elif self._flush_timer is None:
+            loop = asyncio.get_running_loop()
+            self._flush_timer = loop.call_later(self.flush_interval, self._start_flush)
+
+    def _start_flush(self) -> None:
+        """Flush the queue in the background."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        task = asyncio.ensure_future(self._background_flush())
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _background_flush(self) -> None:
+        try:
+            await self._flush_findings()
+        except Exception as e:
+            # Surfaced by the next explicit flush()
+            self._flush_error = e
+
+    async def _flush_findings(self) -> None:
+        """Write all queued findings in one transaction."""
+        rows, self._finding_queue = self._finding_queue, []
+        if not rows:
+            return
+        async with self._lock:
+            await self._connection.executemany(
+                """INSERT INTO findings
+                   (scan_id, target_id, finding_type, value, port, protocol,
+                    service, version, severity, confidence, raw_data)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            await self._connection.commit()
+
+    async def flush(self) -> None:
+        """Write all queued findings now and wait for background flushes."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if self._flush_tasks:
+            await asyncio.gather(*list(self._flush_tasks))
+        await self._flush_findings()
+
+        if self._flush_error is not None:
+            error, self._flush_error = self._flush_error, None
+            raise error
+
+    @property
+    def queued_findings(self) -> int:
+        """Number of findings waiting to be written."""
+        return len(self._finding_queue)
+
     async def add_findings_bulk(self, findings: List[Finding]) -> None:
         """Add multiple findings efficiently."""
         async with self._lock:
@@ -426,19 +948,18 @@ class DatabaseManager:
                                        finding_type: FindingType = None) -> List[Finding]:
         """Get all findings for a target."""
         if finding_type:
-            cursor = await self._connection.execute(
+            rows = await self._fetchall(
                 """SELECT * FROM findings WHERE target_id = ? AND finding_type = ?
                    ORDER BY created_at DESC""",
                 (target_id, finding_type.value)
             )
         else:
-            cursor = await self._connection.execute(
+            rows = await self._fetchall(
                 """SELECT * FROM findings WHERE target_id = ?
                    ORDER BY created_at DESC""",
                 (target_id,)
             )
 
-        rows = await cursor.fetchall()
         return [Finding(
             id=row['id'],
             scan_id=row['scan_id'],
@@ -457,24 +978,22 @@ class DatabaseManager:
 
     async def get_open_ports(self, target_id: int) -> List[int]:
         """Get all open ports for a target."""
-        cursor = await self._connection.execute(
+        rows = await self._fetchall(
             """SELECT DISTINCT port FROM findings
                WHERE target_id = ? AND finding_type = 'port' AND port IS NOT NULL
                ORDER BY port""",
             (target_id,)
         )
-        rows = await cursor.fetchall()
         return [row['port'] for row in rows]
 
     async def get_services(self, target_id: int) -> List[Dict]:
         """Get all discovered services for a target."""
-        cursor = await self._connection.execute(
+        rows = await self._fetchall(
             """SELECT DISTINCT port, protocol, service, version FROM findings
                WHERE target_id = ? AND finding_type = 'service'
                ORDER BY port""",
             (target_id,)
         )
-        rows = await cursor.fetchall()
         return [dict(row) for row in rows]
 
     # =========================================================================
@@ -497,10 +1016,9 @@ class DatabaseManager:
 
     async def get_session(self, session_id: int) -> Optional[Session]:
         """Get session by ID."""
-        cursor = await self._connection.execute(
+        row = await self._fetchone(
             "SELECT * FROM sessions WHERE id = ?", (session_id,)
         )
-        row = await cursor.fetchone()
         if row:
             return Session(
                 id=row['id'],
@@ -514,10 +1032,9 @@ class DatabaseManager:
 
     async def get_session_by_name(self, name: str) -> Optional[Session]:
         """Get session by name."""
-        cursor = await self._connection.execute(
+        row = await self._fetchone(
             "SELECT * FROM sessions WHERE name = ?", (name,)
         )
-        row = await cursor.fetchone()
         if row:
             return Session(
                 id=row['id'],
@@ -553,10 +1070,9 @@ class DatabaseManager:
 
     async def get_recent_sessions(self, limit: int = 10) -> List[Session]:
         """Get recent sessions."""
-        cursor = await self._connection.execute(
+        rows = await self._fetchall(
             "SELECT * FROM sessions ORDER BY last_active DESC LIMIT ?", (limit,)
         )
-        rows = await cursor.fetchall()
         return [Session(
             id=row['id'],
             name=row['name'],
@@ -581,13 +1097,12 @@ class DatabaseManager:
 
     async def get_command_history(self, session_id: int, limit: int = 100) -> List[str]:
         """Get command history for session."""
-        cursor = await self._connection.execute(
+        rows = await self._fetchall(
             """SELECT command FROM command_history
                WHERE session_id = ?
                ORDER BY executed_at DESC LIMIT ?""",
             (session_id, limit)
         )
-        rows = await cursor.fetchall()
         return [row['command'] for row in rows]
 
     # =========================================================================
@@ -608,10 +1123,9 @@ class DatabaseManager:
 
     async def get_attack_chains(self) -> List[Dict]:
         """Get all attack chains."""
-        cursor = await self._connection.execute(
+        rows = await self._fetchall(
             "SELECT * FROM attack_chains ORDER BY created_at DESC"
         )
-        rows = await cursor.fetchall()
         return [{
             'id': row['id'],
             'name': row['name'],
@@ -620,40 +1134,122 @@ class DatabaseManager:
             'created_at': row['created_at']
         } for row in rows]
 
+    # =========================================================================
+    # FULL-TEXT SEARCH
+    # =========================================================================
+
+    @staticmethod
+    def _quote_fts_query(query: str) -> str:
+        """Turn free text into an FTS5 query of quoted terms."""
+        terms = query.split()
+        return ' '.join('"' + term.replace('"', '""') + '"' for term in terms)
+
+    async def search_outputs(self, query: str, target: Union[str, int] = None,
+                             limit: int = 20,
+                             highlight: tuple = ('\x02', '\x03')) -> List[Dict]:
+        """
+        Search all stored tool output and findings.
+
+        Args:
+            query: FTS5 query; plain text with special characters is quoted
+            target: Optional target value or ID to restrict results to
+            limit: Maximum results
+            highlight: Markers placed around matched terms in snippets
+
+        Returns:
+            Ranked list of dicts with kind, ref_id, tool, target, snippet, rank
+        """
+        if not self._fts_enabled or not query.strip():
+            return []
+
+        await self.flush()
+
+        if isinstance(target, str):
+            db_target = await self.get_target_by_value(target)
+            if not db_target:
+                return []
+            target = db_target.id
+        scan_filter = " AND s.target_id = ?" if target is not None else ""
+        finding_filter = " AND f.target_id = ?" if target is not None else ""
+
+        # Each index yields its best rows already in rank order, so
+        # snippets (which decompress the scan blob) are built only for
+        # rows that can make the result
+        sql = f"""SELECT h.*, t.value AS target FROM (
+                    SELECT * FROM (
+                        SELECT 'scan' AS kind, s.id AS ref_id, s.tool_name AS tool,
+                               s.target_id AS target_id,
+                               snippet(scan_fts, 0, ?, ?, '…', 16) AS snippet,
+                               scan_fts.rank AS rank
+                        FROM scan_fts JOIN scans s ON s.id = scan_fts.rowid
+                        WHERE scan_fts MATCH ?{scan_filter}
+                        ORDER BY scan_fts.rank LIMIT ?)
+                    UNION ALL
+                    SELECT * FROM (
+                        SELECT 'finding', f.id, s.tool_name, f.target_id,
+                               snippet(finding_fts, 0, ?, ?, '…', 16),
+                               finding_fts.rank
+                        FROM finding_fts JOIN findings f ON f.id = finding_fts.rowid
+                        LEFT JOIN scans s ON s.id = f.scan_id
+                        WHERE finding_fts MATCH ?{finding_filter}
+                        ORDER BY finding_fts.rank LIMIT ?)
+                 ) h
+                 LEFT JOIN targets t ON t.id = h.target_id
+                 ORDER BY h.rank LIMIT ?"""
+
+        async def run(match: str) -> List[Dict]:
+            arm = [highlight[0], highlight[1], match] + ([target] if target is not None else [])
+            values = arm + [limit] + arm + [limit, limit]
+            return [dict(row) for row in await self._fetchall(sql, tuple(values))]
+
+        try:
+            return await run(query)
+        except Exception:
+            # Not valid FTS5 syntax (e.g. an IP or URL); search the terms literally
+            quoted = self._quote_fts_query(query)
+            return await run(quoted) if quoted else []
+
     # =========================================================================
     # ANALYTICS & REPORTING
     # =========================================================================
 
+    async def get_target_stats(self, target_id: int) -> Dict[str, int]:
+        """Non-zero summary counters for a target, keyed as in target_stats."""
+        rows = await self._fetchall(
+            "SELECT key, count FROM target_stats WHERE target_id = ? AND count > 0",
+            (target_id,)
+        )
+        return {row['key']: row['count'] for row in rows}
+
     async def get_target_summary(self, target_id: int) -> Dict:
         """Get comprehensive summary for a target."""
         target = await self.get_target(target_id)
         if not target:
             return {}
 
+        await self.flush()
         ports = await self.get_open_ports(target_id)
         services = await self.get_services(target_id)
-        findings = await self.get_findings_for_target(target_id)
+        stats = await self.get_target_stats(target_id)
 
-        # Count findings by severity
         severity_counts = {}
-        for f in findings:
-            severity_counts[f.severity] = severity_counts.get(f.severity, 0) + 1
-
-        # Count findings by type
         type_counts = {}
-        for f in findings:
-            type_counts[f.finding_type] = type_counts.get(f.finding_type, 0) + 1
-
-        scans = await self.get_scans_for_target(target_id)
+        for key, count in stats.items():
+            kind, _, name = key.partition(':')
+            if kind == 'severity':
+                severity_counts[name] = count
+            elif kind == 'type':
+                type_counts[name] = count
 
         return {
             'target': asdict(target),
             'open_ports': ports,
+            'port_ranges': str(PortSet(ports)),
             'services': services,
-            'total_findings': len(findings),
+            'total_findings': stats.get('findings', 0),
             'severity_breakdown': severity_counts,
             'type_breakdown': type_counts,
-            'total_scans': len(scans),
-            'completed_scans': len([s for s in scans if s.status == 'completed']),
+            'total_scans': stats.get('scans', 0),
+            'completed_scans': stats.get('status:completed', 0),
         }
 
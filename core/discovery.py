@@ -0,0 +1,277 @@
+"""
+Tajaa Discovery Pipeline
+Fast port discovery feeding per-host deep scans while the sweep is running.
+Author: Tajaa
+"""
+
+import asyncio
+import ipaddress
+import re
+import socket
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from .portset import PortSet
+from .database import FindingType
+from .parsers import StreamFinding, get_stream_parser
+from .template import CommandTemplate
+
+
+# Sweep commands per discovery scanner. The sweep output is not shown, so sudo
+# must never stop to ask for a password (-n).
+DISCOVERY_TEMPLATES = {
+    'masscan': "sudo -n masscan {scope} -p {ports} --rate {rate}",
+    'rustscan': "rustscan -a {scope} {port_option} {ports} --ulimit 5000 --scripts none",
+}
+
+# Service detection run per host on the ports found so far
+DEEP_TEMPLATE = "nmap -sV -Pn -p {ports} {host}"
+
+
+async def _sudo_ready() -> bool:
+    """Check that sudo runs without prompting for a password."""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            'sudo', '-n', 'true',
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+    except FileNotFoundError:
+        return False
+    return await process.wait() == 0
+
+
+class Scope:
+    """
+    Authorised targets: addresses, CIDR networks and hostnames.
+
+    Results for hosts outside the scope are dropped, so nothing is deep
+    scanned that was not explicitly given.
+    """
+
+    def __init__(self, targets: Iterable[str]):
+        self.targets: List[str] = []
+        self.networks: List[Any] = []
+        self.names: Set[str] = set()
+        self.addresses: Set[str] = set()
+
+        for target in targets:
+            target = target.strip()
+            if not target:
+                continue
+            self.targets.append(target)
+            try:
+                self.networks.append(ipaddress.ip_network(target, strict=False))
+            except ValueError:
+                self.names.add(target.lower())
+
+    @classmethod
+    def parse(cls, text: str) -> "Scope":
+        """Targets separated by commas and/or whitespace."""
+        return cls(re.split(r'[,\s]+', text))
+
+    async def resolve(self) -> None:
+        """Add the addresses hostnames resolve to, as scanners report those."""
+        loop = asyncio.get_running_loop()
+        for name in self.names:
+            try:
+                infos = await loop.getaddrinfo(name, None, type=socket.SOCK_STREAM)
+            except OSError:
+                continue
+            self.addresses.update(info[4][0] for info in infos)
+
+    def __contains__(self, host: str) -> bool:
+        host = host.lower()
+        if host in self.names or host in self.addresses:
+            return True
+        try:
+            address = ipaddress.ip_address(host)
+        except ValueError:
+            return False
+        return any(address in network for network in self.networks)
+
+    def __bool__(self) -> bool:
+        return bool(self.targets)
+
+    def __str__(self) -> str:
+        return ','.join(self.targets)
+
+
+def discovery_command(scanner: str, scope: Scope, ports: PortSet = None,
+                      rate: int = 10000) -> str:
+    """
+    Build the sweep command for a discovery scanner.
+
+    Args:
+        scanner: 'masscan' or 'rustscan'
+        scope: Targets to sweep
+        ports: Ports to sweep (default: all)
+        rate: Packets per second (masscan)
+    """
+    if scanner not in DISCOVERY_TEMPLATES:
+        raise ValueError(f"Unknown discovery scanner: {scanner}")
+    ports = ports or PortSet.range(1, 65535)
+
+    # rustscan takes either one range (-r) or a plain list (-p)
+    ranges = list(ports.ranges())
+    if len(ranges) == 1:
+        port_option, port_spec = '-r', f"{ranges[0][0]}-{ranges[0][1]}"
+    else:
+        port_option, port_spec = '-p', ','.join(map(str, ports))
+
+    return CommandTemplate.compile(DISCOVERY_TEMPLATES[scanner]).render({
+        'scope': str(scope),
+        'ports': str(ports) if scanner == 'masscan' else port_spec,
+        'port_option': port_option,
+        'rate': rate,
+    })
+
+
+@dataclass
+class HostScan:
+    """One deep scan of a host over a batch of newly found ports."""
+    host: str
+    ports: PortSet
+    command: str
+    result: Optional[Dict[str, Any]] = None
+    # Free for callers, e.g. the recorder storing this scan's findings
+    data: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class DiscoveryResult:
+    """Outcome of a pipelined discovery run."""
+    discovery: Dict[str, Any]
+    found: Dict[str, PortSet]
+    scans: List[HostScan]
+
+
+class DiscoveryPipeline:
+    """
+    Stream a fast port sweep into per-host service detection.
+
+    Every open port the sweep reports is added to its host's pending set.
+    The first port of a batch opens a settle window; when it closes, the
+    ports not yet scanned for that host go to a bounded pool of deep-scan
+    workers, while the sweep keeps running. Ports found later start a
+    further scan covering only the new ports.
+    """
+
+    def __init__(self, engine, scope: Scope, command: str,
+                 deep_template: str = DEEP_TEMPLATE, max_workers: int = 3,
+                 settle: float = 2.0,
+                 on_discovered: Callable[[StreamFinding], Any] = None,
+                 on_scan_start: Callable[[HostScan], Any] = None,
+                 on_scan_finding: Callable[[HostScan, StreamFinding], Any] = None,
+                 on_scan_done: Callable[[HostScan], Any] = None):
+        """
+        Args:
+            engine: AsyncEngine running the sweep and the deep scans
+            scope: Authorised targets; other hosts are ignored
+            command: Sweep command; its tool needs a streaming parser
+            deep_template: Per-host command with {host} and {ports}
+            max_workers: Deep scans running at once
+            settle: Seconds to collect a host's ports before scanning them
+            on_*: Callbacks, called or awaited as events happen
+        """
+        self.engine = engine
+        self.scope = scope
+        self.command = command
+        self.deep_template = CommandTemplate.compile(deep_template)
+        self.settle = settle
+        self.on_discovered = on_discovered
+        self.on_scan_start = on_scan_start
+        self.on_scan_finding = on_scan_finding
+        self.on_scan_done = on_scan_done
+
+        self.found: Dict[str, PortSet] = {}
+        self.scans: List[HostScan] = []
+        self._pending: Dict[str, PortSet] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._workers: Set[asyncio.Task] = set()
+        self._slots = asyncio.Semaphore(max_workers)
+
+    @staticmethod
+    async def _notify(callback: Optional[Callable], *args) -> None:
+        if callback:
+            ret = callback(*args)
+            if asyncio.iscoroutine(ret):
+                await ret
+
+    async def run(self) -> DiscoveryResult:
+        """Run the sweep and wait for every deep scan it triggered."""
+        parser = get_stream_parser(self.command)
+        if parser is None:
+            raise ValueError(f"No streaming parser for discovery command: {self.command}")
+        if self.command.split()[0] == 'sudo' and not await _sudo_ready():
+            raise PermissionError(
+                "Discovery needs root: run as root or allow passwordless sudo for the scanner"
+            )
+        await self.scope.resolve()
+
+        try:
+            discovery = await self.engine.execute(
+                self.command, stream_output=False,
+                parser=parser, on_finding=self._discovered,
+            )
+            # The sweep is over; no point waiting out the settle windows
+            for host in list(self._timers):
+                self._dispatch(host)
+            while self._workers:
+                await asyncio.gather(*list(self._workers))
+        finally:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+            for worker in self._workers:
+                worker.cancel()
+
+        return DiscoveryResult(discovery, self.found, self.scans)
+
+    async def _discovered(self, finding: StreamFinding) -> None:
+        if finding.finding_type != FindingType.PORT or finding.port is None:
+            return
+        host = finding.host
+        if not host or host not in self.scope:
+            return
+
+        known = self.found.setdefault(host, PortSet())
+        if finding.port in known:
+            return
+        known.add(finding.port)
+        await self._notify(self.on_discovered, finding)
+
+        self._pending.setdefault(host, PortSet()).add(finding.port)
+        if host not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[host] = loop.call_later(self.settle, self._dispatch, host)
+
+    def _dispatch(self, host: str) -> None:
+        """Hand a host's pending ports to a deep-scan worker."""
+        timer = self._timers.pop(host, None)
+        if timer is not None:
+            timer.cancel()
+        ports = self._pending.pop(host, None)
+        if not ports:
+            return
+
+        command = self.deep_template.render({'host': host, 'ports': str(ports)})
+        scan = HostScan(host, ports, command)
+        worker = asyncio.create_task(self._deep_scan(scan))
+        self._workers.add(worker)
+        worker.add_done_callback(self._workers.discard)
+
+    async def _deep_scan(self, scan: HostScan) -> None:
+        async with self._slots:
+            await self._notify(self.on_scan_start, scan)
+
+            async def on_finding(finding: StreamFinding) -> None:
+                await self._notify(self.on_scan_finding, scan, finding)
+
+            scan.result = await self.engine.execute(
+                scan.command, stream_output=False,
+                parser=get_stream_parser(scan.command), on_finding=on_finding,
+            )
+            self.scans.append(scan)
+            await self._notify(self.on_scan_done, scan)
@@ -5,21 +5,51 @@ Author: Tajaa
 """
 
 import asyncio
-import shlex
+import heapq
 import sys
 import signal
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Callable, Any, Coroutine
+from typing import Dict, Hashable, List, Optional, Callable, Any, Coroutine, Tuple, AsyncIterator, Union
 from dataclasses import dataclass, field
 from enum import Enum
-from collections import deque
 
 from rich.console import Console
 from rich.live import Live
 from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 
+from .capture import OutputCapture
+from .parsers import IndicatorMatcher, StreamFinding, StreamParser, get_stream_parser
+from .fastpath import FastPathProcess, run_fast_batch, run_fast_path
+from .pipeline import Pipeline, PipelineError, PipelineProcess
+from .template import CommandTemplate
+from .ui import StreamRenderer
+
+
+async def spawn_process(command: str):
+    """
+    Start a command with piped stdout/stderr.
+
+    On POSIX the command is run without a shell: pipes and redirections
+    are set up natively (see core.pipeline), anything else raises
+    PipelineError. Known trivial pipelines (see core.fastpath) are
+    answered in-process without spawning anything. Windows hands the
+    command to the shell.
+    """
+    if sys.platform == 'win32':
+        return await asyncio.create_subprocess_shell(
+            command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+    pipeline = Pipeline.parse(command)
+    fast = run_fast_path(pipeline)
+    if fast is not None:
+        return FastPathProcess(fast)
+    return await pipeline.spawn()
+
 
 class TaskStatus(Enum):
     """Background task status."""
@@ -37,19 +67,182 @@ class BackgroundTask:
     name: str
     command: str
     status: TaskStatus = TaskStatus.PENDING
-    process: Optional[asyncio.subprocess.Process] = None
-    output_buffer: deque = field(default_factory=lambda: deque(maxlen=1000))
-    error_buffer: deque = field(default_factory=lambda: deque(maxlen=500))
+    process: Optional[Union[asyncio.subprocess.Process, PipelineProcess, FastPathProcess]] = None
+    output_buffer: OutputCapture = field(default_factory=OutputCapture)
+    error_buffer: OutputCapture = field(default_factory=lambda: OutputCapture(tail_lines=500))
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     exit_code: Optional[int] = None
     callback: Optional[Callable] = None
+    priority: int = 0
+    # ID of the task whose process this one shares (see SingleFlight)
+    shared_with: Optional[str] = None
+    done_event: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    @property
+    def is_done(self) -> bool:
+        """True once the task reached a terminal state."""
+        return self.done_event.is_set()
+
+    async def wait(self) -> 'BackgroundTask':
+        """Wait until the task finishes, without polling."""
+        await self.done_event.wait()
+        return self
+
+
+class SingleFlight:
+    """
+    Work in flight, keyed by the normalised argv of its command.
+
+    A caller finding an entry for its command attaches to it instead of
+    starting the same process again. hits counts attachments, misses
+    counts work that had to be started.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(command: str) -> Optional[Hashable]:
+        """Key for a command, or None if it can't be parsed (never shared)."""
+        try:
+            return Pipeline.parse(command).key()
+        except PipelineError:
+            return None
+
+    def lookup(self, key: Optional[Hashable]) -> Any:
+        """The in-flight entry for key, counting a hit or a miss."""
+        if key is None:
+            return None
+        entry = self._inflight.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def add(self, key: Optional[Hashable], entry: Any) -> None:
+        if key is not None:
+            self._inflight[key] = entry
+
+    def remove(self, key: Optional[Hashable], entry: Any) -> None:
+        if key is not None and self._inflight.get(key) == entry:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'in_flight': len(self._inflight)}
+
+
+class Flight:
+    """
+    One execute() run that identical concurrent calls attach to.
+
+    Findings and indicators are published to attached callers as the run
+    produces them; a caller attaching late first receives those already
+    past. Output lines are not copied to callers: they are told when new
+    lines arrive and read them from the run's captures at their own
+    position, so a late caller replays the output from the capture.
+    """
+
+    # Lines read from a capture between yields to the event loop
+    REPLAY_BATCH = 1000
+
+    def __init__(self, key: Optional[Hashable] = None):
+        self.key = key
+        # The running call's result dict, filled in as the run goes
+        self.result: Optional[Dict[str, Any]] = None
+        # (capture, style) for each output stream of the run
+        self.streams: List[Tuple[OutputCapture, Optional[str]]] = []
+        self._queues: List[asyncio.Queue] = []
+        self._line_waiters: List[asyncio.Queue] = []
+
+    def subscribe(self, with_lines: bool = False) -> asyncio.Queue:
+        """Queue of (kind, ...) events, starting with those already past."""
+        queue: asyncio.Queue = asyncio.Queue()
+        if self.result is not None:
+            for finding in self.result['findings']:
+                queue.put_nowait(('finding', finding))
+            if self.result.get('matched'):
+                queue.put_nowait(('indicator', IndicatorMatcher.SUCCESS, self.result['matched']))
+            if self.result.get('failed_on'):
+                queue.put_nowait(('indicator', IndicatorMatcher.FAIL, self.result['failed_on']))
+        if with_lines:
+            queue.put_nowait(('lines',))
+        self._queues.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        if queue in self._queues:
+            self._queues.remove(queue)
+        if queue in self._line_waiters:
+            self._line_waiters.remove(queue)
+
+    def wait_lines(self, queue: asyncio.Queue) -> None:
+        """Put one ('lines',) event on queue when more output arrives."""
+        if queue not in self._line_waiters:
+            self._line_waiters.append(queue)
+
+    def lines_added(self) -> None:
+        waiters, self._line_waiters = self._line_waiters, []
+        for queue in waiters:
+            queue.put_nowait(('lines',))
+
+    def publish(self, *event) -> None:
+        for queue in self._queues:
+            queue.put_nowait(event)
+
+    def finish(self, result: Dict[str, Any]) -> None:
+        self.publish('done', dict(result))
+
+    def abort(self) -> None:
+        """The running call went away without a result."""
+        self.publish('abort')
+
+
+class ChainSkip(Exception):
+    """Raised by a ChainTask command callable to skip the task, with a reason."""
+
+
+@dataclass
+class ChainTask:
+    """
+    One node of a command DAG run by AsyncEngine.execute_dag.
+
+    command may be a callable taking the results of finished tasks (by
+    name) and returning the command to run; returning None or raising
+    ChainSkip skips the task. With parse_output, the output is fed to
+    the tool's streaming parser and the result carries its findings.
+
+    indicators are matched against the output as it streams; a fail
+    condition stops the command. With release_on_success, the first
+    success indicator releases dependents before the command exits, so
+    only set it when they don't need this task's output.
+
+    label prefixes the task's streamed output lines (defaults to name).
+    """
+    name: str
+    command: Union[str, Callable[[Dict[str, Dict[str, Any]]], Optional[str]]]
+    depends_on: List[str] = field(default_factory=list)
+    parse_output: bool = False
+    indicators: Optional[IndicatorMatcher] = None
+    release_on_success: bool = False
+    label: str = ""
 
 
 class BackgroundTaskManager:
     """
     Manages background tasks for concurrent execution.
     Allows running multiple scans simultaneously without blocking the UI.
+
+    Admission is event-driven: running/pending state lives in dedicated
+    counters and a priority heap, so submitting or completing a task costs
+    O(log n) in the pending queue, never a scan over the task history.
+
+    Submitting a command that is already pending or running does not
+    start it twice: the new task shares the first one's output buffers
+    and finishes with it, without taking a slot of its own.
     """
 
     def __init__(self, max_concurrent: int = 5):
@@ -58,36 +251,152 @@ class BackgroundTaskManager:
         self._task_counter = 0
         self._lock = asyncio.Lock()
         self._running_tasks: Dict[str, asyncio.Task] = {}
+        self._pending: List[Tuple[int, int, str]] = []
+        self._pending_count = 0
+        self.singleflight = SingleFlight()
+        # Leader task ID -> IDs of the tasks sharing its process
+        self._followers: Dict[str, List[str]] = {}
         self.console = Console()
 
+    @property
+    def running_count(self) -> int:
+        """Number of admitted (running) tasks."""
+        return len(self._running_tasks)
+
+    @property
+    def pending_count(self) -> int:
+        """Number of tasks waiting for a free slot."""
+        return self._pending_count
+
+    def set_max_concurrent(self, max_concurrent: int) -> None:
+        """Resize the worker pool, filling any new slots immediately."""
+        self.max_concurrent = max_concurrent
+        self._admit_pending()
+
     def _generate_task_id(self) -> str:
         """Generate unique task ID."""
         self._task_counter += 1
         return f"task_{self._task_counter:04d}"
 
     async def submit(self, name: str, command: str,
-                     callback: Callable = None) -> str:
-        """Submit a new background task."""
+                     callback: Callable = None, priority: int = 0) -> str:
+        """
+        Submit a new background task.
+
+        Args:
+            name: Display name
+            command: Command to execute
+            callback: Called with the task once it finishes
+            priority: Higher values are admitted first (FIFO within a priority)
+
+        Returns:
+            Task ID
+        """
+        key = SingleFlight.key(command)
         async with self._lock:
             task_id = self._generate_task_id()
             task = BackgroundTask(
                 id=task_id,
                 name=name,
                 command=command,
-                callback=callback
+                callback=callback,
+                priority=priority,
             )
             self.tasks[task_id] = task
 
-            # Check if we can run immediately
-            running_count = sum(1 for t in self.tasks.values()
-                               if t.status == TaskStatus.RUNNING)
+            leader_id = self.singleflight.lookup(key)
+            if leader_id is not None:
+                self._attach(task, self.tasks[leader_id])
+                return task_id
+            self.singleflight.add(key, task_id)
 
-            if running_count < self.max_concurrent:
-                asyncio_task = asyncio.create_task(self._execute_task(task_id))
-                self._running_tasks[task_id] = asyncio_task
+            heapq.heappush(self._pending, (-priority, self._task_counter, task_id))
+            self._pending_count += 1
+            self._admit_pending()
 
             return task_id
 
+    def _attach(self, task: BackgroundTask, leader: BackgroundTask) -> None:
+        """Make task follow leader's process instead of starting its own."""
+        task.shared_with = leader.id
+        task.status = leader.status
+        if leader.status == TaskStatus.PENDING and task.priority > leader.priority:
+            # Admit the shared task as early as its most urgent waiter;
+            # the old heap entry is dropped lazily once it has started
+            leader.priority = task.priority
+            heapq.heappush(self._pending, (-task.priority, self._task_counter, leader.id))
+        task.started_at = leader.started_at
+        task.output_buffer = leader.output_buffer
+        task.error_buffer = leader.error_buffer
+        self._followers.setdefault(leader.id, []).append(task.id)
+
+    def _followers_of(self, task_id: str) -> List[BackgroundTask]:
+        """Tasks still attached to task_id's process."""
+        followers = (self.tasks[fid] for fid in self._followers.get(task_id, ()))
+        return [follower for follower in followers if not follower.is_done]
+
+    def _settle(self, task: BackgroundTask) -> None:
+        """
+        Task reached a terminal state: stop sharing it and finish its
+        followers with the same outcome.
+        """
+        self.singleflight.remove(SingleFlight.key(task.command), task.id)
+        for follower in self._followers_of(task.id):
+            follower.status = task.status
+            follower.exit_code = task.exit_code
+            follower.started_at = follower.started_at or task.started_at
+            follower.completed_at = task.completed_at
+            if follower.callback:
+                asyncio.create_task(self._finish_follower(follower))
+            else:
+                follower.done_event.set()
+        self._followers.pop(task.id, None)
+
+    async def _finish_follower(self, task: BackgroundTask) -> None:
+        try:
+            ret = task.callback(task)
+            if asyncio.iscoroutine(ret):
+                await ret
+        except Exception as e:
+            task.error_buffer.append(str(e))
+        finally:
+            task.done_event.set()
+
+    def _admit_pending(self) -> None:
+        """
+        Start as many pending tasks as there are free slots.
+
+        Runs synchronously on the event loop, so the capacity check and the
+        admission cannot interleave with another submit or completion.
+        """
+        while self._pending and len(self._running_tasks) < self.max_concurrent:
+            _, _, task_id = heapq.heappop(self._pending)
+            task = self.tasks.get(task_id)
+            # Cancelled entries stay in the heap and are dropped lazily here
+            if not task or task.status != TaskStatus.PENDING:
+                continue
+
+            self._pending_count -= 1
+            task.status = TaskStatus.RUNNING
+            asyncio_task = asyncio.create_task(self._execute_task(task_id))
+            self._running_tasks[task_id] = asyncio_task
+            asyncio_task.add_done_callback(
+                lambda _t, tid=task_id: self._on_task_done(tid)
+            )
+
+    def _on_task_done(self, task_id: str) -> None:
+        """Release a slot and refill it from the pending queue."""
+        self._running_tasks.pop(task_id, None)
+        task = self.tasks.get(task_id)
+        if task and task.status == TaskStatus.RUNNING:
+            # Cancelled before the coroutine got a chance to run
+            task.status = TaskStatus.CANCELLED
+            task.completed_at = datetime.now()
+        if task:
+            self._settle(task)
+            task.done_event.set()
+        self._admit_pending()
+
     async def _execute_task(self, task_id: str) -> None:
         """Execute a background task."""
         task = self.tasks.get(task_id)
@@ -96,23 +405,12 @@ class BackgroundTaskManager:
 
         task.status = TaskStatus.RUNNING
         task.started_at = datetime.now()
+        for follower in self._followers_of(task_id):
+            follower.status = TaskStatus.RUNNING
+            follower.started_at = task.started_at
 
         try:
-            # Parse command
-            if sys.platform == 'win32':
-                process = await asyncio.create_subprocess_shell(
-                    task.command,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-            else:
-                args = shlex.split(task.command)
-                process = await asyncio.create_subprocess_exec(
-                    *args,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-
+            process = await spawn_process(task.command)
             task.process = process
 
             # Stream output
@@ -130,6 +428,8 @@ class BackgroundTaskManager:
             )
 
             await process.wait()
+            # Submits from here on start a fresh run instead of attaching
+            self.singleflight.remove(SingleFlight.key(task.command), task_id)
             task.exit_code = process.returncode
             task.status = TaskStatus.COMPLETED if task.exit_code == 0 else TaskStatus.FAILED
             task.completed_at = datetime.now()
@@ -151,28 +451,26 @@ class BackgroundTaskManager:
             task.completed_at = datetime.now()
             task.error_buffer.append(str(e))
 
-        # Start next pending task
-        await self._start_next_pending()
-
-    async def _start_next_pending(self) -> None:
-        """Start the next pending task if capacity allows."""
-        async with self._lock:
-            running_count = sum(1 for t in self.tasks.values()
-                               if t.status == TaskStatus.RUNNING)
-
-            if running_count < self.max_concurrent:
-                for task_id, task in self.tasks.items():
-                    if task.status == TaskStatus.PENDING:
-                        asyncio_task = asyncio.create_task(self._execute_task(task_id))
-                        self._running_tasks[task_id] = asyncio_task
-                        break
-
     async def cancel(self, task_id: str) -> bool:
-        """Cancel a running task."""
+        """
+        Cancel a running task.
+
+        A task sharing another's process is only detached from it;
+        cancelling the task that started the process also cancels the
+        tasks attached to it.
+        """
         task = self.tasks.get(task_id)
         if not task:
             return False
 
+        if task.shared_with is not None:
+            if task.is_done:
+                return False
+            task.status = TaskStatus.CANCELLED
+            task.completed_at = datetime.now()
+            task.done_event.set()
+            return True
+
         if task.status == TaskStatus.RUNNING:
             if task_id in self._running_tasks:
                 self._running_tasks[task_id].cancel()
@@ -180,9 +478,14 @@ class BackgroundTaskManager:
                 task.process.terminate()
             task.status = TaskStatus.CANCELLED
             task.completed_at = datetime.now()
+            self.singleflight.remove(SingleFlight.key(task.command), task_id)
             return True
         elif task.status == TaskStatus.PENDING:
             task.status = TaskStatus.CANCELLED
+            task.completed_at = datetime.now()
+            self._settle(task)
+            task.done_event.set()
+            self._pending_count -= 1
             return True
 
         return False
@@ -196,15 +499,48 @@ class BackgroundTaskManager:
         """Get task by ID."""
         return self.tasks.get(task_id)
 
+    async def as_completed(self, task_ids: List[str],
+                           timeout: float = None) -> AsyncIterator[BackgroundTask]:
+        """
+        Yield tasks in the order they finish.
+
+        Args:
+            task_ids: Tasks to wait on (unknown IDs are ignored)
+            timeout: Overall timeout in seconds; unfinished tasks are not yielded
+        """
+        waiters = {
+            asyncio.ensure_future(task.wait())
+            for task in (self.tasks.get(tid) for tid in task_ids) if task
+        }
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+
+        try:
+            while waiters:
+                remaining = None
+                if deadline is not None:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                done, waiters = await asyncio.wait(
+                    waiters, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+                )
+                for waiter in done:
+                    yield waiter.result()
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+
     def get_running_tasks(self) -> List[BackgroundTask]:
         """Get all running tasks."""
-        return [t for t in self.tasks.values() if t.status == TaskStatus.RUNNING]
+        return [self.tasks[tid] for tid in self._running_tasks
+                if self.tasks[tid].status == TaskStatus.RUNNING]
 
     def get_task_output(self, task_id: str) -> str:
         """Get full output for a task."""
         task = self.tasks.get(task_id)
         if task:
-            return '\n'.join(task.output_buffer)
+            return task.output_buffer.getvalue()
         return ""
 
     def get_task_status_table(self) -> Table:
@@ -247,10 +583,18 @@ class AsyncEngine:
     Handles command execution, output streaming, and process management.
     """
 
-    def __init__(self, console: Console = None):
+    def __init__(self, console: Console = None, render_fps: int = 20,
+                 max_render_rate: int = 2000, raw_output: bool = False):
         self.console = console or Console()
         self.task_manager = BackgroundTaskManager()
         self._output_callbacks: List[Callable] = []
+        # Identical concurrent execute() calls share one process
+        self.singleflight = SingleFlight()
+
+        # Terminal rendering of streamed output (see StreamRenderer)
+        self.render_fps = render_fps
+        self.max_render_rate = max_render_rate
+        self.raw_output = raw_output
 
     def add_output_callback(self, callback: Callable[[str], None]) -> None:
         """Add callback for real-time output streaming."""
@@ -262,7 +606,11 @@ class AsyncEngine:
             self._output_callbacks.remove(callback)
 
     async def execute(self, command: str, stream_output: bool = True,
-                      timeout: int = None) -> Dict[str, Any]:
+                      timeout: int = None, parser: StreamParser = None,
+                      on_finding: Callable[[StreamFinding], Any] = None,
+                      indicators: IndicatorMatcher = None,
+                      on_indicator: Callable[[str, str], Any] = None,
+                      output_prefix: str = StreamRenderer.PREFIX) -> Dict[str, Any]:
         """
         Execute a command asynchronously.
 
@@ -270,36 +618,190 @@ class AsyncEngine:
             command: The command to execute
             stream_output: Whether to stream output in real-time
             timeout: Optional timeout in seconds
+            parser: Streaming parser fed every stdout line as it arrives
+            on_finding: Called (or awaited) with each finding the parser emits
+            indicators: Success/fail indicators matched against every
+                stdout and stderr line. The first fail condition terminates
+                the process and fails the run; success still requires a
+                zero exit code.
+            on_indicator: Called (or awaited) with (kind, indicator) for the
+                first success indicator and the fail condition, as they appear
+            output_prefix: Prefix for each streamed output line
 
         Returns:
-            Dict with 'output', 'errors', 'exit_code', 'success'
+            Dict with 'output', 'errors', 'exit_code', 'success',
+            'findings' (streamed parser findings), and with
+            indicators 'matched' / 'failed_on' (the indicator seen, or None).
+            A call made while the same command (with the same timeout,
+            parser type and indicators) is already running attaches to
+            that run instead: its output is streamed and its callbacks are
+            called as the run goes, and it returns a copy of the result
+            with 'shared': True.
+
+            'output' is an OutputCapture, not a str: stdout may be spilled
+            to disk, so call getvalue() for the text, or iterate / use
+            lines() and tail() to read it in parts. 'errors' is a str.
+        """
+        key = SingleFlight.key(command)
+        if key is not None:
+            key = (key, timeout, type(parser) if parser else None, indicators)
+
+        seen: List[tuple] = []
+        flight = self.singleflight.lookup(key)
+        while flight is not None:
+            result = await self._follow(flight, command, stream_output, output_prefix,
+                                        on_finding, on_indicator, seen)
+            if result is not None:
+                return result
+            # The running call went away: attach to whoever took over,
+            # or run it ourselves, without repeating delivered events
+            on_finding = self._unseen(on_finding, seen, 'finding')
+            on_indicator = self._unseen(on_indicator, seen, 'indicator')
+            flight = self.singleflight.lookup(key)
+
+        flight = Flight(key)
+        self.singleflight.add(key, flight)
+        try:
+            result = await self._execute(command, stream_output, output_prefix, timeout,
+                                         parser, on_finding, indicators, on_indicator,
+                                         flight)
+            flight.finish(result)
+            return result
+        finally:
+            self.singleflight.remove(key, flight)
+            flight.abort()
+
+    async def _follow(self, flight: Flight, command: str, stream_output: bool,
+                      output_prefix: str,
+                      on_finding: Optional[Callable[[StreamFinding], Any]],
+                      on_indicator: Optional[Callable[[str, str], Any]],
+                      seen: List[tuple]) -> Optional[Dict[str, Any]]:
+        """
+        Receive a running call's output, findings and indicators as they
+        happen. Returns a copy of its result marked 'shared', or None if
+        it went away first. Delivered events are recorded in seen.
         """
+        renderer = None
+        if stream_output:
+            self.console.print(f"  [dim]Attached to running command: {command}[/dim]")
+            renderer = StreamRenderer(self.console, fps=self.render_fps,
+                                      max_lines_per_sec=self.max_render_rate,
+                                      raw=self.raw_output, prefix=output_prefix)
+            renderer.start()
+
+        queue = flight.subscribe(with_lines=stream_output)
+        positions = [0] * len(flight.streams)
+
+        async def replay() -> None:
+            """Render the lines captured since the last replay."""
+            for i, (capture, style) in enumerate(flight.streams):
+                while positions[i] < len(capture):
+                    batch = capture.lines(positions[i], positions[i] + Flight.REPLAY_BATCH)
+                    for line in batch:
+                        renderer.push(line, style)
+                    positions[i] += len(batch)
+                    await asyncio.sleep(0)
+            flight.wait_lines(queue)
+
+        try:
+            while True:
+                event = await queue.get()
+                kind, args = event[0], event[1:]
+                if kind == 'lines':
+                    await replay()
+                elif kind == 'finding' or kind == 'indicator':
+                    seen.append(event)
+                    callback = on_finding if kind == 'finding' else on_indicator
+                    if callback:
+                        ret = callback(*args)
+                        if asyncio.iscoroutine(ret):
+                            await ret
+                elif kind == 'done':
+                    if renderer:
+                        await replay()
+                    result = args[0]
+                    return dict(result, findings=list(result['findings']), shared=True)
+                else:
+                    return None
+        finally:
+            flight.unsubscribe(queue)
+            if renderer:
+                await renderer.close()
+
+    @staticmethod
+    def _unseen(callback: Optional[Callable], seen: List[tuple],
+                kind: str) -> Optional[Callable]:
+        """Wrap callback to skip events already delivered."""
+        if callback is None:
+            return None
+
+        def wrapper(*args):
+            if (kind, *args) in seen:
+                return None
+            return callback(*args)
+        return wrapper
+
+    async def _execute(self, command: str, stream_output: bool, output_prefix: str,
+                       timeout: Optional[int], parser: Optional[StreamParser],
+                       on_finding: Optional[Callable[[StreamFinding], Any]],
+                       indicators: Optional[IndicatorMatcher],
+                       on_indicator: Optional[Callable[[str, str], Any]],
+                       flight: Flight) -> Dict[str, Any]:
+        """Run one command for execute(), publishing to its flight; see there."""
+        output_lines = OutputCapture()
+        error_lines = OutputCapture(tail_lines=500)
+        findings: List[StreamFinding] = []
         result = {
-            'output': '',
+            'output': output_lines,
             'errors': '',
             'exit_code': -1,
             'success': False,
             'timed_out': False,
+            'findings': findings,
         }
+        if indicators:
+            result['matched'] = None
+            result['failed_on'] = None
+        flight.result = result
+        flight.streams = [(output_lines, None), (error_lines, "yellow")]
+
+        renderer = None
+        if stream_output:
+            renderer = StreamRenderer(self.console, fps=self.render_fps,
+                                      max_lines_per_sec=self.max_render_rate,
+                                      raw=self.raw_output, prefix=output_prefix)
+            renderer.start()
+
+        async def emit(new_findings: List[StreamFinding]) -> None:
+            for finding in new_findings:
+                findings.append(finding)
+                flight.publish('finding', finding)
+                if on_finding:
+                    ret = on_finding(finding)
+                    if asyncio.iscoroutine(ret):
+                        await ret
 
         try:
-            # Create process
-            if sys.platform == 'win32':
-                process = await asyncio.create_subprocess_shell(
-                    command,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-            else:
-                args = shlex.split(command)
-                process = await asyncio.create_subprocess_exec(
-                    *args,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                )
-
-            output_lines = []
-            error_lines = []
+            process = await spawn_process(command)
+
+            async def check(line: str) -> None:
+                hit = indicators.match(line)
+                if hit is None or result['failed_on']:
+                    return
+                kind, indicator = hit
+                if kind == IndicatorMatcher.FAIL:
+                    # The tool already told us it failed; stop it now
+                    result['failed_on'] = indicator
+                    process.terminate()
+                elif result['matched'] is None:
+                    result['matched'] = indicator
+                else:
+                    return
+                flight.publish('indicator', kind, indicator)
+                if on_indicator:
+                    ret = on_indicator(kind, indicator)
+                    if asyncio.iscoroutine(ret):
+                        await ret
 
             async def stream_stdout():
                 while True:
@@ -308,10 +810,17 @@ class AsyncEngine:
                         break
                     decoded = line.decode('utf-8', errors='replace').rstrip()
                     output_lines.append(decoded)
-                    if stream_output:
-                        self.console.print(f"  [dim]│[/dim] {decoded}")
+                    flight.lines_added()
+                    if renderer:
+                        renderer.push(decoded)
                         for callback in self._output_callbacks:
                             callback(decoded)
+                    if parser:
+                        await emit(parser.feed(decoded))
+                    if indicators:
+                        await check(decoded)
+                if parser:
+                    await emit(parser.close())
 
             async def stream_stderr():
                 while True:
@@ -320,8 +829,11 @@ class AsyncEngine:
                         break
                     decoded = line.decode('utf-8', errors='replace').rstrip()
                     error_lines.append(decoded)
-                    if stream_output:
-                        self.console.print(f"  [dim]│[/dim] [yellow]{decoded}[/yellow]")
+                    flight.lines_added()
+                    if renderer:
+                        renderer.push(decoded, style="yellow")
+                    if indicators:
+                        await check(decoded)
 
             try:
                 if timeout:
@@ -338,15 +850,26 @@ class AsyncEngine:
                 await process.wait()
                 result['timed_out'] = True
 
-            result['output'] = '\n'.join(output_lines)
-            result['errors'] = '\n'.join(error_lines)
+            # Calls from here on must start a fresh run, not pick up this one
+            self.singleflight.remove(flight.key, flight)
+
+            result['errors'] = error_lines.getvalue()
             result['exit_code'] = process.returncode
+            # A success indicator only releases dependents early: plain
+            # substrings like "open" also appear in error text, so the
+            # exit code still decides success
             result['success'] = process.returncode == 0
+            if indicators and result['failed_on']:
+                result['success'] = False
 
         except FileNotFoundError:
             result['errors'] = f"Command not found: {command.split()[0]}"
         except Exception as e:
             result['errors'] = str(e)
+        finally:
+            if renderer:
+                await renderer.close()
+                result['suppressed_lines'] = renderer.suppressed
 
         return result
 
@@ -355,6 +878,13 @@ class AsyncEngine:
         """Execute command in background, returns task ID."""
         return await self.task_manager.submit(name, command, callback)
 
+    def singleflight_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters of command sharing, for execute() and background tasks."""
+        return {
+            'execute': self.singleflight.stats(),
+            'background': self.task_manager.singleflight.stats(),
+        }
+
     async def execute_chain(self, commands: List[Dict[str, str]],
                             stop_on_failure: bool = True) -> List[Dict[str, Any]]:
         """
@@ -408,6 +938,232 @@ class AsyncEngine:
         return [r if isinstance(r, dict) else {'errors': str(r), 'success': False}
                 for r in results]
 
+    async def execute_dag(self, tasks: List[ChainTask], max_concurrent: int = 3,
+                          stream_output: bool = False,
+                          on_start: Callable[[ChainTask, str], Any] = None,
+                          on_done: Callable[[ChainTask, Dict[str, Any]], Any] = None,
+                          on_failure: Callable[[ChainTask, Dict[str, Any]], Any] = None
+                          ) -> Dict[str, Dict[str, Any]]:
+        """
+        Run tasks as soon as everything they depend on has succeeded.
+
+        Independent tasks run concurrently, so the wall-clock time is
+        roughly that of the longest dependency path. A task whose
+        dependency failed or was skipped is skipped as well, unless it
+        was already released early by a success indicator.
+
+        Args:
+            tasks: Tasks with unique names; depends_on refers to names
+            max_concurrent: Maximum commands running at once
+            stream_output: Stream output live, each line prefixed with the
+                task's label so concurrent tasks stay apart
+            on_start: Called (or awaited) with each task and its command
+                when it starts
+            on_done: Called (or awaited) with each task and its result
+            on_failure: Called (or awaited) with each task that failed and
+                its result. Tasks waiting for a slot hold until it returns;
+                a false return skips every task that has not begun
+                executing (running tasks finish without further prompts)
+
+        Returns:
+            Result dict per task name, in task order. Skipped tasks have
+            'skipped': True and 'success': False.
+
+        Raises:
+            ValueError: On unknown dependencies, duplicate names or cycles
+        """
+        by_name = {task.name: task for task in tasks}
+        if len(by_name) != len(tasks):
+            raise ValueError("Duplicate task names in DAG")
+
+        waiting: Dict[str, set] = {}
+        dependents: Dict[str, List[str]] = {name: [] for name in by_name}
+        for task in tasks:
+            for dep in task.depends_on:
+                if dep not in by_name:
+                    raise ValueError(f"Task '{task.name}' depends on unknown task '{dep}'")
+                dependents[dep].append(task.name)
+            waiting[task.name] = set(task.depends_on)
+        self._check_acyclic(waiting, dependents)
+
+        results: Dict[str, Dict[str, Any]] = {}
+        semaphore = asyncio.Semaphore(max_concurrent)
+        running: Dict[asyncio.Task, str] = {}
+        started: set = set()
+        # Failures not yet answered hold tasks back from their slots
+        unanswered = 0
+        resume = asyncio.Event()
+        resume.set()
+        stopped = False
+        # Tasks started by an early release join the loop through here
+        completed: asyncio.Queue = asyncio.Queue()
+
+        async def notify(callback: Optional[Callable], *args) -> None:
+            if callback:
+                ret = callback(*args)
+                if asyncio.iscoroutine(ret):
+                    await ret
+
+        def skipped(reason: str) -> Dict[str, Any]:
+            return {'output': OutputCapture(), 'errors': reason, 'exit_code': None,
+                    'success': False, 'skipped': True}
+
+        async def attempt(task: ChainTask) -> Dict[str, Any]:
+            command = None
+            try:
+                command = task.command(results) if callable(task.command) else task.command
+                if command is None:
+                    return skipped("Nothing to run")
+                await notify(on_start, task, command)
+                parser = get_stream_parser(command) if task.parse_output else None
+
+                def on_indicator(kind: str, indicator: str) -> None:
+                    if kind == IndicatorMatcher.SUCCESS and task.release_on_success:
+                        release(task.name)
+
+                result = await self.execute(command, stream_output=stream_output,
+                                            parser=parser, indicators=task.indicators,
+                                            on_indicator=on_indicator,
+                                            output_prefix=f"  {task.label or task.name} │ ")
+            except ChainSkip as e:
+                return skipped(str(e))
+            except Exception as e:
+                result = {'output': OutputCapture(), 'errors': str(e),
+                          'exit_code': -1, 'success': False}
+            result['command'] = command
+            return result
+
+        def failed(result: Dict[str, Any]) -> bool:
+            return not result['success'] and not result.get('skipped')
+
+        async def run(task: ChainTask) -> Dict[str, Any]:
+            nonlocal unanswered
+            async with semaphore:
+                # Tasks wait here while a failure prompt is open
+                await resume.wait()
+                if stopped:
+                    return skipped("Stopped by user")
+                result = await attempt(task)
+                if on_failure and failed(result) and not stopped:
+                    # Cleared before the slot is freed, answered in the loop
+                    unanswered += 1
+                    resume.clear()
+                return result
+
+        async def finish(name: str, result: Dict[str, Any]) -> None:
+            result['name'] = name
+            results[name] = result
+            await notify(on_done, by_name[name], result)
+            for child in dependents[name]:
+                if child in started or child in results:
+                    continue
+                if not result['success']:
+                    await finish(child, skipped(f"Dependency '{name}' did not succeed"))
+                    continue
+                waiting[child].discard(name)
+                if not waiting[child]:
+                    start(child)
+
+        def release(name: str) -> None:
+            """Treat a still-running task as succeeded for its dependents."""
+            for child in dependents[name]:
+                waiting[child].discard(name)
+                if not waiting[child] and child not in started and child not in results:
+                    start(child)
+
+        def start(name: str) -> None:
+            started.add(name)
+            runner = asyncio.create_task(run(by_name[name]))
+            runner.add_done_callback(completed.put_nowait)
+            running[runner] = name
+
+        try:
+            for task in tasks:
+                if not waiting[task.name]:
+                    start(task.name)
+
+            while running:
+                finished = await completed.get()
+                name = running.pop(finished)
+                result = finished.result()
+                await finish(name, result)
+                if on_failure and failed(result) and not resume.is_set():
+                    # The prompt gets the task that failed, popped with its result
+                    if not stopped:
+                        proceed = on_failure(by_name[name], result)
+                        if asyncio.iscoroutine(proceed):
+                            proceed = await proceed
+                        stopped = not proceed
+                    unanswered -= 1
+                    if stopped or not unanswered:
+                        resume.set()
+        finally:
+            for pending in running:
+                pending.cancel()
+
+        return {task.name: results[task.name] for task in tasks}
+
+    @staticmethod
+    def _check_acyclic(waiting: Dict[str, set], dependents: Dict[str, List[str]]) -> None:
+        """Raise ValueError if the dependency graph has a cycle."""
+        remaining = {name: len(deps) for name, deps in waiting.items()}
+        ready = [name for name, count in remaining.items() if not count]
+        visited = 0
+        while ready:
+            name = ready.pop()
+            visited += 1
+            for child in dependents[name]:
+                remaining[child] -= 1
+                if not remaining[child]:
+                    ready.append(child)
+        if visited != len(remaining):
+            cyclic = sorted(name for name, count in remaining.items() if count)
+            raise ValueError(f"Dependency cycle between tasks: {', '.join(cyclic)}")
+
+    async def execute_batch(self, template: str, param: str, values: List[str],
+                            max_concurrent: int = 3) -> List[Dict[str, Any]]:
+        """
+        Run one command template over many values.
+
+        Templates with a fast path (e.g. echo '{data}' | base64 -d) are
+        answered in-process; other values run as normal commands.
+
+        Args:
+            template: Command template with a {param} placeholder
+            param: Name of the placeholder to fill
+            values: One value per run
+            max_concurrent: Maximum concurrent processes for the rest
+
+        Returns:
+            One result dict per value, in order, shaped like execute()'s:
+            'output' is an OutputCapture (call getvalue() for a str)
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(values)
+        fast = run_fast_batch(template, param, values) or [None] * len(values)
+
+        for index, outcome in enumerate(fast):
+            if outcome is not None:
+                output = OutputCapture()
+                output.extend(line.rstrip() for line in
+                              outcome.stdout.decode('utf-8', errors='replace').splitlines())
+                results[index] = {
+                    'output': output,
+                    'errors': outcome.stderr.decode('utf-8', errors='replace').rstrip(),
+                    'exit_code': outcome.returncode,
+                    'success': outcome.returncode == 0,
+                }
+
+        compiled = CommandTemplate.compile(template)
+        slow = [i for i, result in enumerate(results) if result is None]
+        slow_results = await self.execute_parallel(
+            [{'name': values[i], 'command': compiled.render({param: values[i]})} for i in slow],
+            max_concurrent=max_concurrent,
+        )
+        for index, result in zip(slow, slow_results):
+            results[index] = result
+
+        return results
+
     def get_background_tasks(self) -> List[BackgroundTask]:
         """Get all background tasks."""
         return list(self.task_manager.tasks.values())
@@ -418,21 +1174,20 @@ class AsyncEngine:
 
     async def wait_for_task(self, task_id: str, timeout: int = None) -> Optional[BackgroundTask]:
         """Wait for a background task to complete."""
-        start = datetime.now()
-        while True:
-            task = self.task_manager.get_task(task_id)
-            if not task:
-                return None
-
-            if task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED, TaskStatus.CANCELLED):
-                return task
-
-            if timeout:
-                elapsed = (datetime.now() - start).total_seconds()
-                if elapsed >= timeout:
-                    return task
+        task = self.task_manager.get_task(task_id)
+        if not task:
+            return None
 
-            await asyncio.sleep(0.1)
+        try:
+            await asyncio.wait_for(task.wait(), timeout=timeout or None)
+        except asyncio.TimeoutError:
+            pass
+        return task
+
+    def as_completed(self, task_ids: List[str],
+                     timeout: float = None) -> AsyncIterator[BackgroundTask]:
+        """Iterate over background tasks as they complete."""
+        return self.task_manager.as_completed(task_ids, timeout)
 
 
 class OutputParser:
@@ -0,0 +1,304 @@
+"""
+Tajaa Fast Path
+In-process implementations of trivial encode/decode pipelines.
+Author: Tajaa
+"""
+
+import asyncio
+import base64
+import binascii
+import json
+import re
+import subprocess
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .pipeline import Pipeline, Stage
+from .template import CommandTemplate
+
+
+class Unsupported(Exception):
+    """Input the native implementation cannot reproduce exactly."""
+
+
+@dataclass
+class FastResult:
+    """Output of a pipeline run in-process."""
+    stdout: bytes
+    stderr: bytes = b""
+    returncode: int = 0
+
+
+# A stage maps its input to (output, stderr, exit code)
+StageFunc = Callable[[bytes], Tuple[bytes, bytes, int]]
+
+
+# =============================================================================
+# NATIVE STAGES
+# =============================================================================
+
+BASE64_CHARS = re.compile(rb'^[A-Za-z0-9+/]*={0,2}$')
+BASE32_CHARS = re.compile(rb'^[A-Z2-7]*={0,6}$')
+HEX_CHARS = re.compile(rb'^(?:[0-9A-Fa-f]{2})*$')
+ROT13 = bytes.maketrans(
+    b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz',
+    b'NOPQRSTUVWXYZABCDEFGHIJKLMnopqrstuvwxyzabcdefghijklm',
+)
+
+
+def base64_decode(data: bytes) -> Tuple[bytes, bytes, int]:
+    """`base64 -d`, including GNU's handling of missing padding."""
+    data = data.replace(b'\n', b'')
+    if not BASE64_CHARS.match(data):
+        raise Unsupported
+    missing = -len(data) % 4
+    if not missing:
+        return base64.b64decode(data), b"", 0
+    if b'=' in data or missing == 3:
+        raise Unsupported
+    # GNU prints what it could decode, then complains
+    return base64.b64decode(data + b'=' * missing), b"base64: invalid input\n", 1
+
+
+def base64_encode(data: bytes) -> Tuple[bytes, bytes, int]:
+    """`base64`, wrapped at 76 columns."""
+    encoded = base64.b64encode(data)
+    lines = [encoded[i:i + 76] for i in range(0, len(encoded), 76)]
+    return b''.join(line + b'\n' for line in lines), b"", 0
+
+
+def base32_decode(data: bytes) -> Tuple[bytes, bytes, int]:
+    """`base32 -d` for well-formed input."""
+    data = data.replace(b'\n', b'')
+    if len(data) % 8 or not BASE32_CHARS.match(data):
+        raise Unsupported
+    try:
+        return base64.b32decode(data), b"", 0
+    except binascii.Error:
+        raise Unsupported
+
+
+def hex_decode(data: bytes) -> Tuple[bytes, bytes, int]:
+    """`xxd -r -p` for plain hex separated by whitespace."""
+    data = b''.join(data.split())
+    if not HEX_CHARS.match(data):
+        raise Unsupported
+    return binascii.unhexlify(data), b"", 0
+
+
+def rot13(data: bytes) -> Tuple[bytes, bytes, int]:
+    """`tr 'A-Za-z' 'N-ZA-Mn-za-m'`."""
+    return data.translate(ROT13), b"", 0
+
+
+def cut_field(delimiter: bytes, field: int) -> StageFunc:
+    """`cut -d<delimiter> -f<field>`."""
+    def stage(data: bytes) -> Tuple[bytes, bytes, int]:
+        lines = data.split(b'\n')
+        trailing = lines.pop() if lines else b''
+        if trailing:
+            lines.append(trailing)
+        out = []
+        for line in lines:
+            parts = line.split(delimiter)
+            # cut prints lines without the delimiter unchanged
+            out.append(line if len(parts) == 1 else
+                       parts[field - 1] if field <= len(parts) else b'')
+        return b''.join(line + b'\n' for line in out), b"", 0
+    return stage
+
+
+# jq 1.6 stores numbers as doubles and limits nesting depth
+JQ_MAX_INT = 2 ** 53
+JQ_MAX_DEPTH = 256
+
+
+def _jq_int(text: str) -> int:
+    value = int(text)
+    if abs(value) > JQ_MAX_INT or text == '-0':
+        raise Unsupported
+    return value
+
+
+def _jq_reject(text: str):
+    # jq's number formatting differs from Python's
+    raise Unsupported
+
+
+def _jq_string(text: str) -> bool:
+    """Whether jq prints the string as json.dumps does."""
+    try:
+        text.encode('utf-8')
+    except UnicodeEncodeError:
+        # Lone surrogates; jq substitutes U+FFFD
+        return False
+    # jq escapes DEL, json.dumps leaves it raw
+    return '\x7f' not in text
+
+
+def _jq_exact(value, depth: int = 0) -> bool:
+    if isinstance(value, str):
+        return _jq_string(value)
+    if isinstance(value, (dict, list)):
+        if depth >= JQ_MAX_DEPTH:
+            return False
+        if isinstance(value, dict):
+            return all(_jq_string(k) and _jq_exact(v, depth + 1) for k, v in value.items())
+        return all(_jq_exact(v, depth + 1) for v in value)
+    return True
+
+
+def jq_identity(data: bytes) -> Tuple[bytes, bytes, int]:
+    """
+    `jq .` for a single JSON document whose output matches jq 1.6 byte
+    for byte: integers within 2**53, no floats, no DEL or lone
+    surrogates in strings, at most 256 levels deep.
+    """
+    try:
+        value = json.loads(data, parse_int=_jq_int, parse_float=_jq_reject,
+                           parse_constant=_jq_reject)
+    except (ValueError, RecursionError):
+        raise Unsupported
+    if not _jq_exact(value):
+        raise Unsupported
+    return (json.dumps(value, indent=2, ensure_ascii=False) + '\n').encode(), b"", 0
+
+
+# argv -> native implementation of that stage
+NATIVE_STAGES: Dict[Tuple[str, ...], StageFunc] = {
+    ('base64', '-d'): base64_decode,
+    ('base64', '--decode'): base64_decode,
+    ('base64',): base64_encode,
+    ('base32', '-d'): base32_decode,
+    ('base32', '--decode'): base32_decode,
+    ('xxd', '-r', '-p'): hex_decode,
+    ('xxd', '-p', '-r'): hex_decode,
+    ('tr', 'A-Za-z', 'N-ZA-Mn-za-m'): rot13,
+    ('cut', '-d.', '-f2'): cut_field(b'.', 2),
+    ('cut', '-d', '.', '-f2'): cut_field(b'.', 2),
+    ('jq', '.'): jq_identity,
+}
+
+
+# =============================================================================
+# MATCHING
+# =============================================================================
+
+def _echo_input(stage: Stage) -> Optional[bytes]:
+    """Output of an `echo` first stage, or None if it isn't a plain echo."""
+    if stage.argv[0] != 'echo' or stage.stdin or stage.stdout is not None:
+        return None
+    args = stage.argv[1:]
+    newline = True
+    if args and args[0] == '-n':
+        newline = False
+        args = args[1:]
+    if args and args[0].startswith('-') and len(args[0]) > 1:
+        # -e and friends change the output
+        return None
+    return (' '.join(args) + ('\n' if newline else '')).encode()
+
+
+def _native_chain(stages: List[Stage]) -> Optional[List[Tuple[StageFunc, bool]]]:
+    """Native functions for every stage after echo, with stderr visibility."""
+    chain = []
+    for stage in stages:
+        func = NATIVE_STAGES.get(tuple(stage.argv))
+        if func is None or stage.stdin or stage.stdout is not None:
+            return None
+        if stage.stderr not in (None, subprocess.DEVNULL):
+            return None
+        chain.append((func, stage.stderr is None))
+    return chain
+
+
+def _run_chain(chain: List[Tuple[StageFunc, bool]], data: bytes) -> FastResult:
+    stderr = []
+    code = 0
+    for func, show_errors in chain:
+        data, errors, code = func(data)
+        if show_errors and errors:
+            stderr.append(errors)
+    return FastResult(data, b''.join(stderr), code)
+
+
+def run_fast_path(pipeline: Pipeline) -> Optional[FastResult]:
+    """
+    Run `echo ... | <native stages>` in-process.
+
+    Returns:
+        FastResult, or None if the pipeline has to run for real
+    """
+    if len(pipeline.stages) < 2 or pipeline.sinks:
+        return None
+    data = _echo_input(pipeline.stages[0])
+    chain = _native_chain(pipeline.stages[1:])
+    if data is None or chain is None:
+        return None
+    try:
+        return _run_chain(chain, data)
+    except Unsupported:
+        return None
+
+
+def run_fast_batch(template: str, param: str,
+                   values: Iterable[str]) -> Optional[List[Optional[FastResult]]]:
+    """
+    Run one command template over many values in-process.
+
+    The pipeline is parsed and matched once; each value then only goes
+    through the native stages. Entries are None for values that need
+    the real tools.
+
+    Returns:
+        One result per value, or None if the template has no fast path
+    """
+    marker = '\x00tajaa\x00'
+    command = CommandTemplate.compile(template).render({param: marker})
+    try:
+        pipeline = Pipeline.parse(command)
+    except ValueError:
+        return None
+    if len(pipeline.stages) < 2 or pipeline.sinks:
+        return None
+
+    echo = _echo_input(pipeline.stages[0])
+    chain = _native_chain(pipeline.stages[1:])
+    if echo is None or chain is None or echo.count(marker.encode()) != 1:
+        return None
+    prefix, suffix = echo.split(marker.encode())
+
+    results: List[Optional[FastResult]] = []
+    for value in values:
+        try:
+            results.append(_run_chain(chain, prefix + value.encode() + suffix))
+        except Unsupported:
+            results.append(None)
+    return results
+
+
+# =============================================================================
+# PROCESS ADAPTER
+# =============================================================================
+
+class FastPathProcess:
+    """Process-like handle over a finished FastResult, for the engine."""
+
+    def __init__(self, result: FastResult):
+        self.stdout = asyncio.StreamReader()
+        self.stdout.feed_data(result.stdout)
+        self.stdout.feed_eof()
+        self.stderr = asyncio.StreamReader()
+        self.stderr.feed_data(result.stderr)
+        self.stderr.feed_eof()
+        self.returncode = result.returncode
+        self.pid = None
+
+    async def wait(self) -> int:
+        return self.returncode
+
+    def terminate(self) -> None:
+        pass
+
+    def kill(self) -> None:
+        pass
@@ -5,7 +5,7 @@ Author: Tajaa
 """
 
 import re
-from typing import Dict, List, Optional, Any, Tuple, Set
+from typing import Dict, Iterable, List, Optional, Any, Tuple, Set
 from dataclasses import dataclass, field
 from collections import defaultdict
 
@@ -19,6 +19,11 @@ from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 
+from .portset import PortSet
+from .database import FindingType
+from .parsers import StreamFinding
+from .template import CommandTemplate
+
 
 @dataclass
 class ToolInfo:
@@ -28,6 +33,7 @@ class ToolInfo:
     description: str
     category: str
     tags: List[str] = field(default_factory=list)
+    command: str = ""  # Command template, placeholders included
     port_relevance: List[int] = field(default_factory=list)  # Relevant ports
     service_relevance: List[str] = field(default_factory=list)  # Relevant services
     follows: List[str] = field(default_factory=list)  # Tools this naturally follows
@@ -46,19 +52,94 @@ class Suggestion:
     priority: int = 0  # Higher = more important
 
 
+class PrefixIndex:
+    """
+    Prefix trie over indexed words.
+    Every node keeps the IDs of all tools with a word under that prefix,
+    so a prefix lookup is a walk of len(prefix) nodes.
+    """
+
+    def __init__(self):
+        self._root: Dict[str, Any] = {}
+        self._words: Dict[str, Set[str]] = defaultdict(set)
+        self._tool_words: Dict[str, Set[str]] = defaultdict(set)
+
+    def add(self, word: str, tool_id: str) -> None:
+        """Index a lower-cased word for a tool."""
+        self._words[word].add(tool_id)
+        self._tool_words[tool_id].add(word)
+        node = self._root
+        for char in word:
+            node = node.setdefault(char, {})
+            node.setdefault(None, set()).add(tool_id)
+
+    def remove(self, tool_id: str) -> None:
+        """Drop every word indexed for a tool, pruning emptied nodes."""
+        for word in self._tool_words.pop(tool_id, ()):
+            self._words[word].discard(tool_id)
+            if not self._words[word]:
+                del self._words[word]
+
+            # A shared prefix may already be pruned by an earlier word
+            path = []
+            node = self._root
+            for char in word:
+                if char not in node:
+                    break
+                path.append((node, char))
+                node = node[char]
+            for parent, char in reversed(path):
+                child = parent[char]
+                child[None].discard(tool_id)
+                if not child[None]:
+                    del parent[char]
+
+    def exact(self, word: str) -> Set[str]:
+        """Tools with exactly this word."""
+        return self._words.get(word, set())
+
+    def prefix(self, prefix: str) -> Set[str]:
+        """Tools with any word starting with this prefix."""
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return set()
+        return node.get(None, set())
+
+
 class FuzzySearchEngine:
     """
     Fuzzy search engine for finding tools by name, description, or tags.
     Uses rapidfuzz for high-performance fuzzy matching.
     """
 
+    # Description/tag matches rank below name matches
+    TEXT_WEIGHT = 0.8
+    # Floor scores for tools found through the word index
+    EXACT_SCORE = 90
+    PREFIX_SCORE = 75
+
+    WORD_PATTERN = re.compile(r'\w+')
+    PLACEHOLDER_PATTERN = re.compile(r'\{\w+\}')
+
     def __init__(self):
         self.tools: Dict[str, ToolInfo] = {}
-        self._search_index: Dict[str, List[str]] = defaultdict(list)
+        self._search_index = PrefixIndex()
+
+        # Lower-cased choice arrays, rebuilt lazily after tools change
+        self._choice_ids: List[str] = []
+        self._choice_positions: Dict[str, int] = {}
+        self._choice_names: List[str] = []
+        self._choice_texts: List[str] = []
+        self._choices_dirty = False
 
     def register_tool(self, tool: ToolInfo) -> None:
-        """Register a tool for searching."""
+        """Register a tool for searching, replacing any earlier entry."""
+        if tool.id in self.tools:
+            self._search_index.remove(tool.id)
         self.tools[tool.id] = tool
+        self._choices_dirty = True
 
         # Build search index
         search_terms = [
@@ -66,18 +147,57 @@ class FuzzySearchEngine:
             tool.description.lower(),
             *[tag.lower() for tag in tool.tags],
             tool.category.lower(),
+            self.PLACEHOLDER_PATTERN.sub(' ', tool.command).lower(),
         ]
 
         for term in search_terms:
-            words = re.split(r'\W+', term)
-            for word in words:
-                if word:
-                    self._search_index[word].append(tool.id)
+            for word in self.WORD_PATTERN.findall(term):
+                self._search_index.add(word, tool.id)
+
+    def _build_choices(self) -> None:
+        """Precompute the lower-cased name and description/tag arrays."""
+        self._choice_ids = list(self.tools)
+        self._choice_positions = {tid: i for i, tid in enumerate(self._choice_ids)}
+        self._choice_names = [t.name.lower() for t in self.tools.values()]
+        self._choice_texts = [
+            ' '.join([t.description, *t.tags]).lower() for t in self.tools.values()
+        ]
+        self._choices_dirty = False
+
+    def lookup(self, query: str) -> Dict[str, int]:
+        """
+        Answer a query from the word index alone.
+
+        Every query word must match the start of some tool word, which
+        suits as-you-type queries; whole-word matches score higher.
+
+        Returns:
+            Dict of tool_id -> index score (empty when nothing matches)
+        """
+        words = self.WORD_PATTERN.findall(query.lower())
+        if not words:
+            return {}
+
+        hits: Optional[Set[str]] = None
+        for word in words:
+            matched = self._search_index.prefix(word)
+            hits = matched if hits is None else hits & matched
+            if not hits:
+                return {}
+        exact = hits.intersection(*(self._search_index.exact(w) for w in words))
+
+        return {
+            tid: self.EXACT_SCORE if tid in exact else self.PREFIX_SCORE
+            for tid in hits
+        }
 
     def search(self, query: str, limit: int = 10, threshold: int = 60) -> List[Tuple[ToolInfo, int]]:
         """
         Search for tools matching the query.
 
+        Tools found through the word index are fuzzy-scored on their own;
+        only queries the index cannot answer (typos) scan every tool.
+
         Args:
             query: Search query
             limit: Maximum results
@@ -90,63 +210,64 @@ class FuzzySearchEngine:
             return []
 
         query = query.lower().strip()
-        results = []
+        if self._choices_dirty:
+            self._build_choices()
+
+        indexed = self.lookup(query)
+        if indexed:
+            positions = [self._choice_positions[tid] for tid in indexed]
+            scores: Dict[int, float] = {
+                self._choice_positions[tid]: score for tid, score in indexed.items()
+            }
+        else:
+            positions = range(len(self._choice_ids))
+            scores = {}
 
-        if RAPIDFUZZ_AVAILABLE:
-            # Use rapidfuzz for fuzzy matching
-            tool_names = {tid: t.name for tid, t in self.tools.items()}
-            tool_descs = {tid: t.description for tid, t in self.tools.items()}
+        names = [self._choice_names[i] for i in positions]
+        texts = [self._choice_texts[i] for i in positions]
 
-            # Search by name
+        if RAPIDFUZZ_AVAILABLE:
+            # Choices are already lower-cased, so skip per-choice processing
             name_matches = process.extract(
                 query,
-                tool_names,
+                names,
                 scorer=fuzz.WRatio,
-                limit=limit * 2
+                processor=None,
+                limit=limit * 2,
+                score_cutoff=threshold,
             )
-
-            # Search by description
-            desc_matches = process.extract(
+            text_matches = process.extract(
                 query,
-                tool_descs,
+                texts,
                 scorer=fuzz.partial_ratio,
-                limit=limit
+                processor=None,
+                limit=limit * 2,
+                score_cutoff=threshold,
             )
 
-            # Combine and deduplicate
-            seen = set()
-            combined = []
-
-            for match_name, score, tool_id in name_matches:
-                if score >= threshold and tool_id not in seen:
-                    seen.add(tool_id)
-                    combined.append((self.tools[tool_id], score))
-
-            for match_desc, score, tool_id in desc_matches:
-                if score >= threshold and tool_id not in seen:
-                    seen.add(tool_id)
-                    # Lower score for description matches
-                    combined.append((self.tools[tool_id], int(score * 0.8)))
-
-            results = sorted(combined, key=lambda x: x[1], reverse=True)[:limit]
+            for _, score, index in name_matches:
+                index = positions[index]
+                if score > scores.get(index, 0):
+                    scores[index] = score
+            for _, score, index in text_matches:
+                index = positions[index]
+                weighted = score * self.TEXT_WEIGHT
+                if weighted > scores.get(index, 0):
+                    scores[index] = weighted
 
         else:
             # Fallback to simple substring matching
-            for tool_id, tool in self.tools.items():
-                score = 0
-                if query in tool.name.lower():
-                    score = 90
-                elif query in tool.description.lower():
-                    score = 70
-                elif any(query in tag.lower() for tag in tool.tags):
-                    score = 60
-
-                if score >= threshold:
-                    results.append((tool, score))
-
-            results = sorted(results, key=lambda x: x[1], reverse=True)[:limit]
-
-        return results
+            for index, name, text in zip(positions, names, texts):
+                if query in name:
+                    scores[index] = max(scores.get(index, 0), 90)
+                elif query in text:
+                    scores[index] = max(scores.get(index, 0), 70)
+
+        ranked = sorted(
+            ((i, s) for i, s in scores.items() if s >= threshold),
+            key=lambda item: item[1], reverse=True,
+        )[:limit]
+        return [(self.tools[self._choice_ids[i]], int(score)) for i, score in ranked]
 
     def search_by_tags(self, tags: List[str], limit: int = 20) -> List[ToolInfo]:
         """Search tools by tags."""
@@ -484,6 +605,10 @@ class AttackChainStep:
     optional_params: List[str] = field(default_factory=list)
     success_indicators: List[str] = field(default_factory=list)
     fail_conditions: List[str] = field(default_factory=list)
+    # Names of steps that must succeed first; None infers them from params
+    depends_on: Optional[List[str]] = None
+    # Params this step discovers for later steps (e.g. 'ports')
+    produces: List[str] = field(default_factory=list)
 
 
 @dataclass
@@ -495,6 +620,96 @@ class AttackChain:
     tags: List[str] = field(default_factory=list)
     difficulty: str = "medium"  # easy, medium, hard, expert
 
+    def dependencies(self) -> Dict[str, List[str]]:
+        """
+        Steps each step waits for, by step name.
+
+        Explicit depends_on wins. Otherwise a step depends on the latest
+        earlier step that produces one of its params; params nobody
+        produces (target, url, ...) are chain inputs.
+        """
+        deps: Dict[str, List[str]] = {}
+        producers: Dict[str, str] = {}
+        for step in self.steps:
+            if step.depends_on is not None:
+                deps[step.name] = list(step.depends_on)
+            else:
+                params = [*step.required_params, *step.optional_params]
+                deps[step.name] = list(dict.fromkeys(
+                    producers[param] for param in params if param in producers
+                ))
+            for param in step.produces:
+                producers[param] = step.name
+        return deps
+
+
+class ChainContext:
+    """
+    Values chain step templates are rendered with.
+
+    Starts from the chain inputs (target, url, ...) and grows with the
+    findings parsed from each finished step: {ports} as a range string,
+    {hosts}, {urls} and {databases} comma-separated, and {database} as
+    the first database that isn't a DBMS system schema.
+    """
+
+    SYSTEM_DATABASES = frozenset({
+        'information_schema', 'mysql', 'performance_schema', 'sys',
+        'master', 'model', 'msdb', 'tempdb', 'postgres', 'pg_catalog',
+    })
+
+    def __init__(self, **inputs: Any):
+        self.inputs = {name: str(value) for name, value in inputs.items()
+                       if value is not None and value != ''}
+        self.ports = PortSet()
+        self.hosts: List[str] = []
+        self.urls: List[str] = []
+        self.databases: List[str] = []
+
+    def bind(self, findings: Iterable[StreamFinding]) -> None:
+        """Add what a step discovered."""
+        base_url = self.inputs.get('url', '')
+        for finding in findings:
+            if finding.finding_type == FindingType.PORT and finding.port is not None:
+                self.ports.add(finding.port)
+            elif finding.finding_type == FindingType.HOST:
+                if finding.value not in self.hosts:
+                    self.hosts.append(finding.value)
+            elif finding.finding_type in (FindingType.URL, FindingType.FILE):
+                url = finding.value
+                if url.startswith('/') and base_url.startswith(('http://', 'https://')):
+                    url = base_url.rstrip('/') + url
+                if url not in self.urls:
+                    self.urls.append(url)
+            elif finding.finding_type == FindingType.DATABASE:
+                if finding.value not in self.databases:
+                    self.databases.append(finding.value)
+
+    def values(self) -> Dict[str, str]:
+        """Template values; discoveries override inputs of the same name."""
+        values = dict(self.inputs)
+        if self.ports:
+            values['ports'] = str(self.ports)
+        if self.hosts:
+            values['hosts'] = ','.join(self.hosts)
+        if self.urls:
+            values['urls'] = ','.join(self.urls)
+        if self.databases:
+            values['databases'] = ','.join(self.databases)
+            user = [name for name in self.databases if name.lower() not in self.SYSTEM_DATABASES]
+            values['database'] = (user or self.databases)[0]
+        return values
+
+    def missing(self, step: AttackChainStep) -> List[str]:
+        """Placeholders of the step's command that have no value yet."""
+        values = self.values()
+        return [name for name in CommandTemplate.compile(step.command_template).placeholders
+                if name not in values]
+
+    def render(self, step: AttackChainStep) -> str:
+        """The step's command with every known value filled in."""
+        return CommandTemplate.compile(step.command_template).render(self.values())
+
 
 class AttackChainOrchestrator:
     """
@@ -524,6 +739,7 @@ class AttackChainOrchestrator:
                     description="Scan common web ports",
                     required_params=['target'],
                     success_indicators=['open'],
+                    fail_conditions=['Host seems down'],
                 ),
                 AttackChainStep(
                     name="Technology Detection",
@@ -532,6 +748,7 @@ class AttackChainOrchestrator:
                     description="Identify web technologies",
                     required_params=['url'],
                     success_indicators=['Detected'],
+                    fail_conditions=['ERROR Opening'],
                 ),
                 AttackChainStep(
                     name="Directory Bruteforce",
@@ -540,6 +757,7 @@ class AttackChainOrchestrator:
                     description="Find hidden directories",
                     required_params=['url'],
                     success_indicators=['Status: 200', 'Status: 301'],
+                    fail_conditions=['unable to connect'],
                 ),
                 AttackChainStep(
                     name="Vulnerability Scan",
@@ -548,6 +766,7 @@ class AttackChainOrchestrator:
                     description="Scan for web vulnerabilities",
                     required_params=['url'],
                     success_indicators=['OSVDB'],
+                    fail_conditions=['0 host(s) tested'],
                 ),
             ]
         ))
@@ -566,6 +785,8 @@ class AttackChainOrchestrator:
                     description="Discover live hosts",
                     required_params=['network'],
                     success_indicators=['Host is up'],
+                    fail_conditions=['(0 hosts up)'],
+                    produces=['hosts'],
                 ),
                 AttackChainStep(
                     name="Full Port Scan",
@@ -574,6 +795,8 @@ class AttackChainOrchestrator:
                     description="Full TCP port scan",
                     required_params=['target'],
                     success_indicators=['open'],
+                    fail_conditions=['Host seems down'],
+                    produces=['ports'],
                 ),
                 AttackChainStep(
                     name="Service Detection",
@@ -582,6 +805,7 @@ class AttackChainOrchestrator:
                     description="Detailed service enumeration",
                     required_params=['target', 'ports'],
                     success_indicators=['VERSION'],
+                    fail_conditions=['Host seems down'],
                 ),
                 AttackChainStep(
                     name="Vulnerability Scripts",
@@ -590,6 +814,7 @@ class AttackChainOrchestrator:
                     description="Run vulnerability scripts",
                     required_params=['target', 'ports'],
                     success_indicators=['VULNERABLE'],
+                    fail_conditions=['Host seems down'],
                 ),
             ]
         ))
@@ -624,6 +849,7 @@ class AttackChainOrchestrator:
                     description="Enumerate SMB shares",
                     required_params=['target'],
                     success_indicators=['READ', 'WRITE'],
+                    fail_conditions=['Authentication error'],
                 ),
                 AttackChainStep(
                     name="Null Session",
@@ -632,6 +858,7 @@ class AttackChainOrchestrator:
                     description="Test null session access",
                     required_params=['target'],
                     success_indicators=['rpcclient $>'],
+                    fail_conditions=['NT_STATUS_ACCESS_DENIED', 'NT_STATUS_LOGON_FAILURE'],
                 ),
             ]
         ))
@@ -650,6 +877,7 @@ class AttackChainOrchestrator:
                     description="Find potential injectable endpoints",
                     required_params=['url'],
                     success_indicators=['Status: 200'],
+                    fail_conditions=['unable to connect'],
                 ),
                 AttackChainStep(
                     name="SQLi Detection",
@@ -657,7 +885,9 @@ class AttackChainOrchestrator:
                     command_template="sqlmap -u '{url}' --batch --random-agent",
                     description="Test for SQL injection",
                     required_params=['url'],
-                    success_indicators=['injectable', 'vulnerable'],
+                    success_indicators=['is vulnerable', 'identified the following injection point'],
+                    fail_conditions=['all tested parameters do not appear to be injectable'],
+                    depends_on=['Parameter Discovery'],
                 ),
                 AttackChainStep(
                     name="Database Enumeration",
@@ -666,6 +896,9 @@ class AttackChainOrchestrator:
                     description="Enumerate databases",
                     required_params=['url'],
                     success_indicators=['available databases'],
+                    fail_conditions=['all tested parameters do not appear to be injectable'],
+                    depends_on=['SQLi Detection'],
+                    produces=['database'],
                 ),
                 AttackChainStep(
                     name="Dump Data",
@@ -674,6 +907,7 @@ class AttackChainOrchestrator:
                     description="Dump database contents",
                     required_params=['url', 'database'],
                     success_indicators=['Table:', 'dumped'],
+                    fail_conditions=['all tested parameters do not appear to be injectable'],
                 ),
             ]
         ))
@@ -716,6 +950,7 @@ class AttackChainOrchestrator:
                     description="Check sudo permissions",
                     required_params=[],
                     success_indicators=['NOPASSWD', 'may run'],
+                    fail_conditions=['may not run sudo', 'a password is required'],
                 ),
             ]
         ))
@@ -742,10 +977,13 @@ class AttackChainOrchestrator:
 
         tree = Tree(f"[bold cyan]🔗 {chain.name}[/bold cyan]")
 
+        dependencies = chain.dependencies()
         for i, step in enumerate(chain.steps, 1):
             step_node = tree.add(f"[green]Step {i}:[/green] {step.name}")
             step_node.add(f"[dim]Tool:[/dim] {step.tool}")
             step_node.add(f"[dim]Command:[/dim] [yellow]{step.command_template}[/yellow]")
+            if dependencies[step.name]:
+                step_node.add(f"[dim]After:[/dim] {', '.join(dependencies[step.name])}")
 
         return Panel(
             tree,
@@ -0,0 +1,300 @@
+"""
+Tajaa Streaming Parsers
+Incremental output parsers that emit findings while a tool is still running.
+Author: Tajaa
+"""
+
+import re
+import shlex
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import PurePath
+from typing import Dict, Iterable, List, Optional, Tuple, Type
+
+from .database import FindingType
+
+
+@dataclass
+class StreamFinding:
+    """A finding extracted from a single line of tool output."""
+    finding_type: FindingType
+    value: str
+    host: str = ""
+    port: Optional[int] = None
+    protocol: str = ""
+    service: str = ""
+    version: str = ""
+    severity: str = "info"
+    raw: str = ""
+
+
+class StreamParser:
+    """
+    Base class for incremental output parsers.
+    Feed lines (or raw chunks) as they arrive and get findings back.
+    """
+
+    tool: str = ""
+
+    def __init__(self):
+        self._partial = ""
+
+    def feed(self, line: str) -> List[StreamFinding]:
+        """Parse one complete line of output."""
+        raise NotImplementedError
+
+    def feed_chunk(self, data: str) -> List[StreamFinding]:
+        """Parse an arbitrary chunk, buffering any trailing partial line."""
+        findings = []
+        lines = (self._partial + data).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            findings.extend(self.feed(line.rstrip('\r')))
+        return findings
+
+    def close(self) -> List[StreamFinding]:
+        """Flush a buffered partial line at end of stream."""
+        partial, self._partial = self._partial, ""
+        return self.feed(partial) if partial else []
+
+
+class NmapStreamParser(StreamParser):
+    """Nmap normal output: host headers followed by port tables."""
+
+    tool = "nmap"
+
+    HOST_PATTERN = re.compile(r'Nmap scan report for (\S+)(?: \(([^)]+)\))?')
+    PORT_PATTERN = re.compile(r'^(\d+)/(tcp|udp)\s+open\s+(\S+)(?:\s+(.*))?')
+
+    def __init__(self):
+        super().__init__()
+        self.current_host = ""
+
+    def feed(self, line: str) -> List[StreamFinding]:
+        match = self.PORT_PATTERN.match(line.strip())
+        if match:
+            port = int(match.group(1))
+            protocol = match.group(2)
+            service = match.group(3)
+            version = (match.group(4) or '').strip()
+            return [
+                StreamFinding(FindingType.PORT, str(port), host=self.current_host,
+                              port=port, protocol=protocol, raw=line),
+                StreamFinding(FindingType.SERVICE, service, host=self.current_host,
+                              port=port, protocol=protocol, service=service,
+                              version=version, raw=line),
+            ]
+
+        match = self.HOST_PATTERN.search(line)
+        if match:
+            # "name (ip)" reports the address in brackets; prefer the name
+            self.current_host = match.group(1)
+            return [StreamFinding(FindingType.HOST, self.current_host,
+                                  host=self.current_host, raw=line)]
+
+        return []
+
+
+class MasscanStreamParser(StreamParser):
+    """Masscan console output."""
+
+    tool = "masscan"
+
+    PATTERN = re.compile(r'Discovered open port (\d+)/(tcp|udp) on (\S+)')
+
+    def feed(self, line: str) -> List[StreamFinding]:
+        match = self.PATTERN.search(line)
+        if not match:
+            return []
+        port = int(match.group(1))
+        return [StreamFinding(FindingType.PORT, str(port), host=match.group(3),
+                              port=port, protocol=match.group(2), raw=line)]
+
+
+class RustScanStreamParser(StreamParser):
+    """RustScan "Open host:port" lines and greppable (-g) "host -> [ports]" lines."""
+
+    tool = "rustscan"
+
+    ANSI_PATTERN = re.compile(r'\x1b\[[0-9;]*m')
+    OPEN_PATTERN = re.compile(r'^Open (\S+):(\d+)$')
+    GREPPABLE_PATTERN = re.compile(r'^(\S+) -> \[([\d,]+)\]$')
+
+    def feed(self, line: str) -> List[StreamFinding]:
+        line = self.ANSI_PATTERN.sub('', line).strip()
+        match = self.OPEN_PATTERN.match(line)
+        if match:
+            pairs = [(match.group(1), match.group(2))]
+        else:
+            match = self.GREPPABLE_PATTERN.match(line)
+            if not match:
+                return []
+            pairs = [(match.group(1), port) for port in match.group(2).split(',')]
+
+        findings = []
+        for host, port in pairs:
+            host = host.strip('[]')
+            findings.append(StreamFinding(FindingType.PORT, port, host=host,
+                                          port=int(port), protocol="tcp", raw=line))
+        return findings
+
+
+class GobusterStreamParser(StreamParser):
+    """Gobuster dir mode results."""
+
+    tool = "gobuster"
+
+    PATTERN = re.compile(r'(/\S*)\s+\(Status: (\d+)\)')
+
+    def feed(self, line: str) -> List[StreamFinding]:
+        match = self.PATTERN.search(line)
+        if not match:
+            return []
+        path = match.group(1)
+        finding_type = FindingType.FILE if '.' in path.rsplit('/', 1)[-1] else FindingType.URL
+        return [StreamFinding(finding_type, path, raw=line.strip())]
+
+
+class NiktoStreamParser(StreamParser):
+    """Nikto plain-text findings."""
+
+    tool = "nikto"
+
+    VULN_PATTERN = re.compile(r'\+ (OSVDB-\d+|[A-Z]{3,}:.*?): (.+)')
+    HOST_PATTERN = re.compile(r'\+ Target Hostname:\s+(\S+)')
+    PORT_PATTERN = re.compile(r'\+ Target Port:\s+(\d+)')
+
+    def __init__(self):
+        super().__init__()
+        self.current_host = ""
+        self.current_port: Optional[int] = None
+
+    def feed(self, line: str) -> List[StreamFinding]:
+        match = self.HOST_PATTERN.search(line)
+        if match:
+            self.current_host = match.group(1)
+            return []
+
+        match = self.PORT_PATTERN.search(line)
+        if match:
+            self.current_port = int(match.group(1))
+            return []
+
+        match = self.VULN_PATTERN.search(line)
+        if not match:
+            return []
+        return [StreamFinding(FindingType.VULNERABILITY, match.group(2).strip(),
+                              host=self.current_host, port=self.current_port,
+                              service=match.group(1), severity="low", raw=line.strip())]
+
+
+class SqlmapStreamParser(StreamParser):
+    """Database names from sqlmap's "available databases" listing."""
+
+    tool = "sqlmap"
+
+    HEADER_PATTERN = re.compile(r'^available databases \[\d+\]:')
+    ITEM_PATTERN = re.compile(r'^\[\*\] (\S+)$')
+
+    def __init__(self):
+        super().__init__()
+        self.in_list = False
+
+    def feed(self, line: str) -> List[StreamFinding]:
+        line = line.strip()
+        if self.HEADER_PATTERN.match(line):
+            self.in_list = True
+            return []
+        if not self.in_list:
+            return []
+
+        match = self.ITEM_PATTERN.match(line)
+        if not match:
+            # A blank line (or anything else) ends the listing
+            self.in_list = False
+            return []
+        return [StreamFinding(FindingType.DATABASE, match.group(1), raw=line)]
+
+
+STREAM_PARSERS: Dict[str, Type[StreamParser]] = {
+    parser.tool: parser for parser in (
+        NmapStreamParser,
+        MasscanStreamParser,
+        RustScanStreamParser,
+        GobusterStreamParser,
+        NiktoStreamParser,
+        SqlmapStreamParser,
+    )
+}
+
+
+class IndicatorMatcher:
+    """
+    Success indicators and fail conditions compiled into one regex.
+
+    Each output line is scanned once, however many indicators there are.
+    Indicators are literal, case-sensitive substrings; when a line holds
+    both kinds, the fail condition wins.
+    """
+
+    SUCCESS = "success"
+    FAIL = "fail"
+
+    def __init__(self, success: Iterable[str] = (), fail: Iterable[str] = ()):
+        self.success = tuple(dict.fromkeys(i for i in success if i))
+        self.fail = tuple(dict.fromkeys(i for i in fail if i))
+        # Group name -> (kind, indicator)
+        self._groups: Dict[str, Tuple[str, str]] = {}
+        alternatives = []
+        for kind, indicators in ((self.FAIL, self.fail), (self.SUCCESS, self.success)):
+            for indicator in indicators:
+                name = f"i{len(self._groups)}"
+                self._groups[name] = (kind, indicator)
+                alternatives.append(f"(?P<{name}>{re.escape(indicator)})")
+        self._pattern = re.compile('|'.join(alternatives)) if alternatives else None
+
+    @classmethod
+    @lru_cache(maxsize=256)
+    def compile(cls, success: Tuple[str, ...] = (),
+                fail: Tuple[str, ...] = ()) -> "IndicatorMatcher":
+        """Get a shared matcher for these indicators, building it only once."""
+        return cls(success, fail)
+
+    def __bool__(self) -> bool:
+        return self._pattern is not None
+
+    def match(self, line: str) -> Optional[Tuple[str, str]]:
+        """
+        Check one line of output.
+
+        Returns:
+            (kind, indicator) with kind SUCCESS or FAIL, or None
+        """
+        if self._pattern is None:
+            return None
+        hit = None
+        for match in self._pattern.finditer(line):
+            hit = self._groups[match.lastgroup]
+            if hit[0] == self.FAIL:
+                break
+        return hit
+
+
+def command_tool(command: str) -> str:
+    """Return the executable name of a command, skipping sudo and env vars."""
+    try:
+        args = shlex.split(command)
+    except ValueError:
+        args = command.split()
+
+    for arg in args:
+        if arg == 'sudo' or arg.startswith('-') or ('=' in arg and not arg.startswith('/')):
+            continue
+        return PurePath(arg).name
+    return ""
+
+
+def get_stream_parser(command: str) -> Optional[StreamParser]:
+    """Create a streaming parser for the tool a command runs, if one exists."""
+    parser_cls = STREAM_PARSERS.get(command_tool(command))
+    return parser_cls() if parser_cls else None
@@ -0,0 +1,453 @@
+"""
+Tajaa Native Pipelines
+Runs piped commands as connected subprocesses, without a shell.
+Author: Tajaa
+"""
+
+import asyncio
+import os
+import re
+import signal
+import subprocess
+from dataclasses import dataclass, field
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+
+class PipelineError(ValueError):
+    """Raised for command syntax that needs a real shell."""
+
+
+# Redirection targets
+DEVNULL = subprocess.DEVNULL
+STDOUT = subprocess.STDOUT
+
+# (path, append) for file redirections
+FileTarget = Tuple[str, bool]
+Target = Union[None, int, FileTarget]
+
+# Longest first, so '>>' wins over '>'
+OPERATORS = ('&>>', '&>', '>>', '>&', '>', '<', '||', '|&', '|', '&&', '&', ';;', ';', '(', ')')
+REDIRECTS = frozenset({'>', '>>', '>&', '<', '&>', '&>>'})
+HEAD_COUNT = re.compile(r'^-(?:n\s*)?(\d+)$')
+EXPANSION = re.compile(r'\$\{[^}]*\}?|\$\(|\$\w+|`')
+
+
+# =============================================================================
+# PARSING
+# =============================================================================
+
+def tokenize(command: str) -> List[Tuple[str, str]]:
+    """
+    Split a command into ('word', text) and ('op', operator) tokens,
+    applying shell quoting rules. Expansions a shell would perform
+    ($VAR, $(...), backticks) are rejected.
+    """
+    tokens: List[Tuple[str, str]] = []
+    word: List[str] = []
+    in_word = False     # A word has started (possibly as an empty '')
+    quoted = False      # Some part of the word was quoted
+    i, n = 0, len(command)
+
+    def flush() -> None:
+        nonlocal word, in_word, quoted
+        if in_word:
+            text = ''.join(word)
+            if not quoted and text.startswith('~'):
+                text = os.path.expanduser(text)
+            tokens.append(('word', text))
+        word, in_word, quoted = [], False, False
+
+    while i < n:
+        char = command[i]
+
+        if char in ' \t\n':
+            flush()
+            i += 1
+        elif char == "'":
+            end = command.find("'", i + 1)
+            if end < 0:
+                raise PipelineError("unterminated single quote")
+            word.append(command[i + 1:end])
+            in_word = quoted = True
+            i = end + 1
+        elif char == '"':
+            i += 1
+            while True:
+                if i >= n:
+                    raise PipelineError("unterminated double quote")
+                char = command[i]
+                if char == '"':
+                    i += 1
+                    break
+                if char == '\\' and i + 1 < n and command[i + 1] in '\\"$`\n':
+                    word.append(command[i + 1])
+                    i += 2
+                    continue
+                if char == '`' or (char == '$' and i + 1 < n and
+                                   (command[i + 1].isalnum() or command[i + 1] in '_{(')):
+                    raise PipelineError("shell expansion inside double quotes is not supported")
+                word.append(char)
+                i += 1
+            in_word = quoted = True
+        elif char == '\\':
+            if i + 1 < n:
+                word.append(command[i + 1])
+            in_word = quoted = True
+            i += 2
+        elif char == '`' or (char == '$' and i + 1 < n and
+                             (command[i + 1].isalnum() or command[i + 1] in '_{(')):
+            expansion = EXPANSION.match(command, i).group()
+            raise PipelineError(f"shell expansion '{expansion}' is not supported")
+        elif char in '|&;<>()':
+            op = next(op for op in OPERATORS if command.startswith(op, i))
+            # "2>" style: a bare number right before a redirection is its fd
+            if op in REDIRECTS and in_word and not quoted and ''.join(word).isdigit():
+                fd = ''.join(word)
+                word, in_word = [], False
+                tokens.append(('op', fd + op))
+            else:
+                flush()
+                tokens.append(('op', op))
+            i += len(op)
+        else:
+            word.append(char)
+            in_word = True
+            i += 1
+
+    flush()
+    return tokens
+
+
+@dataclass
+class Stage:
+    """One command in a pipeline with its redirections."""
+    argv: List[str] = field(default_factory=list)
+    stdin: Optional[str] = None
+    stdout: Target = None       # None: next stage (or the engine)
+    stderr: Target = None       # None: the pipeline's shared stderr
+
+
+@dataclass
+class TeeSink:
+    """Built-in trailing `tee`: copy lines to files."""
+    paths: List[str]
+    append: bool = False
+
+
+@dataclass
+class HeadSink:
+    """Built-in trailing `head`: stop after a number of lines."""
+    limit: int
+
+
+def _builtin_sink(stage: Stage) -> Optional[Union[TeeSink, HeadSink]]:
+    """Return a built-in replacement for a trailing tee/head stage."""
+    if stage.stdin or stage.stdout is not None or stage.stderr is not None:
+        return None
+
+    name, args = stage.argv[0], stage.argv[1:]
+    if name == 'tee':
+        append = bool(args) and args[0] in ('-a', '--append')
+        paths = args[1:] if append else args
+        if any(path.startswith('-') for path in paths):
+            return None
+        return TeeSink(paths, append)
+
+    if name == 'head':
+        if not args:
+            return HeadSink(10)
+        match = HEAD_COUNT.match(' '.join(args))
+        if match:
+            return HeadSink(int(match.group(1)))
+    return None
+
+
+class Pipeline:
+    """
+    A parsed command: stages joined by pipes, plus built-in sinks for a
+    trailing `tee` and/or `head`.
+    """
+
+    def __init__(self, stages: List[Stage], sinks: List[Union[TeeSink, HeadSink]] = None):
+        self.stages = stages
+        self.sinks = sinks or []
+
+    @classmethod
+    def parse(cls, command: str) -> "Pipeline":
+        """Parse a command line; raises PipelineError for unsupported syntax."""
+        stages = [Stage()]
+        redirect: Optional[str] = None
+
+        for kind, value in tokenize(command):
+            stage = stages[-1]
+
+            if kind == 'word':
+                if redirect:
+                    cls._apply_redirect(stage, redirect, value)
+                    redirect = None
+                else:
+                    stage.argv.append(value)
+            elif redirect:
+                raise PipelineError(f"missing target for '{redirect}'")
+            elif value == '|':
+                if not stage.argv:
+                    raise PipelineError("empty command in pipeline")
+                stages.append(Stage())
+            elif value.lstrip('0123456789') in REDIRECTS:
+                redirect = value
+            else:
+                raise PipelineError(
+                    f"'{value}' needs a shell; only pipes and redirections are supported"
+                )
+
+        if redirect:
+            raise PipelineError(f"missing target for '{redirect}'")
+        if not stages[-1].argv:
+            raise PipelineError("empty command" if len(stages) == 1 else "empty command in pipeline")
+
+        sinks: List[Union[TeeSink, HeadSink]] = []
+        while len(stages) > 1:
+            sink = _builtin_sink(stages[-1])
+            if sink is None:
+                break
+            sinks.insert(0, sink)
+            stages.pop()
+
+        return cls(stages, sinks)
+
+    def key(self) -> Tuple:
+        """
+        Hashable form of the parsed command: argv, redirections and sinks.
+
+        Commands that differ only in quoting or whitespace get equal keys.
+        """
+        stages = tuple((tuple(stage.argv), stage.stdin, stage.stdout, stage.stderr)
+                       for stage in self.stages)
+        sinks = tuple((sink.limit,) if isinstance(sink, HeadSink) else
+                      (tuple(sink.paths), sink.append) for sink in self.sinks)
+        return stages, sinks
+
+    @staticmethod
+    def _apply_redirect(stage: Stage, redirect: str, target: str) -> None:
+        fd = redirect[:len(redirect) - len(redirect.lstrip('0123456789'))]
+        op = redirect[len(fd):]
+
+        if op == '<':
+            if fd not in ('', '0'):
+                raise PipelineError(f"unsupported redirection '{redirect}'")
+            stage.stdin = target
+            return
+
+        if op == '>&':
+            if fd == '2' and target == '1':
+                stage.stderr = STDOUT
+                return
+            raise PipelineError(f"unsupported redirection '{redirect}{target}'")
+
+        destination: Target = DEVNULL if target == '/dev/null' else (target, op.endswith('>>'))
+        if op.startswith('&'):
+            if fd:
+                raise PipelineError(f"unsupported redirection '{redirect}'")
+            stage.stdout = destination
+            stage.stderr = STDOUT
+        elif fd in ('', '1'):
+            stage.stdout = destination
+        elif fd == '2':
+            stage.stderr = destination
+        else:
+            raise PipelineError(f"unsupported redirection '{redirect}'")
+
+    async def spawn(self) -> "PipelineProcess":
+        """Start every stage, connected by OS pipes."""
+        processes: List[asyncio.subprocess.Process] = []
+        parent_fds: List[int] = []
+        out_r = err_r = None
+
+        def target_fd(target: Target) -> Optional[int]:
+            if target is None or isinstance(target, int):
+                return target
+            path, append = target
+            flags = os.O_WRONLY | os.O_CREAT | (os.O_APPEND if append else os.O_TRUNC)
+            fd = os.open(path, flags, 0o644)
+            parent_fds.append(fd)
+            return fd
+
+        try:
+            err_r, err_w = os.pipe()
+            parent_fds.append(err_w)
+            upstream: Optional[int] = None
+
+            for index, stage in enumerate(self.stages):
+                if stage.stdin is not None:
+                    stdin = os.open(stage.stdin, os.O_RDONLY)
+                    parent_fds.append(stdin)
+                else:
+                    stdin = upstream
+
+                if stage.stdout is not None:
+                    stdout = target_fd(stage.stdout)
+                    upstream = DEVNULL
+                else:
+                    read_fd, stdout = os.pipe()
+                    parent_fds.append(stdout)
+                    if index == len(self.stages) - 1:
+                        out_r = read_fd
+                    else:
+                        parent_fds.append(read_fd)
+                        upstream = read_fd
+
+                stderr = target_fd(stage.stderr) if stage.stderr is not None else err_w
+
+                processes.append(await asyncio.create_subprocess_exec(
+                    *stage.argv, stdin=stdin, stdout=stdout, stderr=stderr,
+                ))
+            stdout = await PipelineOutput.open(out_r, self.sinks)
+            out_r = None
+            stderr = await PipelineOutput.open(err_r)
+            err_r = None
+        except BaseException:
+            for process in processes:
+                if process.returncode is None:
+                    process.kill()
+            for fd in (out_r, err_r):
+                if fd is not None:
+                    os.close(fd)
+            raise
+        finally:
+            # Children hold their own copies; EOF depends on closing ours
+            for fd in parent_fds:
+                os.close(fd)
+
+        return PipelineProcess(processes, stdout, stderr)
+
+
+# =============================================================================
+# RUNNING
+# =============================================================================
+
+class PipelineOutput:
+    """
+    Line reader over a pipe read end, applying the built-in sinks.
+    Once a `head` sink is satisfied the pipe is closed, so upstream
+    stages stop on their next write.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, transport, sinks: List = None):
+        self._reader = reader
+        self._transport = transport
+        self._sinks = sinks or []
+        self._files: List[Optional[List[BinaryIO]]] = []
+        self._counts = [0] * len(self._sinks)
+        self._done = False
+        self.truncated = False
+
+        for sink in self._sinks:
+            if isinstance(sink, TeeSink):
+                mode = 'ab' if sink.append else 'wb'
+                self._files.append([open(path, mode) for path in sink.paths])
+            else:
+                self._files.append(None)
+
+    @classmethod
+    async def open(cls, fd: Optional[int], sinks: List = None) -> "PipelineOutput":
+        reader = asyncio.StreamReader()
+        if fd is None:
+            reader.feed_eof()
+            return cls(reader, None, sinks)
+
+        loop = asyncio.get_running_loop()
+        transport, _ = await loop.connect_read_pipe(
+            lambda: asyncio.StreamReaderProtocol(reader), os.fdopen(fd, 'rb', 0)
+        )
+        return cls(reader, transport, sinks)
+
+    async def readline(self) -> bytes:
+        """Read the next line; b'' at end of output."""
+        if self._done or any(isinstance(sink, HeadSink) and sink.limit == 0
+                             for sink in self._sinks):
+            self.close()
+            return b''
+
+        line = await self._reader.readline()
+        if not line:
+            self.close()
+            return b''
+
+        for index, sink in enumerate(self._sinks):
+            if isinstance(sink, TeeSink):
+                for file in self._files[index]:
+                    file.write(line)
+            else:
+                self._counts[index] += 1
+                if self._counts[index] >= sink.limit:
+                    # Later sinks still see this last line
+                    self._done = self.truncated = True
+        if self._done:
+            self._release()
+        return line
+
+    def _release(self) -> None:
+        if self._transport is not None:
+            self._transport.close()
+            self._transport = None
+        for files in self._files:
+            for file in files or ():
+                file.close()
+        self._files = []
+
+    def close(self) -> None:
+        """Stop reading and close the pipe and any tee files."""
+        self._done = True
+        self._release()
+
+
+class PipelineProcess:
+    """
+    Process-like handle for a running pipeline: stdout/stderr readers,
+    wait(), terminate() and returncode, as with asyncio's Process.
+    """
+
+    def __init__(self, processes: List[asyncio.subprocess.Process],
+                 stdout: PipelineOutput, stderr: PipelineOutput):
+        self.processes = processes
+        self.stdout = stdout
+        self.stderr = stderr
+
+    @property
+    def pid(self) -> int:
+        return self.processes[-1].pid
+
+    @property
+    def returncode(self) -> Optional[int]:
+        """Exit status of the last stage, as a shell reports it."""
+        code = self.processes[-1].returncode
+        if code == -signal.SIGPIPE and self.stdout.truncated:
+            # Killed by SIGPIPE after `head` stopped reading
+            return 0
+        return code
+
+    async def wait(self) -> int:
+        for process in self.processes:
+            await process.wait()
+        self.stdout.close()
+        self.stderr.close()
+        return self.returncode
+
+    def _signal(self, method: str) -> None:
+        for process in self.processes:
+            if process.returncode is None:
+                try:
+                    getattr(process, method)()
+                except ProcessLookupError:
+                    pass
+
+    def terminate(self) -> None:
+        self._signal('terminate')
+
+    def kill(self) -> None:
+        self._signal('kill')
+
+
+async def spawn_pipeline(command: str) -> PipelineProcess:
+    """Parse and start a command line."""
+    return await Pipeline.parse(command).spawn()
@@ -7,15 +7,19 @@ Author: Tajaa
 import importlib
 import importlib.util
 import sys
+from collections import OrderedDict
 from abc import ABC, abstractmethod
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Type, Callable
+from typing import Dict, List, Optional, Any, Type, Callable, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
 
-import yaml
 from rich.console import Console
 
+from .catalog import ToolCatalog
+from .parsers import StreamParser, get_stream_parser
+from .template import CommandTemplate
+
 
 class PluginCategory(Enum):
     """Plugin categories."""
@@ -44,6 +48,17 @@ class PluginMetadata:
     platform: str = "all"  # all, linux, windows, macos
 
 
+@dataclass
+class PluginEntry:
+    """Lightweight plugin description for listings and search indexing."""
+    id: str
+    name: str
+    description: str
+    category: PluginCategory
+    tags: List[str]
+    command: str
+
+
 class PluginBase(ABC):
     """
     Base class for all Tajaa plugins.
@@ -56,9 +71,20 @@ class PluginBase(ABC):
     )
 
     def __init__(self, console: Console = None):
-        self.console = console or Console()
+        self._console = console
         self._params: Dict[str, Any] = {}
 
+    @property
+    def console(self) -> Console:
+        """Console for plugin output, created on first use."""
+        if self._console is None:
+            self._console = Console()
+        return self._console
+
+    @console.setter
+    def console(self, console: Console) -> None:
+        self._console = console
+
     @property
     @abstractmethod
     def command_template(self) -> str:
@@ -88,21 +114,20 @@ class PluginBase(ABC):
         """Get a parameter value."""
         return self._params.get(name, default)
 
+    @property
+    def template(self) -> CommandTemplate:
+        """The compiled command template."""
+        return CommandTemplate.compile(self.command_template)
+
     def build_command(self) -> str:
         """Build the final command with all parameters."""
-        cmd = self.command_template
-
-        # Apply required params
+        values = dict(self.optional_params)
         for param in self.required_params:
-            value = self._params.get(param, '')
-            cmd = cmd.replace(f'{{{param}}}', str(value))
-
-        # Apply optional params with defaults
-        for param, default in self.optional_params.items():
-            value = self._params.get(param, default)
-            cmd = cmd.replace(f'{{{param}}}', str(value))
-
-        return cmd
+            values[param] = ''
+        for param, value in self._params.items():
+            if param in values:
+                values[param] = value
+        return self.template.render(values)
 
     def validate_params(self) -> tuple[bool, str]:
         """Validate all required parameters are set."""
@@ -130,6 +155,13 @@ class PluginBase(ABC):
         """
         return {'raw_output': output}
 
+    def stream_parser(self) -> Optional[StreamParser]:
+        """
+        Return a streaming parser fed with output while the tool runs.
+        Defaults to the built-in parser for the command's executable.
+        """
+        return get_stream_parser(self.command_template)
+
     def get_suggestions(self, findings: Dict[str, Any]) -> List[str]:
         """
         Return suggested next tools based on findings.
@@ -176,29 +208,49 @@ class YAMLPlugin(PluginBase):
         return self._param_descriptions
 
 
+_CATEGORIES: Dict[str, PluginCategory] = {cat.value: cat for cat in PluginCategory}
+
+
 class PluginRegistry:
     """
     Central registry for all plugins.
     Handles plugin registration, lookup, and categorization.
+
+    YAML tools are registered lazily as references into the catalog;
+    their plugin objects are built on first get() and kept in a small
+    LRU cache.
     """
 
-    def __init__(self):
+    def __init__(self, cache_size: int = 64):
         self._plugins: Dict[str, PluginBase] = {}
+        self._lazy: Dict[str, Tuple[Dict[str, Any], str]] = {}
+        self._built: "OrderedDict[str, PluginBase]" = OrderedDict()
+        self._cache_size = cache_size
         self._by_category: Dict[PluginCategory, List[str]] = {cat: [] for cat in PluginCategory}
         self._by_tag: Dict[str, List[str]] = {}
-        self._console = Console()
 
     def register(self, plugin_id: str, plugin: PluginBase) -> None:
         """Register a plugin."""
         self._plugins[plugin_id] = plugin
+        self._lazy.pop(plugin_id, None)
+        self._index(plugin_id, plugin.metadata.category, plugin.metadata.tags)
+
+    def register_lazy(self, plugin_id: str, config: Dict[str, Any], category: str) -> None:
+        """Register a YAML tool without building its plugin object."""
+        if plugin_id in self._plugins:
+            return
+        self._lazy[plugin_id] = (config, category)
+        self._built.pop(plugin_id, None)
+        self._index(plugin_id, _CATEGORIES.get(category, PluginCategory.MISC),
+                    config.get('tags', []))
 
+    def _index(self, plugin_id: str, category: PluginCategory, tags: List[str]) -> None:
         # Index by category
-        category = plugin.metadata.category
         if plugin_id not in self._by_category[category]:
             self._by_category[category].append(plugin_id)
 
         # Index by tags
-        for tag in plugin.metadata.tags:
+        for tag in tags:
             if tag not in self._by_tag:
                 self._by_tag[tag] = []
             if plugin_id not in self._by_tag[tag]:
@@ -206,19 +258,63 @@ class PluginRegistry:
 
     def get(self, plugin_id: str) -> Optional[PluginBase]:
         """Get plugin by ID."""
-        return self._plugins.get(plugin_id)
+        plugin = self._plugins.get(plugin_id)
+        if plugin is not None:
+            return plugin
+
+        plugin = self._built.get(plugin_id)
+        if plugin is not None:
+            self._built.move_to_end(plugin_id)
+            return plugin
+
+        if plugin_id not in self._lazy:
+            return None
+
+        config, category = self._lazy[plugin_id]
+        plugin = YAMLPlugin({**config, 'category': category})
+        self._built[plugin_id] = plugin
+        if len(self._built) > self._cache_size:
+            self._built.popitem(last=False)
+        return plugin
+
+    def ids(self) -> List[str]:
+        """All registered plugin IDs."""
+        return list(self._plugins) + [pid for pid in self._lazy if pid not in self._plugins]
+
+    def entries(self) -> List[PluginEntry]:
+        """Describe every plugin without building lazy ones."""
+        entries = []
+        for plugin_id, plugin in self._plugins.items():
+            entries.append(PluginEntry(
+                id=plugin_id,
+                name=plugin.metadata.name,
+                description=plugin.metadata.description,
+                category=plugin.metadata.category,
+                tags=plugin.metadata.tags,
+                command=plugin.command_template,
+            ))
+        for plugin_id, (config, category) in self._lazy.items():
+            entries.append(PluginEntry(
+                id=plugin_id,
+                name=config.get('name', 'Unknown'),
+                description=config.get('description', ''),
+                category=_CATEGORIES.get(category, PluginCategory.MISC),
+                tags=config.get('tags', []),
+                command=config.get('command', ''),
+            ))
+        return entries
 
     def get_by_category(self, category: PluginCategory) -> List[PluginBase]:
         """Get all plugins in a category."""
-        return [self._plugins[pid] for pid in self._by_category.get(category, [])]
+        return [self.get(pid) for pid in self._by_category.get(category, [])]
 
     def get_by_tag(self, tag: str) -> List[PluginBase]:
         """Get all plugins with a tag."""
-        return [self._plugins[pid] for pid in self._by_tag.get(tag, [])]
+        return [self.get(pid) for pid in self._by_tag.get(tag, [])]
 
     def list_all(self) -> List[PluginBase]:
-        """List all registered plugins."""
-        return list(self._plugins.values())
+        """List all registered plugins, building any lazy ones."""
+        return [self.get(pid) for pid in self.ids()]
 
     def list_categories(self) -> Dict[str, int]:
         """List categories with plugin counts."""
@@ -228,17 +324,17 @@ class PluginRegistry:
         """Simple search by name or description."""
         query = query.lower()
         results = []
-        for plugin in self._plugins.values():
-            if (query in plugin.metadata.name.lower() or
-                query in plugin.metadata.description.lower() or
-                any(query in tag.lower() for tag in plugin.metadata.tags)):
-                results.append(plugin)
+        for entry in self.entries():
+            if (query in entry.name.lower() or
+                query in entry.description.lower() or
+                any(query in tag.lower() for tag in entry.tags)):
+                results.append(self.get(entry.id))
         return results
 
     @property
     def count(self) -> int:
         """Total number of registered plugins."""
-        return len(self._plugins)
+        return len(self._plugins) + len(self._lazy)
 
 
 class PluginLoader:
@@ -248,9 +344,11 @@ class PluginLoader:
     - YAML configuration files in /configs directory
     """
 
-    def __init__(self, modules_path: Path = None, configs_path: Path = None):
+    def __init__(self, modules_path: Path = None, configs_path: Path = None,
+                 catalog: ToolCatalog = None):
         self.modules_path = modules_path or Path("modules")
         self.configs_path = configs_path or Path("configs")
+        self.catalog = catalog or ToolCatalog(self.configs_path)
         self.registry = PluginRegistry()
         self._console = Console()
         self._loaded = False
@@ -279,19 +377,16 @@ class PluginLoader:
         return self.registry
 
     def _load_yaml_plugins(self) -> None:
-        """Load plugins from YAML config files."""
-        if not self.configs_path.exists():
-            return
+        """Load plugins from the compiled YAML catalog."""
+        catalog = self.catalog.load()
 
-        for yaml_file in sorted(self.configs_path.glob("*.yaml")):
-            try:
-                with open(yaml_file, 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f)
+        for file_name, error in catalog.errors:
+            self._console.print(f"[yellow]Warning:[/yellow] Failed to load {file_name}: {error}")
+        for file_name, warning in catalog.warnings:
+            self._console.print(f"[yellow]Warning:[/yellow] {file_name}: {warning}")
 
-                if not data:
-                    continue
-
-                categories = data.get('categories', {})
+        for file_name, categories in catalog.files:
+            try:
                 for cat_id, cat_data in categories.items():
                     tools = cat_data.get('tools', {})
                     if not tools:
@@ -302,14 +397,13 @@ class PluginLoader:
                             continue
 
                         # Determine category from parent or default
-                        tool_data['category'] = self._map_category(cat_id)
-
-                        plugin = YAMLPlugin(tool_data)
                         plugin_id = f"{cat_id}.{tool_id}"
-                        self.registry.register(plugin_id, plugin)
+                        self.registry.register_lazy(
+                            plugin_id, tool_data, self._map_category(cat_id)
+                        )
 
             except Exception as e:
-                self._console.print(f"[yellow]Warning:[/yellow] Failed to load {yaml_file}: {e}")
+                self._console.print(f"[yellow]Warning:[/yellow] Failed to load {file_name}: {e}")
 
     def _load_module_plugins(self) -> None:
         """Load plugins from Python modules."""
@@ -373,6 +467,7 @@ class PluginLoader:
         """Force reload all plugins."""
         self._loaded = False
         self.registry = PluginRegistry()
+        self.catalog.load(force=True)
         return self.load_all(lazy=False)
 
 
@@ -0,0 +1,193 @@
+"""
+Tajaa Port Sets
+Compact set of TCP/UDP port numbers backed by a 65536-bit bitmap.
+Author: Tajaa
+"""
+
+from typing import Any, Iterable, Iterator, List, Tuple, Union
+
+
+MIN_PORT = 1
+MAX_PORT = 65535
+
+_BITMAP_BYTES = (MAX_PORT + 8) // 8
+
+
+class PortSet:
+    """
+    A set of ports stored as the bits of one integer.
+
+    Union, intersection and difference are single integer operations
+    regardless of how many ports are involved, so "1-65535" costs the
+    same as "80". Iteration is in ascending order, and str() gives the
+    compact range form ("22,80,8000-8100") that parse() reads back.
+    """
+
+    __slots__ = ('_bits',)
+
+    def __init__(self, ports: Iterable[int] = ()):
+        bitmap = bytearray(_BITMAP_BYTES)
+        for port in ports:
+            port = self._check(port)
+            bitmap[port >> 3] |= 1 << (port & 7)
+        self._bits = int.from_bytes(bitmap, 'little')
+
+    @staticmethod
+    def _check(port: Any) -> int:
+        port = int(port)
+        if not MIN_PORT <= port <= MAX_PORT:
+            raise ValueError(f"port out of range: {port}")
+        return port
+
+    @classmethod
+    def _from_bits(cls, bits: int) -> "PortSet":
+        portset = cls.__new__(cls)
+        portset._bits = bits
+        return portset
+
+    @classmethod
+    def range(cls, start: int, end: int) -> "PortSet":
+        """All ports from start to end inclusive."""
+        start, end = cls._check(start), cls._check(end)
+        if start > end:
+            raise ValueError(f"empty port range: {start}-{end}")
+        return cls._from_bits(((1 << (end - start + 1)) - 1) << start)
+
+    @classmethod
+    def parse(cls, text: str, strict: bool = True) -> "PortSet":
+        """
+        Parse a port specification such as "22,80,8000-8100".
+
+        Args:
+            text: Comma-separated ports and inclusive ranges
+            strict: Raise ValueError on bad parts instead of skipping
+                them; when False, ranges are also clipped to valid ports
+        """
+        bits = 0
+        for part in text.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                if '-' in part:
+                    start, end = part.split('-')
+                    start, end = int(start), int(end)
+                    if not strict:
+                        start, end = max(start, MIN_PORT), min(end, MAX_PORT)
+                    bits |= cls.range(start, end)._bits
+                else:
+                    bits |= 1 << cls._check(part)
+            except ValueError:
+                if strict:
+                    raise ValueError(f"invalid port specification: {part!r}")
+        return cls._from_bits(bits)
+
+    @classmethod
+    def coerce(cls, value: Union["PortSet", str, Iterable[int], None]) -> "PortSet":
+        """Accept a PortSet, a range string or an iterable of ports."""
+        if isinstance(value, PortSet):
+            return value
+        if value is None:
+            return cls()
+        if isinstance(value, str):
+            return cls.parse(value)
+        return cls(value)
+
+    # =========================================================================
+    # SET OPERATIONS
+    # =========================================================================
+
+    def __or__(self, other: "PortSet") -> "PortSet":
+        return self._from_bits(self._bits | other._bits)
+
+    def __and__(self, other: "PortSet") -> "PortSet":
+        return self._from_bits(self._bits & other._bits)
+
+    def __sub__(self, other: "PortSet") -> "PortSet":
+        return self._from_bits(self._bits & ~other._bits)
+
+    def __xor__(self, other: "PortSet") -> "PortSet":
+        return self._from_bits(self._bits ^ other._bits)
+
+    union = __or__
+    intersection = __and__
+    difference = __sub__
+
+    def copy(self) -> "PortSet":
+        return self._from_bits(self._bits)
+
+    def add(self, port: int) -> None:
+        self._bits |= 1 << self._check(port)
+
+    def update(self, ports: Union["PortSet", str, Iterable[int]]) -> None:
+        self._bits |= self.coerce(ports)._bits
+
+    def discard(self, port: int) -> None:
+        self._bits &= ~(1 << self._check(port))
+
+    def issubset(self, other: "PortSet") -> bool:
+        return self._bits & ~other._bits == 0
+
+    # =========================================================================
+    # ACCESS
+    # =========================================================================
+
+    def __contains__(self, port: Any) -> bool:
+        try:
+            port = int(port)
+        except (ValueError, TypeError):
+            return False
+        return port >= 0 and bool(self._bits >> port & 1)
+
+    def __len__(self) -> int:
+        return self._bits.bit_count()
+
+    def __bool__(self) -> bool:
+        return self._bits != 0
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in self.ranges():
+            yield from range(start, end + 1)
+
+    def ranges(self) -> Iterator[Tuple[int, int]]:
+        """Inclusive (start, end) runs of consecutive ports, ascending."""
+        # Jump from run to run with integer bit tricks, so the cost
+        # follows the number of runs rather than the bitmap size
+        bits = self._bits
+        offset = 0
+        while bits:
+            start = (bits & -bits).bit_length() - 1
+            bits >>= start
+            # bits + 1 carries through the run of ones; ~bits keeps the carry
+            length = (~bits & (bits + 1)).bit_length() - 1
+            yield offset + start, offset + start + length - 1
+            bits >>= length
+            offset += start + length
+
+    def format(self, limit: int = 0) -> str:
+        """
+        Range form, optionally cut after `limit` ranges.
+
+        Returns:
+            e.g. "22,80,8000-8100"
+        """
+        parts: List[str] = []
+        for start, end in self.ranges():
+            if limit and len(parts) == limit:
+                break
+            parts.append(str(start) if start == end else f"{start}-{end}")
+        return ','.join(parts)
+
+    def __str__(self) -> str:
+        return self.format()
+
+    def __repr__(self) -> str:
+        return f"PortSet({self.format()!r})"
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, PortSet):
+            return self._bits == other._bits
+        return NotImplemented
+
+    def __reduce__(self):
+        return (PortSet.parse, (self.format(),))
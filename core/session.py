@@ -6,17 +6,21 @@ Author: Tajaa
 
 import os
 import json
+import time
 import pickle
 import atexit
 import signal
+import asyncio
 import hashlib
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Optional, Any
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, replace
 
 from rich.console import Console
 
+from .portset import PortSet
+
 
 @dataclass
 class SessionState:
@@ -38,7 +42,8 @@ class SessionState:
     target_history: List[str] = field(default_factory=list)
 
     # Findings cache
-    discovered_ports: Dict[str, List[int]] = field(default_factory=dict)
+    # Ports per target; saved as range strings ("22,80,8000-8100")
+    discovered_ports: Dict[str, PortSet] = field(default_factory=dict)
     discovered_services: Dict[str, List[Dict]] = field(default_factory=dict)
 
     # UI state
@@ -52,14 +57,118 @@ class SessionState:
     # User preferences
     preferences: Dict[str, Any] = field(default_factory=dict)
 
+    def __post_init__(self):
+        # Snapshots hold range strings, older ones plain lists
+        self.discovered_ports = {
+            target: PortSet.coerce(ports) for target, ports in self.discovered_ports.items()
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready copy of the state, with ports as range strings."""
+        data = asdict(replace(self, discovered_ports={}))
+        data['discovered_ports'] = {
+            target: str(ports) for target, ports in self.discovered_ports.items()
+        }
+        return data
+
+
+# =============================================================================
+# STATE DELTAS
+# =============================================================================
+# Every mutation is one of these operations. SessionManager applies them to
+# the live state and appends them to the session journal; load_session
+# replays the journal over the last snapshot with the same functions.
+
+def _op_target(state: SessionState, target: str, target_id: int) -> None:
+    state.active_target = target
+    state.active_target_id = target_id
+    if target not in state.target_history:
+        state.target_history.append(target)
+
+
+def _op_command(state: SessionState, command: str) -> None:
+    state.command_history.append(command)
+    # Keep only last 500 commands
+    del state.command_history[:-500]
+
+
+def _op_tool(state: SessionState, tool_name: str) -> None:
+    state.tool_history.append(tool_name)
+    del state.tool_history[:-100]
+
+
+def _op_ports(state: SessionState, target: str, ports: Any) -> None:
+    # Journals hold range strings, older ones plain lists
+    ports = PortSet.coerce(ports)
+    existing = state.discovered_ports.get(target)
+    state.discovered_ports[target] = ports.copy() if existing is None else existing | ports
+
+
+def _op_services(state: SessionState, target: str, services: List[Dict]) -> None:
+    existing = state.discovered_services.get(target, [])
+    # Deduplicate by port
+    existing_ports = {s.get('port') for s in existing}
+    for svc in services:
+        if svc.get('port') not in existing_ports:
+            existing.append(svc)
+    state.discovered_services[target] = existing
+
+
+def _op_preference(state: SessionState, key: str, value: Any) -> None:
+    state.preferences[key] = value
+
+
+def _op_ui(state: SessionState, view: Optional[str], scroll: Optional[int]) -> None:
+    if view:
+        state.last_view = view
+    if scroll is not None:
+        state.scroll_position = scroll
+
+
+def _op_task_add(state: SessionState, task_id: str) -> None:
+    if task_id not in state.running_tasks:
+        state.running_tasks.append(task_id)
+
+
+def _op_task_remove(state: SessionState, task_id: str) -> None:
+    if task_id in state.running_tasks:
+        state.running_tasks.remove(task_id)
+
+
+SESSION_OPS = {
+    'target': _op_target,
+    'command': _op_command,
+    'tool': _op_tool,
+    'ports': _op_ports,
+    'services': _op_services,
+    'preference': _op_preference,
+    'ui': _op_ui,
+    'task_add': _op_task_add,
+    'task_remove': _op_task_remove,
+}
+
 
 class SessionManager:
     """
     Manages user sessions with automatic state persistence.
     Handles graceful shutdown and crash recovery.
+
+    Each session is a JSON snapshot (<name>.json) plus an append-only
+    journal of state deltas (<name>.journal). Mutations are buffered and
+    appended on a short timer; the journal is folded into a new snapshot
+    every `compact_every` records and on close.
+
+    A small index file (_index.json) holds one summary per session and is
+    rewritten atomically whenever a snapshot is saved, so listing and
+    resuming sessions read one file. Journal flushes refresh the current
+    session's entry at most every `index_interval` seconds.
     """
 
-    def __init__(self, session_dir: Path = None, db_manager=None):
+    INDEX_NAME = "_index.json"
+
+    def __init__(self, session_dir: Path = None, db_manager=None,
+                 flush_delay: float = 0.5, compact_every: int = 200,
+                 index_interval: float = 30.0):
         self.session_dir = session_dir or Path("data/sessions")
         self.session_dir.mkdir(parents=True, exist_ok=True)
 
@@ -70,6 +179,21 @@ class SessionManager:
         self._session_file: Optional[Path] = None
         self._autosave_enabled = True
 
+        # Journal
+        self.flush_delay = flush_delay
+        self.compact_every = compact_every
+        self._journal_file: Optional[Path] = None
+        self._journal_buffer: List[str] = []
+        self._journal_seq = 0           # Sequence number of the last delta
+        self._journal_records = 0       # Deltas written since the snapshot
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+
+        # Session index, loaded on first use
+        self._index_file = self.session_dir / self.INDEX_NAME
+        self._index: Optional[Dict[str, Dict]] = None
+        self.index_interval = index_interval
+        self._index_written = 0.0       # Monotonic time of the last write
+
         # Register cleanup handlers
         atexit.register(self._cleanup)
         signal.signal(signal.SIGTERM, self._signal_handler)
@@ -92,6 +216,9 @@ class SessionManager:
         session_name = name or self._generate_session_name()
         now = datetime.now().isoformat()
 
+        # Persist the outgoing session's pending deltas
+        self._flush_journal()
+
         self._current_session = SessionState(
             name=session_name,
             created_at=now,
@@ -99,14 +226,15 @@ class SessionManager:
         )
 
         # Create session file
-        self._session_file = self.session_dir / f"{session_name}.json"
+        self._open_files(session_name)
+        self._journal_seq = 0
 
         # Save to database if available
         if self.db:
             try:
                 session_id = await self.db.create_session(
                     session_name,
-                    asdict(self._current_session)
+                    self._current_session.to_dict()
                 )
                 self._current_session.id = session_id
             except Exception:
@@ -116,7 +244,7 @@ class SessionManager:
         return self._current_session
 
     async def load_session(self, name: str) -> Optional[SessionState]:
-        """Load an existing session."""
+        """Load an existing session, replaying its journal over the snapshot."""
         session_file = self.session_dir / f"{name}.json"
 
         if not session_file.exists():
@@ -126,15 +254,25 @@ class SessionManager:
             with open(session_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
 
-            self._current_session = SessionState(**data)
-            self._session_file = session_file
+            seq = data.pop('journal_seq', 0)
+            state = SessionState(**data)
+            seq, replayed = self._replay_journal(state, self.session_dir / f"{name}.journal", seq)
+
+            self._flush_journal()
+            self._current_session = state
+            self._open_files(name)
+            self._journal_seq = seq
             self._current_session.last_active = datetime.now().isoformat()
 
+            if replayed:
+                # Fold recovered deltas into a fresh snapshot
+                self._save_session()
+
             # Update database
             if self.db and self._current_session.id:
                 await self.db.update_session(
                     self._current_session.id,
-                    state=asdict(self._current_session)
+                    state=self._current_session.to_dict()
                 )
 
             return self._current_session
@@ -143,53 +281,234 @@ class SessionManager:
             self.console.print(f"[yellow]Warning:[/yellow] Failed to load session: {e}")
             return None
 
+    def _replay_journal(self, state: SessionState, journal_file: Path,
+                        seq: int) -> tuple:
+        """
+        Apply journal deltas newer than the snapshot's sequence number.
+
+        Returns:
+            (last sequence number, number of deltas applied)
+        """
+        if not journal_file.exists():
+            return seq, 0
+
+        applied = 0
+        with open(journal_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Torn write from a crash: nothing after it is valid
+                    break
+                if record['seq'] <= seq:
+                    continue
+                SESSION_OPS[record['op']](state, *record['args'])
+                state.last_active = record['t']
+                seq = record['seq']
+                applied += 1
+        return seq, applied
+
     async def resume_latest(self) -> Optional[SessionState]:
         """Resume the most recent session."""
-        sessions = self.list_sessions()
-        if not sessions:
+        index = self._load_index()
+        if not index:
             return await self.create_session()
 
         # Find most recent
-        latest = max(sessions, key=lambda s: s.get('last_active', ''))
+        latest = max(index.values(), key=lambda s: s.get('last_active', ''))
         return await self.load_session(latest['name'])
 
     def list_sessions(self) -> List[Dict]:
         """List all available sessions."""
-        sessions = []
+        sessions = list(self._load_index().values())
+        return sorted(sessions, key=lambda s: s.get('last_active', ''), reverse=True)
 
+    # =========================================================================
+    # SESSION INDEX
+    # =========================================================================
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """Get the session index, rebuilding it if missing or unreadable."""
+        if self._index is None:
+            try:
+                with open(self._index_file, 'r', encoding='utf-8') as f:
+                    self._index = json.load(f)['sessions']
+            except Exception:
+                self.rebuild_index()
+        return self._index
+
+    def _write_index(self) -> None:
+        temp_file = self._index_file.with_suffix('.json.tmp')
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({'sessions': self._index}, f, separators=(',', ':'))
+            os.replace(temp_file, self._index_file)
+        except Exception as e:
+            self.console.print(f"[yellow]Warning:[/yellow] Failed to save session index: {e}")
+
+    @staticmethod
+    def _index_entry(data: Dict, name: str, size: int) -> Dict:
+        return {
+            'name': data.get('name', name),
+            'created_at': data.get('created_at', ''),
+            'last_active': data.get('last_active', ''),
+            'target': data.get('active_target', ''),
+            'size': size,
+        }
+
+    def _update_index(self, data: Dict, size: int) -> None:
+        """Record a saved snapshot in the index."""
+        index = self._load_index()
+        index[data['name']] = self._index_entry(data, data['name'], size)
+        self._write_index()
+        self._index_written = time.monotonic()
+
+    def _touch_index(self) -> None:
+        """Record the current session's journaled activity in the index."""
+        self._index_written = time.monotonic()
+        state = self._current_session
+        entry = self._load_index().get(state.name)
+        if entry is None:
+            return
+        if (entry.get('last_active'), entry.get('target')) == (state.last_active, state.active_target):
+            return
+        entry['last_active'] = state.last_active
+        entry['target'] = state.active_target
+        self._write_index()
+
+    @staticmethod
+    def _journal_last_active(journal_file: Path) -> Optional[str]:
+        """Timestamp of the last complete journal record, if any."""
+        try:
+            with open(journal_file, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 4096))
+                tail = f.read().decode('utf-8', errors='replace')
+        except OSError:
+            return None
+        for line in reversed(tail.splitlines()):
+            try:
+                return json.loads(line)['t']
+            except (ValueError, KeyError, TypeError):
+                continue
+        return None
+
+    def rebuild_index(self) -> int:
+        """
+        Rebuild the index by reading every session file.
+
+        Returns:
+            Number of sessions indexed
+        """
+        index = {}
         for session_file in self.session_dir.glob("*.json"):
+            if session_file.name == self.INDEX_NAME:
+                continue
             try:
                 with open(session_file, 'r', encoding='utf-8') as f:
                     data = json.load(f)
-                    sessions.append({
-                        'name': data.get('name', session_file.stem),
-                        'created_at': data.get('created_at', ''),
-                        'last_active': data.get('last_active', ''),
-                        'target': data.get('active_target', ''),
-                    })
+                entry = self._index_entry(data, session_file.stem, session_file.stat().st_size)
+                # Deltas since the snapshot may be newer
+                journaled = self._journal_last_active(session_file.with_suffix('.journal'))
+                if journaled and journaled > entry['last_active']:
+                    entry['last_active'] = journaled
+                index[entry['name']] = entry
             except Exception:
                 continue
 
-        return sorted(sessions, key=lambda s: s.get('last_active', ''), reverse=True)
+        self._index = index
+        self._write_index()
+        return len(index)
+
+    def _open_files(self, name: str) -> None:
+        self._session_file = self.session_dir / f"{name}.json"
+        self._journal_file = self.session_dir / f"{name}.journal"
+        self._journal_buffer = []
+        self._journal_records = 0
 
     def _save_session(self) -> None:
-        """Save current session to disk."""
+        """Write a full snapshot of the current session and reset the journal."""
         if not self._current_session or not self._session_file:
             return
 
         try:
+            # Pending deltas are already in the in-memory state
+            self._journal_buffer = []
+            if self._flush_handle:
+                self._flush_handle.cancel()
+                self._flush_handle = None
             self._current_session.last_active = datetime.now().isoformat()
 
-            with open(self._session_file, 'w', encoding='utf-8') as f:
-                json.dump(asdict(self._current_session), f, indent=2, default=str)
+            data = self._current_session.to_dict()
+            data['journal_seq'] = self._journal_seq
+            temp_file = self._session_file.with_suffix('.json.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, default=str)
+            os.replace(temp_file, self._session_file)
+            self._update_index(data, self._session_file.stat().st_size)
+
+            # The snapshot records journal_seq, so a crash before this
+            # truncation just replays nothing on load
+            with open(self._journal_file, 'w', encoding='utf-8'):
+                pass
+            self._journal_records = 0
 
         except Exception as e:
             self.console.print(f"[yellow]Warning:[/yellow] Failed to save session: {e}")
 
-    def autosave(self) -> None:
-        """Trigger autosave if enabled."""
-        if self._autosave_enabled:
+    def _mutate(self, op: str, *args) -> None:
+        """Apply a delta to the current session and journal it."""
+        if not self._current_session:
+            return
+
+        SESSION_OPS[op](self._current_session, *args)
+        now = datetime.now().isoformat()
+        self._current_session.last_active = now
+
+        self._journal_seq += 1
+        self._journal_buffer.append(json.dumps(
+            {'seq': self._journal_seq, 'op': op, 'args': args, 't': now},
+            default=str,
+        ))
+        self.autosave()
+
+    def _flush_journal(self) -> None:
+        """Append buffered deltas to the journal."""
+        if self._flush_handle:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        if not self._journal_buffer or not self._journal_file:
+            return
+
+        lines, self._journal_buffer = self._journal_buffer, []
+        try:
+            with open(self._journal_file, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+            self._journal_records += len(lines)
+        except Exception as e:
+            self.console.print(f"[yellow]Warning:[/yellow] Failed to save session: {e}")
+            return
+
+        if self._journal_records >= self.compact_every:
             self._save_session()
+        elif self._current_session and time.monotonic() - self._index_written >= self.index_interval:
+            self._touch_index()
+
+    def autosave(self) -> None:
+        """Schedule a journal flush if enabled (immediate without an event loop)."""
+        if not self._autosave_enabled or self._flush_handle:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._flush_journal()
+            return
+        self._flush_handle = loop.call_later(self.flush_delay, self._flush_journal)
+
+    def flush(self) -> None:
+        """Write pending deltas to the journal now."""
+        self._flush_journal()
 
     # =========================================================================
     # STATE MANAGEMENT
@@ -197,54 +516,35 @@ class SessionManager:
 
     def set_active_target(self, target: str, target_id: int = 0) -> None:
         """Set the active target."""
-        if self._current_session:
-            self._current_session.active_target = target
-            self._current_session.active_target_id = target_id
-            if target not in self._current_session.target_history:
-                self._current_session.target_history.append(target)
-            self.autosave()
+        self._mutate('target', target, target_id)
 
     def add_command(self, command: str) -> None:
         """Add command to history."""
-        if self._current_session:
-            self._current_session.command_history.append(command)
-            # Keep only last 500 commands
-            self._current_session.command_history = self._current_session.command_history[-500:]
-            self.autosave()
+        self._mutate('command', command)
 
     def add_tool_usage(self, tool_name: str) -> None:
         """Track tool usage."""
-        if self._current_session:
-            self._current_session.tool_history.append(tool_name)
-            self._current_session.tool_history = self._current_session.tool_history[-100:]
-            self.autosave()
+        self._mutate('tool', tool_name)
 
-    def cache_ports(self, target: str, ports: List[int]) -> None:
-        """Cache discovered ports for a target."""
-        if self._current_session:
-            existing = self._current_session.discovered_ports.get(target, [])
-            combined = list(set(existing + ports))
-            self._current_session.discovered_ports[target] = sorted(combined)
-            self.autosave()
+    def cache_ports(self, target: str, ports: Any) -> None:
+        """Cache discovered ports (PortSet, range string or list) for a target."""
+        self._mutate('ports', target, PortSet.coerce(ports))
 
     def cache_services(self, target: str, services: List[Dict]) -> None:
         """Cache discovered services for a target."""
-        if self._current_session:
-            existing = self._current_session.discovered_services.get(target, [])
-            # Deduplicate by port
-            existing_ports = {s.get('port') for s in existing}
-            for svc in services:
-                if svc.get('port') not in existing_ports:
-                    existing.append(svc)
-            self._current_session.discovered_services[target] = existing
-            self.autosave()
+        self._mutate('services', target, list(services))
 
     def get_cached_ports(self, target: str = None) -> List[int]:
         """Get cached ports for target or current target."""
+        return list(self.get_cached_portset(target))
+
+    def get_cached_portset(self, target: str = None) -> PortSet:
+        """Get cached ports for target or current target as a PortSet."""
         if not self._current_session:
-            return []
+            return PortSet()
         target = target or self._current_session.active_target
-        return self._current_session.discovered_ports.get(target, [])
+        ports = self._current_session.discovered_ports.get(target)
+        return ports.copy() if ports is not None else PortSet()
 
     def get_cached_services(self, target: str = None) -> List[Dict]:
         """Get cached services for target or current target."""
@@ -255,9 +555,7 @@ class SessionManager:
 
     def set_preference(self, key: str, value: Any) -> None:
         """Set a user preference."""
-        if self._current_session:
-            self._current_session.preferences[key] = value
-            self.autosave()
+        self._mutate('preference', key, value)
 
     def get_preference(self, key: str, default: Any = None) -> Any:
         """Get a user preference."""
@@ -267,26 +565,15 @@ class SessionManager:
 
     def set_ui_state(self, view: str = None, scroll: int = None) -> None:
         """Update UI state."""
-        if self._current_session:
-            if view:
-                self._current_session.last_view = view
-            if scroll is not None:
-                self._current_session.scroll_position = scroll
-            self.autosave()
+        self._mutate('ui', view, scroll)
 
     def add_running_task(self, task_id: str) -> None:
         """Track a running background task."""
-        if self._current_session:
-            if task_id not in self._current_session.running_tasks:
-                self._current_session.running_tasks.append(task_id)
-            self.autosave()
+        self._mutate('task_add', task_id)
 
     def remove_running_task(self, task_id: str) -> None:
         """Remove a completed background task."""
-        if self._current_session:
-            if task_id in self._current_session.running_tasks:
-                self._current_session.running_tasks.remove(task_id)
-            self.autosave()
+        self._mutate('task_remove', task_id)
 
     # =========================================================================
     # SESSION LIFECYCLE
@@ -302,17 +589,22 @@ class SessionManager:
                 try:
                     await self.db.update_session(
                         self._current_session.id,
-                        state=asdict(self._current_session)
+                        state=self._current_session.to_dict()
                     )
                 except Exception:
                     pass
 
             self._current_session = None
             self._session_file = None
+            self._journal_file = None
 
     def delete_session(self, name: str) -> bool:
         """Delete a session."""
         session_file = self.session_dir / f"{name}.json"
+        (self.session_dir / f"{name}.journal").unlink(missing_ok=True)
+        index = self._load_index()
+        if index.pop(name, None) is not None:
+            self._write_index()
         if session_file.exists():
             session_file.unlink()
             return True
@@ -325,7 +617,7 @@ class SessionManager:
 
         try:
             with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(asdict(self._current_session), f, indent=2, default=str)
+                json.dump(self._current_session.to_dict(), f, indent=2, default=str)
             return True
         except Exception:
             return False
@@ -340,8 +632,11 @@ class SessionManager:
             data['name'] = self._generate_session_name()
             data['last_active'] = datetime.now().isoformat()
 
+            data.pop('journal_seq', None)
+            self._flush_journal()
             self._current_session = SessionState(**data)
-            self._session_file = self.session_dir / f"{self._current_session.name}.json"
+            self._open_files(self._current_session.name)
+            self._journal_seq = 0
             self._save_session()
 
             return self._current_session
@@ -0,0 +1,155 @@
+"""
+Tajaa Command Templates
+Command templates compiled once into literal segments and quoted placeholders.
+Author: Tajaa
+"""
+
+import re
+import shlex
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+# Placeholders whose value is a list of arguments and must not be quoted
+RAW_PARAMS = frozenset({'options', 'flags', 'args', 'extra_args'})
+
+# {name} placeholders; {{ and }} are literal braces
+TOKEN_PATTERN = re.compile(r'\{\{|\}\}|\{(\w+)\}')
+
+# Characters with a meaning inside double quotes
+UNSAFE_DOUBLE = re.compile(r'[\\"$`!]')
+
+
+# =============================================================================
+# QUOTING RULES
+# =============================================================================
+
+def quote_word(value: str) -> str:
+    """Unquoted context: the value becomes exactly one shell word."""
+    return shlex.quote(value) if value else ''
+
+
+def quote_raw(value: str) -> str:
+    """Unquoted context for option strings: inserted as-is."""
+    return value
+
+
+def quote_single(value: str) -> str:
+    """Inside '...': close, emit an escaped quote, reopen."""
+    return value.replace("'", "'\\''")
+
+
+def quote_double(value: str) -> str:
+    """Inside "...": close, emit the value single-quoted, reopen."""
+    if not UNSAFE_DOUBLE.search(value):
+        return value
+    return '"' + shlex.quote(value) + '"'
+
+
+class CommandTemplate:
+    """
+    A command template parsed into literal segments and placeholders.
+
+    Each placeholder carries the quoting rule for the shell context it
+    appears in, so rendering is a single join with no re-parsing.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+        self._literals: List[str] = []
+        self._fields: List[Tuple[str, Callable[[str], str]]] = []
+        self._compile()
+
+    @classmethod
+    @lru_cache(maxsize=None)
+    def compile(cls, template: str) -> "CommandTemplate":
+        """Get the compiled form of a template, parsing it only once."""
+        return cls(template)
+
+    def _compile(self) -> None:
+        literal: List[str] = []
+        state = ''          # '', "'" or '"'
+        escaped = False
+        pos = 0
+
+        def scan(text: str) -> None:
+            nonlocal state, escaped
+            for char in text:
+                if escaped:
+                    escaped = False
+                elif state == "'":
+                    if char == "'":
+                        state = ''
+                elif char == '\\':
+                    escaped = True
+                elif state == '"':
+                    if char == '"':
+                        state = ''
+                elif char in '\'"':
+                    state = char
+
+        for match in TOKEN_PATTERN.finditer(self.template):
+            text = self.template[pos:match.start()]
+            literal.append(text)
+            scan(text)
+            pos = match.end()
+
+            name = match.group(1)
+            if name is None:
+                # Escaped brace
+                literal.append(match.group(0)[0])
+                scan(match.group(0)[0])
+                continue
+
+            self._literals.append(''.join(literal))
+            literal = []
+            self._fields.append((name, self._quoter(name, state)))
+
+        text = self.template[pos:]
+        literal.append(text)
+        self._literals.append(''.join(literal))
+
+    @staticmethod
+    def _quoter(name: str, state: str) -> Callable[[str], str]:
+        if state == "'":
+            return quote_single
+        if state == '"':
+            return quote_double
+        return quote_raw if name in RAW_PARAMS else quote_word
+
+    # =========================================================================
+    # ACCESS
+    # =========================================================================
+
+    @property
+    def placeholders(self) -> List[str]:
+        """Placeholder names in order of first appearance."""
+        return list(dict.fromkeys(name for name, _ in self._fields))
+
+    def validate(self, params: Iterable[str]) -> List[str]:
+        """
+        Check the placeholders against the declared parameters.
+
+        Returns:
+            List of problems (empty if the template is consistent)
+        """
+        declared = list(dict.fromkeys(params))
+        used = self.placeholders
+        problems = [f"unknown placeholder {{{name}}}" for name in used if name not in declared]
+        problems.extend(f"parameter '{name}' not used in command"
+                        for name in declared if name not in used)
+        return problems
+
+    def render(self, values: Dict[str, Any]) -> str:
+        """
+        Build the command. Placeholders without a value are left as-is.
+        """
+        parts = [self._literals[0]]
+        for (name, quote), literal in zip(self._fields, self._literals[1:]):
+            value = values.get(name)
+            parts.append(quote(str(value)) if value is not None else f'{{{name}}}')
+            parts.append(literal)
+        return ''.join(parts)
+
+    def __repr__(self) -> str:
+        return f"CommandTemplate({self.template!r})"
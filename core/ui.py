@@ -7,10 +7,12 @@ Author: Tajaa
 import asyncio
 import time
 import random
+from collections import deque
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Deque, Tuple
 
 from rich.console import Console, Group
+from rich.markup import escape
 from rich.panel import Panel
 from rich.table import Table
 from rich.layout import Layout
@@ -22,6 +24,8 @@ from rich.style import Style
 from rich.box import DOUBLE, HEAVY, ROUNDED, MINIMAL
 from rich import box
 
+from .portset import PortSet
+
 
 # =============================================================================
 # CYBERPUNK COLOR SCHEME
@@ -266,12 +270,13 @@ class DashboardLayout:
         else:
             content.append("[dim]No active target[/dim]")
 
-        ports = self._status.get('ports', [])
+        ports = self._status.get('ports') or PortSet()
         if ports:
+            shown = PortSet.parse(ports.format(limit=10))
             content.append(f"\n[bold magenta]🔓 Open Ports:[/bold magenta]")
-            content.append(f"   [yellow]{', '.join(map(str, ports[:10]))}[/yellow]")
-            if len(ports) > 10:
-                content.append(f"   [dim]+{len(ports) - 10} more[/dim]")
+            content.append(f"   [yellow]{shown.format().replace(',', ', ')}[/yellow]")
+            if len(ports) > len(shown):
+                content.append(f"   [dim]+{len(ports) - len(shown)} more[/dim]")
 
         return Panel(
             "\n".join(content),
@@ -350,13 +355,13 @@ class DashboardLayout:
             box=box.MINIMAL,
         )
 
-    def update(self, target: str = None, ports: List[int] = None,
+    def update(self, target: str = None, ports: Any = None,
                tasks: List[Dict] = None, log: str = None) -> None:
         """Update dashboard state."""
         if target is not None:
             self._active_target = target
         if ports is not None:
-            self._status['ports'] = ports
+            self._status['ports'] = PortSet.coerce(ports)
         if tasks is not None:
             self._running_tasks = tasks
         if log:
@@ -374,6 +379,135 @@ class DashboardLayout:
         return self._layout
 
 
+# =============================================================================
+# STREAMED OUTPUT RENDERER
+# =============================================================================
+
+class StreamRenderer:
+    """
+    Batched, rate-capped renderer for streamed tool output.
+
+    Lines are collected between frames and written with a single console
+    call per frame, built from Text objects so tool output is never parsed
+    as markup. The raw fast path writes plain strings straight to the
+    console file. When a frame receives more lines than the rate cap allows,
+    only the first and last lines of the frame are shown together with a
+    "N lines suppressed" counter; callers keep the full output elsewhere.
+    """
+
+    PREFIX = "  │ "
+
+    def __init__(self, console: Console = None, fps: int = 20,
+                 max_lines_per_sec: int = 2000, raw: bool = False,
+                 prefix: str = PREFIX):
+        self.console = console or Console()
+        self.fps = max(1, fps)
+        self.raw = raw
+        self.prefix = prefix
+        self._head: List[Tuple[str, Optional[str]]] = []
+        self._tail: Deque[Tuple[str, Optional[str]]] = deque()
+        self.set_rate_cap(max_lines_per_sec)
+
+        self.suppressed = 0
+        self.rendered = 0
+        self._frame_dropped = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def set_rate_cap(self, max_lines_per_sec: int) -> None:
+        """Set the maximum number of lines rendered per second."""
+        self.max_lines_per_sec = max(1, max_lines_per_sec)
+        budget = max(2, self.max_lines_per_sec // self.fps)
+        self._head_budget = budget // 2
+        self._tail = deque(self._tail, maxlen=budget - self._head_budget)
+
+    def push(self, line: str, style: Optional[str] = None) -> None:
+        """Queue a line for the next frame."""
+        if len(self._head) < self._head_budget:
+            self._head.append((line, style))
+            return
+        if len(self._tail) == self._tail.maxlen:
+            self._frame_dropped += 1
+        self._tail.append((line, style))
+
+    def start(self) -> None:
+        """Start the frame loop on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self) -> None:
+        interval = 1.0 / self.fps
+        while True:
+            await asyncio.sleep(interval)
+            self.flush()
+
+    def flush(self) -> None:
+        """Render everything queued since the last frame."""
+        if not self._head and not self._tail:
+            return
+
+        lines = self._head
+        dropped = self._frame_dropped
+        tail = list(self._tail)
+        self._head = []
+        self._tail.clear()
+        self._frame_dropped = 0
+
+        self.suppressed += dropped
+        self.rendered += len(lines) + len(tail)
+
+        if self.raw:
+            self._write_raw(lines, dropped, tail)
+        else:
+            self._write_text(lines, dropped, tail)
+
+    def _suppressed_message(self, count: int) -> str:
+        return f"⋯ {count} lines suppressed"
+
+    def _write_raw(self, lines: List, dropped: int, tail: List) -> None:
+        out = [self.prefix + line for line, _ in lines]
+        if dropped:
+            out.append(self.prefix + self._suppressed_message(dropped))
+        out.extend(self.prefix + line for line, _ in tail)
+        self.console.file.write('\n'.join(out) + '\n')
+        self.console.file.flush()
+
+    def _write_text(self, lines: List, dropped: int, tail: List) -> None:
+        text = Text()
+
+        def add(line: str, style: Optional[str]) -> None:
+            text.append(self.prefix, style="dim")
+            text.append(line, style=style)
+            text.append("\n")
+
+        for line, style in lines:
+            add(line, style)
+        if dropped:
+            add(self._suppressed_message(dropped), "dim italic")
+        for line, style in tail:
+            add(line, style)
+
+        text.rstrip()
+        self.console.print(text, highlight=False, soft_wrap=True)
+
+    async def close(self) -> None:
+        """Stop the frame loop and render what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.flush()
+
+        if self.suppressed:
+            self.console.print(Text(
+                f"{self.prefix}{self.suppressed} lines suppressed from display "
+                f"(full output captured)",
+                style="dim",
+            ))
+
+
 # =============================================================================
 # UI COMPONENTS
 # =============================================================================
@@ -644,6 +778,28 @@ class TajaaUI:
 
         self.console.print()
 
+    def show_output_search_results(self, results: List[Dict], query: str) -> None:
+        """Display ranked full-text search hits over stored tool output."""
+        self.console.print()
+        self.console.print(f"[bold cyan]  📜 Output matches for '{escape(query)}'[/bold cyan]")
+        self.console.print("  [dim]─────────────────────────────────────────[/dim]")
+
+        if not results:
+            self.console.print("  [dim]No matches found[/dim]")
+        else:
+            for idx, hit in enumerate(results, 1):
+                source = "finding" if hit.get('kind') == 'finding' else "scan"
+                self.console.print(
+                    f"  [dim]{idx:2}.[/dim] [bold green]{escape(hit.get('tool') or '?')}[/bold green] "
+                    f"[dim]│[/dim] [cyan]{escape(hit.get('target') or '')}[/cyan] "
+                    f"[dim]│ {source} #{hit.get('ref_id')}[/dim]"
+                )
+                snippet = escape(' '.join((hit.get('snippet') or '').split()))
+                snippet = snippet.replace('\x02', '[bold yellow]').replace('\x03', '[/bold yellow]')
+                self.console.print(f"      {snippet}")
+
+        self.console.print()
+
     def confirm(self, message: str, default: bool = True) -> bool:
         """Show styled confirmation prompt."""
         from rich.prompt import Confirm
@@ -23,10 +23,9 @@ import shlex
 import re
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Callable, Dict, List, Optional, Any
 
 import typer
-import yaml
 import pyperclip
 from rich.console import Console
 from rich.prompt import Prompt, Confirm
@@ -35,14 +34,20 @@ from rich.table import Table
 from rich.text import Text
 from InquirerPy import inquirer
 from InquirerPy.base.control import Choice
+from prompt_toolkit.completion import Completer, Completion
 
 # Core imports
+from core.catalog import ToolCatalog
 from core.database import DatabaseManager, FindingType, ScanStatus
-from core.engine import AsyncEngine, OutputParser
+from core.discovery import DEEP_TEMPLATE, DiscoveryPipeline, HostScan, Scope, discovery_command
+from core.engine import AsyncEngine, ChainSkip, ChainTask, OutputParser
+from core.parsers import IndicatorMatcher, StreamFinding
 from core.intelligence import (
     FuzzySearchEngine,
     ContextSuggestionEngine,
     AttackChainOrchestrator,
+    AttackChainStep,
+    ChainContext,
     ToolInfo,
     Suggestion
 )
@@ -171,6 +176,137 @@ class InputValidator:
                 raise
 
 
+# =============================================================================
+# FINDING RECORDER
+# =============================================================================
+
+class FindingRecorder:
+    """
+    Stores findings for one tool run as they stream in.
+    Updates the session cache and database per finding, so results for the
+    first host of a large range are available before the scan finishes.
+    """
+
+    def __init__(self, db: Optional[DatabaseManager], session: SessionManager,
+                 target: Optional[str]):
+        self.db = db
+        self.session = session
+        self.target = target
+        self.scan_id: Optional[int] = None
+        self._target_ids: Dict[str, int] = {}
+
+    async def _target_id(self, host: str) -> int:
+        """Get (and memoize) the database ID for a host."""
+        if host not in self._target_ids:
+            self._target_ids[host] = await self.db.add_target(host)
+        return self._target_ids[host]
+
+    async def start_scan(self, tool_name: str, command: str) -> None:
+        """Create the scan record for this run."""
+        if not self.db or not self.target:
+            return
+        try:
+            target_id = await self._target_id(self.target)
+            self.scan_id = await self.db.create_scan(target_id, tool_name, command)
+        except Exception:
+            self.scan_id = None
+
+    async def record(self, finding: StreamFinding) -> None:
+        """Cache and store a single streamed finding."""
+        host = finding.host or self.target
+        if not host:
+            return
+
+        if self.session.current:
+            if finding.finding_type == FindingType.PORT:
+                self.session.cache_ports(host, [finding.port])
+            elif finding.finding_type == FindingType.SERVICE:
+                self.session.cache_services(host, [{
+                    'port': finding.port,
+                    'protocol': finding.protocol,
+                    'service': finding.service,
+                    'version': finding.version,
+                }])
+
+        if self.db and self.scan_id:
+            try:
+                self.db.queue_finding(
+                    self.scan_id, await self._target_id(host),
+                    finding.finding_type,
+                    finding.value,
+                    port=finding.port,
+                    protocol=finding.protocol,
+                    service=finding.service,
+                    version=finding.version,
+                    severity=finding.severity,
+                    raw_data=finding.raw,
+                )
+            except Exception:
+                pass
+
+    async def record_bulk(self, ports: List[int], services: List[Dict]) -> None:
+        """Store findings parsed from complete output."""
+        if not self.db or not self.scan_id:
+            return
+        try:
+            target_id = await self._target_id(self.target)
+
+            for port in ports:
+                self.db.queue_finding(
+                    self.scan_id, target_id,
+                    FindingType.PORT,
+                    str(port),
+                    port=port
+                )
+
+            for svc in services:
+                self.db.queue_finding(
+                    self.scan_id, target_id,
+                    FindingType.SERVICE,
+                    svc.get('service', ''),
+                    port=svc.get('port'),
+                    service=svc.get('service', ''),
+                    version=svc.get('version', '')
+                )
+        except Exception:
+            pass
+
+    async def finish_scan(self, result: Dict) -> None:
+        """Mark the scan finished and store its output."""
+        if not self.db or not self.scan_id:
+            return
+        try:
+            await self.db.flush()
+            status = ScanStatus.COMPLETED if result.get('success') else ScanStatus.FAILED
+            await self.db.update_scan(self.scan_id, status, result.get('output', ''),
+                                      exit_code=result.get('exit_code'))
+        except Exception:
+            pass
+
+
+# =============================================================================
+# TOOL COMPLETER
+# =============================================================================
+
+class ToolCompleter(Completer):
+    """Per-keystroke tool suggestions for the search prompt."""
+
+    def __init__(self, search: FuzzySearchEngine, limit: int = 8):
+        self.search = search
+        self.limit = limit
+
+    def get_completions(self, document, complete_event):
+        query = document.text_before_cursor.strip()
+        if not query:
+            return
+        for tool, _ in self.search.search(query, limit=self.limit):
+            yield Completion(
+                tool.name,
+                start_position=-len(document.text_before_cursor),
+                display_meta=tool.category,
+            )
+
+
 # =============================================================================
 # COMMAND MANAGER (The Brain)
 # =============================================================================
@@ -202,19 +338,24 @@ class CommandManager:
         self.fuzzy_search = FuzzySearchEngine()
         self.suggestion_engine = ContextSuggestionEngine(self.fuzzy_search)
         self.attack_chains = AttackChainOrchestrator()
+        # Independent chain steps run side by side, up to this many at once
+        self.chain_concurrency = 3
+        # Per-host service scans running alongside a discovery sweep
+        self.discovery_workers = 3
 
         # Register all tools for search
         self._index_tools()
 
     def _index_tools(self) -> None:
         """Index all tools for fuzzy search."""
-        for plugin in self.plugins.list_all():
+        for entry in self.plugins.entries():
             tool_info = ToolInfo(
-                id=plugin.metadata.name.lower().replace(' ', '_'),
-                name=plugin.metadata.name,
-                description=plugin.metadata.description,
-                category=plugin.metadata.category.value,
-                tags=plugin.metadata.tags,
+                id=entry.name.lower().replace(' ', '_'),
+                name=entry.name,
+                description=entry.description,
+                category=entry.category.value,
+                tags=entry.tags,
+                command=entry.command,
             )
             self.fuzzy_search.register_tool(tool_info)
 
@@ -316,12 +457,24 @@ class CommandManager:
         if not Confirm.ask("  [cyan]Execute now?[/cyan]", default=True):
             return None
 
+        # Resolve target and open the scan record up front so findings
+        # can be stored while the tool is still running
+        target = self._get_target(params)
+        recorder = FindingRecorder(self.db, self.session, target)
+        await recorder.start_scan(plugin.metadata.name, command)
+        parser = plugin.stream_parser() if target else None
+
         self.console.print()
         self.console.print("  [dim]Running...[/dim]\n")
         self.console.print("  [dim]─" * 35 + "[/dim]\n")
 
         # Execute with async engine
-        result = await self.engine.execute(command, stream_output=True)
+        result = await self.engine.execute(
+            command,
+            stream_output=True,
+            parser=parser,
+            on_finding=recorder.record,
+        )
 
         self.console.print("\n  [dim]─" * 35 + "[/dim]")
 
@@ -331,77 +484,42 @@ class CommandManager:
             self.console.print(f"\n  [yellow]⚠ Exit code: {result['exit_code']}[/yellow]")
 
         # Parse output and cache findings
-        await self._process_output(plugin, result, params)
+        await self._process_output(plugin, result, recorder, streamed=parser is not None)
 
         return result
 
-    async def _process_output(self, plugin: YAMLPlugin, result: Dict, params: Dict) -> None:
-        """Process tool output and extract findings."""
-        output = result.get('output', '')
-        if not output:
-            return
-
-        # Get target from params
-        target = None
-        for key in ['target', 'ip', 'host', 'url', 'rhost']:
+    def _get_target(self, params: Dict) -> Optional[str]:
+        """Get the scan target from tool params."""
+        for key in ['target', 'target_ip', 'ip', 'host', 'url', 'target_url', 'rhost']:
             if key in params:
-                target = params[key].strip("'\"")
-                break
+                return params[key].strip("'\"")
+        return None
 
-        if not target:
+    async def _process_output(self, plugin: YAMLPlugin, result: Dict,
+                              recorder: 'FindingRecorder', streamed: bool = False) -> None:
+        """Finish the scan record and extract findings not already streamed."""
+        output = result.get('output', '')
+        if not recorder.target:
             return
 
-        # Parse output based on tool type
-        findings = plugin.parse_output(output)
-
-        # Cache ports
-        ports = findings.get('ports', [])
-        if ports and self.session.current:
-            self.session.cache_ports(target, ports)
+        # Tools without a streaming parser are parsed once at the end
+        if not streamed and output:
+            findings = plugin.parse_output(output.getvalue())
 
-        # Cache services
-        services = findings.get('services', [])
-        if services and self.session.current:
-            self.session.cache_services(target, services)
+            ports = findings.get('ports', [])
+            if ports and self.session.current:
+                self.session.cache_ports(recorder.target, ports)
 
-        # Store in database
-        if self.db and target:
-            try:
-                target_id = await self.db.add_target(target)
-
-                # Create scan record
-                scan_id = await self.db.create_scan(
-                    target_id,
-                    plugin.metadata.name,
-                    plugin.build_command()
-                )
+            services = findings.get('services', [])
+            if services and self.session.current:
+                self.session.cache_services(recorder.target, services)
 
-                # Store findings
-                for port in ports:
-                    await self.db.add_finding(
-                        scan_id, target_id,
-                        FindingType.PORT,
-                        str(port),
-                        port=port
-                    )
-
-                for svc in services:
-                    await self.db.add_finding(
-                        scan_id, target_id,
-                        FindingType.SERVICE,
-                        svc.get('service', ''),
-                        port=svc.get('port'),
-                        service=svc.get('service', ''),
-                        version=svc.get('version', '')
-                    )
-
-                await self.db.update_scan(scan_id, ScanStatus.COMPLETED, output)
+            await recorder.record_bulk(ports, services)
 
-            except Exception:
-                pass
+        await recorder.finish_scan(result)
 
         # Show suggestions
-        suggestions = await self.get_suggestions(target)
+        suggestions = await self.get_suggestions(recorder.target)
         if suggestions:
             self.console.print()
             self.ui.show_suggestions([{
@@ -443,32 +561,145 @@ class CommandManager:
         if not Confirm.ask("  [cyan]Execute this chain?[/cyan]", default=True):
             return
 
-        # Execute each step
-        for i, step in enumerate(chain.steps, 1):
+        # Run steps as a DAG: independent steps in parallel, dependents
+        # once the steps they need have succeeded
+        dependencies = chain.dependencies()
+        numbers = {step.name: i for i, step in enumerate(chain.steps, 1)}
+        total = len(chain.steps)
+
+        # Steps see what earlier steps found. Cached ports are only used
+        # when no step of this chain discovers ports itself.
+        inputs = {'target': target, 'url': target}
+        if not any('ports' in step.produces for step in chain.steps):
+            inputs['ports'] = self.session.get_cached_portset(target) or None
+        context = ChainContext(**inputs)
+
+        def build(step: AttackChainStep) -> Callable[[Dict], Optional[str]]:
+            def command(_results: Dict) -> Optional[str]:
+                missing = context.missing(step)
+                if missing:
+                    raise ChainSkip("no value for " + ", ".join(f"{{{name}}}" for name in missing))
+                return context.render(step)
+            return command
+
+        def started(task: ChainTask, command: str) -> None:
             self.console.print()
-            self.console.print(f"  [bold #00FFFF]━━━ Step {i}/{len(chain.steps)}: {step.name} ━━━[/bold #00FFFF]")
-
-            # Build command with target
-            command = step.command_template.replace('{target}', shlex.quote(target))
-            command = command.replace('{url}', shlex.quote(target))
-
-            self.console.print(f"  [dim]Tool: {step.tool}[/dim]")
+            self.console.print(f"  [bold #00FFFF]━━━ Step {numbers[task.name]}/{total}: {task.name} ━━━[/bold #00FFFF]")
             self.console.print(f"  [dim]Command: {command}[/dim]")
-            self.console.print()
-
-            result = await self.engine.execute(command, stream_output=True)
 
-            if result['success']:
-                self.console.print(f"\n  [#00FF00]✓ Step {i} completed[/#00FF00]")
+        def finished(task: ChainTask, result: Dict) -> None:
+            i = numbers[task.name]
+            if result.get('findings'):
+                context.bind(result['findings'])
+                if context.ports and self.session.current:
+                    self.session.cache_ports(target, context.ports)
+            if result.get('skipped'):
+                self.console.print(f"  [dim]↷ Step {i} skipped: {result['errors']}[/dim]")
+            elif result.get('failed_on'):
+                self.console.print(f"  [yellow]⚠ Step {i} stopped on: {result['failed_on']}[/yellow]")
+            elif result['success']:
+                self.console.print(f"  [#00FF00]✓ Step {i} completed[/#00FF00]")
             else:
-                self.console.print(f"\n  [yellow]⚠ Step {i} failed[/yellow]")
-                if not Confirm.ask("  Continue chain?", default=False):
-                    break
+                self.console.print(f"  [yellow]⚠ Step {i} failed[/yellow]")
+
+        def failed(task: ChainTask, result: Dict) -> bool:
+            return Confirm.ask(f"  Step {numbers[task.name]} ({task.name}) failed. Continue chain?",
+                               default=False)
+
+        # Indicators are matched as output streams: fail conditions stop
+        # the step, and a success indicator releases dependents early
+        # unless they wait for something this step discovers
+        tasks = [
+            ChainTask(
+                step.name, build(step), dependencies[step.name], parse_output=True,
+                indicators=IndicatorMatcher.compile(tuple(step.success_indicators),
+                                                    tuple(step.fail_conditions)),
+                release_on_success=not step.produces, label=str(numbers[step.name]),
+            )
+            for step in chain.steps
+        ]
+        # Output streams live, prefixed with the step number; every failed
+        # step asks before the chain goes on
+        await self.engine.execute_dag(tasks, max_concurrent=self.chain_concurrency,
+                                      stream_output=True, on_start=started,
+                                      on_done=finished, on_failure=failed)
 
         self.console.print()
         self.console.print("  [bold #00FF00]━━━ Chain Complete ━━━[/bold #00FF00]")
 
 
+    async def execute_discovery(self, scope_text: str, scanner: str = "masscan") -> None:
+        """
+        Sweep a scope for open ports and service-scan each host as its
+        ports are found, storing results while the sweep is still running.
+        """
+        scope = Scope.parse(scope_text)
+        if not scope:
+            return
+        for target in scope.names:
+            is_valid, err = self.validator.validate_target(target)
+            if not is_valid or '://' in target:
+                self.console.print(f"  [red]✗ {err or f'Not a host: {target}'}[/red]")
+                return
+
+        command = discovery_command(scanner, scope)
+        self.console.print()
+        self._display_command(command)
+        self.console.print(f"  [dim]Then per host: {DEEP_TEMPLATE}[/dim]")
+        self.console.print()
+        if not Confirm.ask("  [cyan]Start pipelined scan?[/cyan]", default=True):
+            return
+
+        sweep = FindingRecorder(self.db, self.session, str(scope))
+        await sweep.start_scan(scanner, command)
+
+        async def discovered(finding: StreamFinding) -> None:
+            await sweep.record(finding)
+            self.console.print(f"  [dim]+ {finding.host}:{finding.port}[/dim]")
+
+        async def scan_start(scan: HostScan) -> None:
+            recorder = FindingRecorder(self.db, self.session, scan.host)
+            await recorder.start_scan("nmap", scan.command)
+            scan.data['recorder'] = recorder
+            self.console.print(f"  [cyan]▶[/cyan] {scan.host} [dim]-p {scan.ports}[/dim]")
+
+        async def scan_finding(scan: HostScan, finding: StreamFinding) -> None:
+            await scan.data['recorder'].record(finding)
+
+        async def scan_done(scan: HostScan) -> None:
+            await scan.data['recorder'].finish_scan(scan.result)
+            services = [f for f in scan.result.get('findings', [])
+                        if f.finding_type == FindingType.SERVICE]
+            self.console.print(f"  [#00FF00]✓[/#00FF00] {scan.host}: "
+                               f"{len(services)} services on {len(scan.ports)} ports")
+            for finding in services:
+                self.console.print(f"      [yellow]{finding.port}/{finding.protocol}[/yellow] "
+                                   f"{finding.service} [dim]{finding.version}[/dim]")
+
+        pipeline = DiscoveryPipeline(
+            self.engine, scope, command,
+            max_workers=self.discovery_workers,
+            on_discovered=discovered,
+            on_scan_start=scan_start,
+            on_scan_finding=scan_finding,
+            on_scan_done=scan_done,
+        )
+        self.console.print()
+        try:
+            result = await pipeline.run()
+        except (ValueError, PermissionError) as e:
+            self.console.print(f"  [red]✗ {e}[/red]")
+            return
+        await sweep.finish_scan(result.discovery)
+
+        self.console.print()
+        if not result.discovery['success']:
+            self.console.print(f"  [yellow]⚠ {scanner}: {result.discovery['errors'] or 'failed'}[/yellow]")
+        for host, ports in result.found.items():
+            self.console.print(f"  [bold]{host}[/bold] [yellow]{ports}[/yellow]")
+        self.console.print("  [bold #00FF00]━━━ Pipelined Scan Complete ━━━[/bold #00FF00]")
+
+
 # =============================================================================
 # MAIN APPLICATION
 # =============================================================================
@@ -493,6 +724,7 @@ class TajaaCLI:
         # Core components (initialized in setup)
         self.db: Optional[DatabaseManager] = None
         self.engine: Optional[AsyncEngine] = None
+        self.catalog: Optional[ToolCatalog] = None
         self.plugins: Optional[PluginRegistry] = None
         self.session: Optional[SessionManager] = None
         self.ui: Optional[TajaaUI] = None
@@ -522,8 +754,9 @@ class TajaaCLI:
             self.session = SessionManager(db_manager=self.db)
             await self.session.create_session()
 
-            # Load plugins
-            loader = PluginLoader(configs_path=self.config_dir)
+            # Load plugins from the compiled catalog
+            self.catalog = ToolCatalog(self.config_dir).load()
+            loader = PluginLoader(configs_path=self.config_dir, catalog=self.catalog)
             self.plugins = loader.load_all(lazy=True)
 
             # Initialize command manager
@@ -548,19 +781,8 @@ class TajaaCLI:
             return False
 
     def _load_categories(self) -> None:
-        """Load categories from YAML configs."""
-        self._categories = {}
-
-        for yaml_file in sorted(self.config_dir.glob("*.yaml")):
-            try:
-                with open(yaml_file, 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f)
-
-                if data and 'categories' in data:
-                    self._categories.update(data['categories'])
-
-            except Exception:
-                continue
+        """Load categories from the compiled catalog."""
+        self._categories = self.catalog.categories
 
     async def run(self) -> None:
         """Main application loop."""
@@ -595,10 +817,18 @@ class TajaaCLI:
                         await self._handle_search()
                         continue
 
+                    if cat_id == "__find__":
+                        await self._handle_output_search()
+                        continue
+
                     if cat_id == "__chains__":
                         await self._handle_attack_chains()
                         continue
 
+                    if cat_id == "__sweep__":
+                        await self._handle_discovery()
+                        continue
+
                     if cat_id == "__target__":
                         await self._set_target()
                         continue
@@ -643,7 +873,9 @@ class TajaaCLI:
 
             # Add special options at top
             choices.append(Choice(value="__search__", name="🔍  Search Tools"))
+            choices.append(Choice(value="__find__", name="📜  Search Output"))
             choices.append(Choice(value="__chains__", name="🔗  Attack Chains"))
+            choices.append(Choice(value="__sweep__", name="⚡  Pipelined Scan"))
             choices.append(Choice(value="__target__", name="🎯  Set Target"))
             choices.append(Choice(value="", name="─" * 40))
 
@@ -705,9 +937,14 @@ class TajaaCLI:
     async def _handle_search(self) -> None:
         """Handle fuzzy search."""
         self.console.print()
-        query = Prompt.ask("  [cyan]🔍 Search[/cyan]")
+        query = await inquirer.text(
+            message="🔍 Search:",
+            completer=ToolCompleter(self.command_manager.fuzzy_search),
+            qmark="",
+            amark="",
+        ).execute_async()
 
-        if not query.strip():
+        if not query or not query.strip():
             return
 
         results = await self.command_manager.search_tools(query)
@@ -740,6 +977,22 @@ class TajaaCLI:
                                     await self.command_manager.execute_tool(plugin, cat_data.get('name', ''))
                                 return
 
+    async def _handle_output_search(self) -> None:
+        """Full-text search across everything the tools have printed."""
+        self.console.print()
+        query = Prompt.ask("  [cyan]📜 Search output[/cyan]")
+
+        if not query.strip() or not self.db:
+            return
+
+        target = None
+        if self.session.current and self.session.current.active_target:
+            if Confirm.ask(f"  Only {self.session.current.active_target}?", default=False):
+                target = self.session.current.active_target
+
+        results = await self.db.search_outputs(query, target=target)
+        self.ui.show_output_search_results(results, query)
+
     async def _handle_attack_chains(self) -> None:
         """Handle attack chain selection and execution."""
         chains = self.command_manager.attack_chains.list_chains()
@@ -774,6 +1027,29 @@ class TajaaCLI:
         if target:
             await self.command_manager.execute_attack_chain(result, target)
 
+    async def _handle_discovery(self) -> None:
+        """Pick a scope and scanner for a pipelined discovery → nmap scan."""
+        self.console.print()
+        default = self.session.current.active_target if self.session.current else ""
+        scope = Prompt.ask("  [cyan]⚡ Scope (IPs, CIDRs, hosts)[/cyan]", default=default or None)
+        if not scope or not scope.strip():
+            return
+
+        scanner = await inquirer.select(
+            message="Discovery scanner:",
+            choices=[
+                Choice(value="masscan", name="⚡  Masscan"),
+                Choice(value="rustscan", name="🦀  RustScan"),
+                Choice(value="__back__", name="← Back"),
+            ],
+            pointer="❯",
+            qmark="",
+            amark="",
+        ).execute_async()
+
+        if scanner != "__back__":
+            await self.command_manager.execute_discovery(scope, scanner)
+
     async def _set_target(self) -> None:
         """Set the active target."""
         self.console.print()
@@ -838,6 +1114,11 @@ def main(
         False,
         "--version", "-v",
         help="Show version"
+    ),
+    rebuild_index: bool = typer.Option(
+        False,
+        "--rebuild-index",
+        help="Rebuild the session index from the session files and exit"
     )
 ) -> None:
     """Launch Tajaa CLI - The Ultimate Cyber Security Framework."""
@@ -848,6 +1129,11 @@ def main(
         console.print(f"  [dim]Tools: {TOOL_COUNT}+[/dim]\n")
         return
 
+    if rebuild_index:
+        count = SessionManager().rebuild_index()
+        Console().print(f"\n  [green]✓[/green] Indexed {count} sessions\n")
+        return
+
     # Run the async application
     tajaa = TajaaCLI(config_dir=config, db_path=db, skip_intro=skip_intro)
 
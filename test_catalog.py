@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the compiled tool catalog
+Author: Tajaa
+"""
+
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from core.catalog import ToolCatalog
+from core.plugin import PluginCategory, PluginLoader, PluginRegistry, YAMLPlugin
+
+
+CONFIG = """
+categories:
+  reconnaissance:
+    name: Recon
+    tools:
+      nmap:
+        name: Nmap
+        description: Port scanner
+        command: nmap {target}
+        params: [target]
+"""
+
+
+class TestToolCatalog(unittest.TestCase):
+    """Test cases for the YAML catalog cache"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        root = Path(self.temp_dir.name)
+        self.configs = root / "configs"
+        self.configs.mkdir()
+        self.config_file = self.configs / "01_recon.yaml"
+        self.config_file.write_text(CONFIG)
+        self.cache = root / "cache" / "catalog.pickle"
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _catalog(self):
+        return ToolCatalog(self.configs, self.cache).load()
+
+    def test_second_load_skips_yaml(self):
+        """Test that an unchanged config tree is served from the cache"""
+        first = self._catalog()
+        self.assertFalse(first.from_cache)
+        self.assertTrue(self.cache.exists())
+
+        with mock.patch('core.catalog.yaml.safe_load') as safe_load:
+            second = self._catalog()
+        safe_load.assert_not_called()
+        self.assertTrue(second.from_cache)
+        self.assertEqual(second.categories, first.categories)
+
+    def test_changed_file_rebuilds(self):
+        """Test that editing a config invalidates the cache"""
+        self._catalog()
+        self.config_file.write_text(CONFIG.replace("Port scanner", "Network mapper"))
+        stat = self.config_file.stat()
+        os.utime(self.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        catalog = self._catalog()
+        self.assertFalse(catalog.from_cache)
+        tool = catalog.categories['reconnaissance']['tools']['nmap']
+        self.assertEqual(tool['description'], "Network mapper")
+
+    def test_parse_errors_are_kept(self):
+        """Test that broken files are reported, also from the cache"""
+        (self.configs / "02_broken.yaml").write_text("categories: [unclosed")
+        self.assertEqual(self._catalog().errors[0][0], "02_broken.yaml")
+        self.assertEqual(self._catalog().errors[0][0], "02_broken.yaml")
+
+    def test_template_warnings(self):
+        """Test that inconsistent command templates are reported at compile time"""
+        (self.configs / "02_bad.yaml").write_text(
+            CONFIG.replace("nmap {target}", "nmap {target} -p {ports}"))
+        catalog = self._catalog()
+        self.assertEqual(catalog.warnings, [
+            ("02_bad.yaml", "reconnaissance.nmap: unknown placeholder {ports}"),
+        ])
+
+    def test_plugin_loader_shares_catalog(self):
+        """Test that the plugin registry is built from the catalog"""
+        catalog = self._catalog()
+        registry = PluginLoader(configs_path=self.configs, catalog=catalog).load_all()
+        plugin = registry.get("reconnaissance.nmap")
+        self.assertEqual(plugin.metadata.category.value, "recon")
+        self.assertNotIn('category', catalog.categories['reconnaissance']['tools']['nmap'])
+
+
+class TestLazyRegistry(unittest.TestCase):
+    """Test cases for lazily built YAML plugins"""
+
+    def setUp(self):
+        self.registry = PluginRegistry(cache_size=2)
+        for i in range(4):
+            self.registry.register_lazy(f"cat.tool{i}", {
+                'name': f"Tool {i}",
+                'description': "Scanner",
+                'command': f"tool{i} {{target}}",
+                'tags': ['scan'],
+            }, 'recon')
+
+    def test_entries_do_not_build_plugins(self):
+        """Test that listing entries leaves plugins unbuilt"""
+        entries = self.registry.entries()
+        self.assertEqual([e.name for e in entries], [f"Tool {i}" for i in range(4)])
+        self.assertEqual(entries[0].category, PluginCategory.RECON)
+        self.assertEqual(entries[0].command, "tool0 {target}")
+        self.assertEqual(len(self.registry._built), 0)
+        self.assertEqual(self.registry.count, 4)
+
+    def test_get_builds_and_caches(self):
+        """Test that plugins are built on first get and reused"""
+        plugin = self.registry.get("cat.tool0")
+        self.assertIsInstance(plugin, YAMLPlugin)
+        self.assertIs(self.registry.get("cat.tool0"), plugin)
+        self.assertIsNone(self.registry.get("cat.missing"))
+
+    def test_cache_is_bounded(self):
+        """Test that the least recently used plugin is evicted"""
+        for i in range(3):
+            self.registry.get(f"cat.tool{i}")
+        self.assertEqual(list(self.registry._built), ["cat.tool1", "cat.tool2"])
+        self.assertEqual(len(self.registry.get_by_tag('scan')), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
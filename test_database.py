@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Tajaa database layer
+Author: Tajaa
+"""
+
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+import asyncio
+
+from core.capture import OutputCapture
+from core.database import DatabaseManager, FindingType, ScanStatus
+
+
+class DatabaseTestCase(unittest.IsolatedAsyncioTestCase):
+    """Base class providing a fresh database per test"""
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(Path(self.temp_dir.name) / "test.db")
+        await self.db.connect()
+        self.target_id = await self.db.add_target("10.0.0.1")
+
+    async def asyncTearDown(self):
+        await self.db.close()
+        self.temp_dir.cleanup()
+
+
+class TestScanOutputStore(DatabaseTestCase):
+    """Test cases for compressed, deduplicated scan output"""
+
+    async def test_output_round_trip(self):
+        """Test that stored output is compressed and loaded on demand"""
+        output = "22/tcp open ssh\n" * 5000
+        scan_id = await self.db.create_scan(self.target_id, "nmap", "nmap 10.0.0.1")
+        await self.db.update_scan(scan_id, ScanStatus.COMPLETED, output)
+
+        scans = await self.db.get_scans_for_target(self.target_id)
+        self.assertEqual(scans[0].output, "")
+        self.assertTrue(scans[0].output_hash)
+
+        self.assertEqual(await self.db.get_scan_output(scan_id), output)
+        self.assertEqual((await self.db.get_scan(scan_id)).output, output)
+
+        cursor = await self.db._connection.execute("SELECT size, length(data) FROM blobs")
+        size, stored = await cursor.fetchone()
+        self.assertEqual(size, len(output))
+        self.assertLess(stored, size // 10)
+
+    async def test_capture_is_stored_chunkwise(self):
+        """Test that a spilled capture is stored like the same text"""
+        capture = OutputCapture(tail_lines=5, chunk_size=1024)
+        capture.extend(f"{port}/tcp open" for port in range(1, 5000))
+        self.assertTrue(capture.spilled)
+
+        first = await self.db.create_scan(self.target_id, "nmap", "nmap 10.0.0.1")
+        second = await self.db.create_scan(self.target_id, "nmap", "nmap 10.0.0.1")
+        await self.db.update_scan(first, ScanStatus.COMPLETED, capture)
+        await self.db.update_scan(second, ScanStatus.COMPLETED, capture.getvalue())
+
+        self.assertEqual(await self.db.get_scan_output(first), capture.getvalue())
+        scans = await self.db.get_scans_for_target(self.target_id)
+        self.assertEqual(scans[0].output_hash, scans[1].output_hash)
+
+    async def test_identical_outputs_are_deduplicated(self):
+        """Test that identical outputs share one blob"""
+        for _ in range(3):
+            scan_id = await self.db.create_scan(self.target_id, "nmap", "nmap 10.0.0.1")
+            await self.db.update_scan(scan_id, ScanStatus.COMPLETED, "same output")
+
+        cursor = await self.db._connection.execute("SELECT COUNT(*) FROM blobs")
+        self.assertEqual((await cursor.fetchone())[0], 1)
+
+    async def test_legacy_output_column(self):
+        """Test that outputs written before the blob store still load"""
+        scan_id = await self.db.create_scan(self.target_id, "nmap", "nmap 10.0.0.1")
+        await self.db._connection.execute(
+            "UPDATE scans SET output = 'legacy' WHERE id = ?", (scan_id,)
+        )
+        await self.db._connection.commit()
+        self.assertEqual(await self.db.get_scan_output(scan_id), "legacy")
+
+
+class TestWriteBehindFindings(DatabaseTestCase):
+    """Test cases for the group-committed findings queue"""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.scan_id = await self.db.create_scan(self.target_id, "masscan", "masscan 10.0.0.1")
+
+    def queue_ports(self, ports):
+        for port in ports:
+            self.db.queue_finding(self.scan_id, self.target_id, FindingType.PORT,
+                                  str(port), port=port)
+
+    async def test_explicit_flush(self):
+        """Test that queued findings are written on flush"""
+        self.queue_ports(range(1, 101))
+        self.assertEqual(self.db.queued_findings, 100)
+        self.assertEqual(await self.db.get_open_ports(self.target_id), [])
+
+        await self.db.flush()
+        self.assertEqual(self.db.queued_findings, 0)
+        self.assertEqual(await self.db.get_open_ports(self.target_id), list(range(1, 101)))
+
+    async def test_size_threshold(self):
+        """Test that a full batch is committed without an explicit flush"""
+        self.db.flush_size = 50
+        self.queue_ports(range(1, 51))
+        await asyncio.sleep(0.05)
+        self.assertEqual(len(await self.db.get_open_ports(self.target_id)), 50)
+
+    async def test_time_threshold(self):
+        """Test that a partial batch is committed after the flush interval"""
+        self.db.flush_interval = 0.01
+        self.queue_ports([22, 80])
+        await asyncio.sleep(0.1)
+        self.assertEqual(await self.db.get_open_ports(self.target_id), [22, 80])
+
+
+class TestOutputSearch(DatabaseTestCase):
+    """Test cases for the FTS5 index over outputs and findings"""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.scan_id = await self.db.create_scan(self.target_id, "nmap", "nmap 10.0.0.1")
+        await self.db.update_scan(
+            self.scan_id, ScanStatus.COMPLETED,
+            "PORT STATE SERVICE\n22/tcp open ssh OpenSSH 7.2\n" + "filler line\n" * 1000
+        )
+        self.db.queue_finding(self.scan_id, self.target_id, FindingType.SERVICE,
+                              "http", port=80, service="http", version="Apache httpd 2.4.49")
+
+    async def test_search_scan_output(self):
+        """Test ranked snippets from stored scan output"""
+        results = await self.db.search_outputs("openssh")
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['kind'], 'scan')
+        self.assertEqual(results[0]['tool'], 'nmap')
+        self.assertIn("\x02OpenSSH\x03", results[0]['snippet'])
+
+    async def test_search_findings_and_target_filter(self):
+        """Test that queued findings are searchable and filtered by target"""
+        results = await self.db.search_outputs("apache", target="10.0.0.1")
+        self.assertEqual([r['kind'] for r in results], ['finding'])
+        self.assertEqual(await self.db.search_outputs("apache", target="10.9.9.9"), [])
+
+    async def test_literal_fallback(self):
+        """Test that text which is not FTS5 syntax is searched literally"""
+        results = await self.db.search_outputs("22/tcp")
+        self.assertEqual(len(results), 1)
+
+    async def test_other_clients_can_change_scans(self):
+        """Test that plain SQLite clients can update and delete scans"""
+        await self.db.flush()
+        with sqlite3.connect(self.db.db_path) as other:
+            other.execute("PRAGMA foreign_keys = ON")
+            other.execute("UPDATE scans SET output_hash = NULL, output = 'x' WHERE id = ?",
+                          (self.scan_id,))
+            other.execute("DELETE FROM scans WHERE id = ?", (self.scan_id,))
+        other.close()
+        # Stale tokens are dropped at query time and by a rebuild
+        self.assertEqual(await self.db.search_outputs("openssh OR apache"), [])
+        await self.db.rebuild_search_index()
+        self.assertEqual(await self.db.search_outputs("openssh"), [])
+
+    async def test_index_keeps_no_copy_of_output(self):
+        """Test that the index stores tokens only, reading text from the blob store"""
+        cursor = await self.db._connection.execute(
+            "SELECT name FROM sqlite_master WHERE name LIKE '%fts_content'")
+        self.assertEqual(await cursor.fetchall(), [])
+
+        await self.db.update_scan(self.scan_id, output="Nginx 1.18 replaced it")
+        self.assertEqual(await self.db.search_outputs("openssh"), [])
+        results = await self.db.search_outputs("nginx")
+        self.assertIn("\x02Nginx\x03", results[0]['snippet'])
+        # Python-side updates leave the index consistent with its content
+        await self.db._connection.execute(
+            "INSERT INTO scan_fts (scan_fts) VALUES ('integrity-check')")
+
+    async def test_migrates_output_copy(self):
+        """Test that an old index holding output copies is replaced"""
+        await self.db._connection.executescript("""
+            DROP TABLE scan_fts;
+            CREATE VIRTUAL TABLE output_fts USING fts5(content);
+            INSERT INTO output_fts (content) VALUES ('stale copy');
+        """)
+        await self.db.close()
+
+        self.db = DatabaseManager(self.db.db_path)
+        await self.db.connect()
+        cursor = await self.db._connection.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'output_fts'")
+        self.assertIsNone(await cursor.fetchone())
+        self.assertEqual(len(await self.db.search_outputs("openssh")), 1)
+
+
+
+class TestTargetStats(DatabaseTestCase):
+    """Test cases for the trigger-maintained target summary"""
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.scan_id = await self.db.create_scan(self.target_id, "nmap", "nmap 10.0.0.1")
+        for port in (22, 80):
+            self.db.queue_finding(self.scan_id, self.target_id, FindingType.PORT, str(port), port=port)
+        self.db.queue_finding(self.scan_id, self.target_id, FindingType.VULNERABILITY,
+                              "CVE-2021-41773", severity="high")
+
+    async def test_summary_counts(self):
+        """Test that inserts and status changes update the counters"""
+        await self.db.update_scan(self.scan_id, ScanStatus.COMPLETED, "done")
+        await self.db.create_scan(self.target_id, "nikto", "nikto -h 10.0.0.1")
+
+        summary = await self.db.get_target_summary(self.target_id)
+        self.assertEqual(summary['total_findings'], 3)
+        self.assertEqual(summary['severity_breakdown'], {'info': 2, 'high': 1})
+        self.assertEqual(summary['type_breakdown'], {'port': 2, 'vulnerability': 1})
+        self.assertEqual(summary['total_scans'], 2)
+        self.assertEqual(summary['completed_scans'], 1)
+        self.assertEqual(summary['port_ranges'], "22,80")
+
+    async def test_deletes_and_rebuild(self):
+        """Test that deletes decrement and a rebuild gives the same counts"""
+        await self.db.flush()
+        await self.db._connection.execute(
+            "DELETE FROM findings WHERE finding_type = 'vulnerability'")
+        await self.db._connection.commit()
+        stats = await self.db.get_target_stats(self.target_id)
+        self.assertEqual(stats, {'findings': 2, 'severity:info': 2, 'type:port': 2,
+                                 'scans': 1, 'status:running': 1})
+
+        await self.db.rebuild_target_stats()
+        self.assertEqual(await self.db.get_target_stats(self.target_id), stats)
+
+        await self.db._connection.execute("DELETE FROM targets WHERE id = ?", (self.target_id,))
+        await self.db._connection.commit()
+        self.assertEqual(await self.db.get_target_stats(self.target_id), {})
+
+    async def test_backfill_existing_database(self):
+        """Test that databases without the table are counted on connect"""
+        await self.db.flush()
+        await self.db._connection.executescript("DROP TABLE target_stats;")
+        await self.db.close()
+
+        self.db = DatabaseManager(Path(self.temp_dir.name) / "test.db")
+        await self.db.connect()
+        summary = await self.db.get_target_summary(self.target_id)
+        self.assertEqual(summary['total_findings'], 3)
+        self.assertEqual(summary['total_scans'], 1)
+
+
+class TestReadPool(DatabaseTestCase):
+    """Test cases for the read-only connection pool"""
+
+    async def test_reads_do_not_wait_for_writer(self):
+        """Test that queries run while a write transaction is open"""
+        async with self.db._lock:
+            await self.db._connection.execute("INSERT INTO targets (value) VALUES ('10.0.0.2')")
+            targets = await asyncio.wait_for(self.db.get_all_targets(), 1)
+            self.assertEqual([t.value for t in targets], ["10.0.0.1"])
+            await self.db._connection.commit()
+        self.assertEqual(len(await self.db.get_all_targets()), 2)
+
+    async def test_pool_is_bounded_and_reused(self):
+        """Test that concurrent queries share at most read_pool_size readers"""
+        await asyncio.gather(*(self.db.get_target(self.target_id) for _ in range(20)))
+        self.assertLessEqual(len(self.db._readers), self.db.read_pool_size)
+        self.assertEqual(len(self.db._idle_readers), len(self.db._readers))
+
+    async def test_in_memory_database(self):
+        """Test that in-memory databases query through the writer"""
+        db = DatabaseManager(":memory:")
+        await db.connect()
+        target_id = await db.add_target("10.0.0.3")
+        self.assertEqual((await db.get_target(target_id)).value, "10.0.0.3")
+        self.assertEqual(db._readers, [])
+        await db.close()
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
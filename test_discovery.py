@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the pipelined discovery → deep scan workflow
+Author: Tajaa
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from rich.console import Console
+
+from core.discovery import DiscoveryPipeline, Scope, discovery_command
+from core.engine import AsyncEngine
+from core.portset import PortSet
+
+
+FAKE_MASSCAN = """#!/bin/sh
+echo "Discovered open port 22/tcp on 10.0.0.5"
+echo "Discovered open port 80/tcp on 10.0.0.5"
+echo "Discovered open port 445/tcp on 192.168.9.9"
+sleep 0.5
+echo "Discovered open port 8080/tcp on 10.0.0.5"
+echo "Discovered open port 22/tcp on 10.0.0.5"
+sleep 0.3
+echo "Discovered open port 9000/tcp on 10.0.0.5"
+"""
+
+# Prints every port it was asked to scan as an open service
+FAKE_NMAP = """#!/bin/sh
+echo "Nmap scan report for $3"
+for port in $(echo "$2" | tr ',' ' '); do
+  echo "$port/tcp open  svc$port"
+done
+"""
+
+
+class TestScope(unittest.TestCase):
+    """Test cases for scope matching and sweep commands"""
+
+    def test_membership(self):
+        """Test addresses, networks and names"""
+        scope = Scope.parse("10.0.0.0/24, 192.168.1.5 example.com")
+        self.assertIn("10.0.0.77", scope)
+        self.assertIn("192.168.1.5", scope)
+        self.assertIn("EXAMPLE.com", scope)
+        self.assertNotIn("10.0.1.1", scope)
+        self.assertNotIn("other.com", scope)
+
+    def test_discovery_commands(self):
+        """Test masscan and rustscan command lines"""
+        scope = Scope.parse("10.0.0.0/24")
+        self.assertEqual(discovery_command("masscan", scope, PortSet.parse("22,80-90"), 500),
+                         "sudo -n masscan 10.0.0.0/24 -p 22,80-90 --rate 500")
+        self.assertEqual(discovery_command("rustscan", scope),
+                         "rustscan -a 10.0.0.0/24 -r 1-65535 --ulimit 5000 --scripts none")
+        self.assertIn("-p 22,80,81", discovery_command("rustscan", scope, PortSet.parse("22,80-81")))
+        with self.assertRaises(ValueError):
+            discovery_command("zmap", scope)
+
+
+class TestDiscoveryPipeline(unittest.IsolatedAsyncioTestCase):
+    """Test cases running the pipeline against fake scanners"""
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        bin_dir = Path(self.temp_dir.name)
+        for name, script in (("masscan", FAKE_MASSCAN), ("nmap", FAKE_NMAP)):
+            path = bin_dir / name
+            path.write_text(script)
+            path.chmod(0o755)
+        self.env = mock.patch.dict(os.environ, {"PATH": f"{bin_dir}:{os.environ['PATH']}"})
+        self.env.start()
+        self.engine = AsyncEngine(Console(file=StringIO()))
+
+    async def asyncTearDown(self):
+        self.env.stop()
+        self.temp_dir.cleanup()
+
+    async def test_deep_scans_start_during_sweep(self):
+        """Test per-host batching, scope filtering and scans of new ports only"""
+        started = []
+        services = []
+        loop = asyncio.get_running_loop()
+        begin = loop.time()
+
+        def on_start(scan):
+            started.append((scan.host, str(scan.ports), loop.time() - begin))
+
+        pipeline = DiscoveryPipeline(
+            self.engine, Scope.parse("10.0.0.0/24"), "masscan 10.0.0.0/24",
+            deep_template="nmap -p {ports} {host}", settle=0.1,
+            on_scan_start=on_start,
+            on_scan_finding=lambda scan, f: services.append((f.host, f.port, f.service)),
+        )
+        result = await pipeline.run()
+
+        self.assertTrue(result.discovery['success'])
+        self.assertEqual({h: str(p) for h, p in result.found.items()},
+                         {"10.0.0.5": "22,80,8080,9000"})
+        self.assertEqual([(host, ports) for host, ports, _ in started],
+                         [("10.0.0.5", "22,80"), ("10.0.0.5", "8080"), ("10.0.0.5", "9000")])
+        # The first batch went out while the sweep was still running
+        self.assertLess(started[0][2], 0.5)
+        self.assertIn(("10.0.0.5", 8080, "svc8080"), services)
+        self.assertEqual(len(result.scans), 3)
+
+    async def test_requires_streaming_parser(self):
+        """Test that sweeps whose output cannot be streamed are rejected"""
+        pipeline = DiscoveryPipeline(self.engine, Scope.parse("10.0.0.1"), "echo 10.0.0.1")
+        with self.assertRaises(ValueError):
+            await pipeline.run()
+
+    async def test_sudo_password_rejected_up_front(self):
+        """Test that a sweep needing a sudo password fails before it starts"""
+        sudo = Path(self.temp_dir.name) / "sudo"
+        sudo.write_text("#!/bin/sh\necho 'sudo: a password is required' >&2\nexit 1\n")
+        sudo.chmod(0o755)
+        pipeline = DiscoveryPipeline(self.engine, Scope.parse("10.0.0.0/24"),
+                                     "sudo -n masscan 10.0.0.0/24")
+        with self.assertRaises(PermissionError):
+            await pipeline.run()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
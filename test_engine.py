@@ -0,0 +1,626 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Tajaa async engine
+Author: Tajaa
+"""
+
+import asyncio
+import sys
+import unittest
+from datetime import datetime
+from io import StringIO
+
+from rich.console import Console
+
+from core.capture import OutputCapture
+from core.database import FindingType
+from core.engine import AsyncEngine, BackgroundTaskManager, ChainSkip, ChainTask, TaskStatus
+from core.ui import StreamRenderer
+from core.parsers import (
+    GobusterStreamParser,
+    IndicatorMatcher,
+    NmapStreamParser,
+    get_stream_parser,
+)
+
+
+class GatedTaskManager(BackgroundTaskManager):
+    """Task manager whose tasks block until released, recording start order."""
+
+    def __init__(self, max_concurrent: int = 5):
+        super().__init__(max_concurrent)
+        self.gate = asyncio.Event()
+        self.started = []
+
+    async def _execute_task(self, task_id: str) -> None:
+        task = self.tasks[task_id]
+        task.started_at = datetime.now()
+        self.started.append(task.name)
+        await self.gate.wait()
+        task.status = TaskStatus.COMPLETED
+        task.completed_at = datetime.now()
+
+
+class TestBackgroundTaskManager(unittest.IsolatedAsyncioTestCase):
+    """Test cases for the background task scheduler"""
+
+    async def asyncSetUp(self):
+        self.manager = GatedTaskManager(max_concurrent=2)
+
+    async def drain(self):
+        """Release all tasks and wait until the queue is empty"""
+        self.manager.gate.set()
+        while self.manager.running_count or self.manager.pending_count:
+            await asyncio.sleep(0)
+
+    async def test_respects_max_concurrent(self):
+        """Test that only max_concurrent tasks are admitted at once"""
+        for i in range(5):
+            await self.manager.submit(f"job{i}", f"true {i}")
+        await asyncio.sleep(0)
+
+        self.assertEqual(self.manager.running_count, 2)
+        self.assertEqual(self.manager.pending_count, 3)
+
+        await self.drain()
+        self.assertTrue(all(t.status == TaskStatus.COMPLETED
+                            for t in self.manager.tasks.values()))
+
+    async def test_priority_order(self):
+        """Test that higher priority pending tasks are admitted first"""
+        await self.manager.submit("a", "true a")
+        await self.manager.submit("b", "true b")
+        await self.manager.submit("low", "true low", priority=0)
+        await self.manager.submit("high", "true high", priority=5)
+        await self.drain()
+
+        self.assertEqual(self.manager.started, ["a", "b", "high", "low"])
+
+    async def test_cancel_pending(self):
+        """Test that cancelled pending tasks never start"""
+        await self.manager.submit("a", "true a")
+        await self.manager.submit("b", "true b")
+        task_id = await self.manager.submit("c", "true c")
+
+        self.assertTrue(await self.manager.cancel(task_id))
+        self.assertEqual(self.manager.pending_count, 0)
+
+        await self.drain()
+        self.assertNotIn("c", self.manager.started)
+        self.assertEqual(self.manager.get_task(task_id).status, TaskStatus.CANCELLED)
+
+    async def test_wait_wakes_on_completion(self):
+        """Test that waiting on a task wakes as soon as it finishes"""
+        task_id = await self.manager.submit("a", "true a")
+        task = self.manager.get_task(task_id)
+        waiter = asyncio.ensure_future(task.wait())
+
+        await asyncio.sleep(0)
+        self.assertFalse(waiter.done())
+
+        self.manager.gate.set()
+        self.assertIs(await asyncio.wait_for(waiter, timeout=1), task)
+        self.assertTrue(task.is_done)
+
+    async def test_as_completed(self):
+        """Test that as_completed yields every task, including cancelled ones"""
+        ids = [await self.manager.submit(f"job{i}", f"true {i}") for i in range(3)]
+        finished = []
+
+        async def collect():
+            async for task in self.manager.as_completed(ids, timeout=1):
+                finished.append(task.id)
+                if len(finished) == 1:
+                    self.manager.gate.set()
+
+        collector = asyncio.ensure_future(collect())
+        await asyncio.sleep(0)
+        await self.manager.cancel(ids[2])
+        await collector
+
+        self.assertEqual(finished[0], ids[2])
+        self.assertCountEqual(finished, ids)
+
+    async def test_resize_fills_slots(self):
+        """Test that growing the pool admits several tasks in one pass"""
+        for i in range(4):
+            await self.manager.submit(f"job{i}", f"true {i}")
+
+        self.manager.set_max_concurrent(4)
+        self.assertEqual(self.manager.running_count, 4)
+        await self.drain()
+
+    async def test_identical_commands_share_task(self):
+        """Test that a repeated command attaches to the task already running it"""
+        first = await self.manager.submit("web recon", "nikto -h 10.0.0.5")
+        second = await self.manager.submit("suggestion", "nikto  -h '10.0.0.5'")
+        other = await self.manager.submit("other", "nikto -h 10.0.0.6")
+        await asyncio.sleep(0)
+
+        self.assertEqual(self.manager.started, ["web recon", "other"])
+        self.assertEqual(self.manager.get_task(second).shared_with, first)
+        self.assertEqual(self.manager.singleflight.stats(),
+                         {'hits': 1, 'misses': 2, 'in_flight': 2})
+
+        await self.drain()
+        task = await asyncio.wait_for(self.manager.get_task(second).wait(), timeout=1)
+        self.assertEqual(task.status, TaskStatus.COMPLETED)
+        self.assertEqual(self.manager.singleflight.stats()['in_flight'], 0)
+
+    async def test_waiter_raises_pending_priority(self):
+        """Test that a shared pending task is admitted at its waiters' top priority"""
+        manager = GatedTaskManager(max_concurrent=1)
+        await manager.submit("busy", "sleep 1")
+        await manager.submit("scan", "nikto -h 10.0.0.5", priority=0)
+        await manager.submit("other", "nikto -h 10.0.0.6", priority=1)
+        await manager.submit("urgent", "nikto -h 10.0.0.5", priority=5)
+
+        manager.gate.set()
+        while manager.running_count or manager.pending_count:
+            await asyncio.sleep(0)
+        self.assertEqual(manager.started, ["busy", "scan", "other"])
+
+    async def test_submit_during_callback_starts_fresh(self):
+        """Test that a command submitted from a finished task's callback runs again"""
+        manager = BackgroundTaskManager()
+        resubmitted = []
+
+        async def callback(task):
+            resubmitted.append(await manager.submit("again", task.command))
+
+        first = await manager.submit("first", "true", callback=callback)
+        await asyncio.wait_for(manager.get_task(first).wait(), timeout=5)
+        again = manager.get_task(resubmitted[0])
+        self.assertIsNone(again.shared_with)
+        await asyncio.wait_for(again.wait(), timeout=5)
+        self.assertEqual(again.status, TaskStatus.COMPLETED)
+
+    async def test_cancel_follower_keeps_leader(self):
+        """Test that cancelling an attached task leaves the shared run alone"""
+        first = await self.manager.submit("a", "nikto -h 10.0.0.5")
+        second = await self.manager.submit("b", "nikto -h 10.0.0.5")
+
+        self.assertTrue(await self.manager.cancel(second))
+        self.assertEqual(self.manager.get_task(second).status, TaskStatus.CANCELLED)
+        self.assertEqual(self.manager.get_task(first).status, TaskStatus.RUNNING)
+
+        await self.drain()
+        self.assertEqual(self.manager.get_task(first).status, TaskStatus.COMPLETED)
+        self.assertEqual(self.manager.get_task(second).status, TaskStatus.CANCELLED)
+
+
+class TestOutputCapture(unittest.TestCase):
+    """Test cases for the spill-to-disk output store"""
+
+    def setUp(self):
+        self.capture = OutputCapture(tail_lines=10, chunk_size=256)
+        self.lines = [f"{i}/tcp open service-{i} ünïcode" for i in range(500)]
+        self.capture.extend(self.lines)
+
+    def tearDown(self):
+        self.capture.close()
+
+    def test_spills_without_losing_lines(self):
+        """Test that all lines survive spilling to disk"""
+        self.assertTrue(self.capture.spilled)
+        self.assertEqual(len(self.capture), 500)
+        self.assertEqual(list(self.capture), self.lines)
+        self.assertEqual(self.capture.getvalue(), '\n'.join(self.lines))
+
+    def test_random_access(self):
+        """Test line and slice access across the spill boundary"""
+        self.assertEqual(self.capture.line(0), self.lines[0])
+        self.assertEqual(self.capture.line(-1), self.lines[-1])
+        self.assertEqual(self.capture.lines(120, 140), self.lines[120:140])
+        with self.assertRaises(IndexError):
+            self.capture.line(500)
+
+    def test_tail_is_bounded(self):
+        """Test that only the configured tail stays in memory"""
+        self.assertEqual(self.capture.tail(), self.lines[-10:])
+        self.assertEqual(self.capture.tail(3), self.lines[-3:])
+
+    def test_embedded_newlines_are_split(self):
+        """Test that a multi-line chunk is indexed line by line"""
+        capture = OutputCapture(tail_lines=3)
+        capture.append("a\nb")
+        capture.append("c")
+        self.assertEqual(len(capture), 3)
+        self.assertEqual(capture.line(1), "b")
+        self.assertEqual(capture.lines(1, 3), ["b", "c"])
+        self.assertEqual(capture.tail(2), ["b", "c"])
+        self.assertEqual(capture.getvalue(), "a\nb\nc")
+
+    def test_chunks_round_trip(self):
+        """Test that raw chunk iteration reproduces the output"""
+        data = b''.join(self.capture.iter_chunks(chunk_size=1000))
+        self.assertEqual(data.decode('utf-8'), '\n'.join(self.lines) + '\n')
+        text = b''.join(self.capture.iter_chunks(chunk_size=1000, final_newline=False))
+        self.assertEqual(text.decode('utf-8'), self.capture.getvalue())
+
+
+class TestStreamRenderer(unittest.TestCase):
+    """Test cases for the batched output renderer"""
+
+    def make_renderer(self, **kwargs):
+        self.buffer = StringIO()
+        return StreamRenderer(Console(file=self.buffer, width=120), **kwargs)
+
+    def test_output_is_not_parsed_as_markup(self):
+        """Test that tool output containing brackets is shown verbatim"""
+        for raw in (False, True):
+            renderer = self.make_renderer(raw=raw)
+            renderer.push("[red]not markup[/red]")
+            renderer.flush()
+            self.assertIn("[red]not markup[/red]", self.buffer.getvalue())
+
+    def test_rate_cap_suppresses_excess_lines(self):
+        """Test that a frame over the cap shows head, tail and a counter"""
+        renderer = self.make_renderer(fps=10, max_lines_per_sec=100, raw=True)
+        for i in range(1000):
+            renderer.push(f"line {i}")
+        renderer.flush()
+
+        shown = self.buffer.getvalue().splitlines()
+        self.assertEqual(renderer.rendered, 10)
+        self.assertEqual(renderer.suppressed, 990)
+        self.assertIn("line 0", shown[0])
+        self.assertIn("990 lines suppressed", shown[5])
+        self.assertIn("line 999", shown[-1])
+
+    def test_close_summary_uses_prefix(self):
+        """Test that the suppressed-lines summary keeps the configured prefix"""
+        renderer = self.make_renderer(fps=10, max_lines_per_sec=10, prefix="[1] ")
+        for i in range(100):
+            renderer.push(f"line {i}")
+        asyncio.run(renderer.close())
+
+        summary = self.buffer.getvalue().splitlines()[-1]
+        self.assertTrue(summary.startswith("[1] "))
+        self.assertIn("lines suppressed from display", summary)
+
+    def test_rate_cap_change_keeps_queued_lines(self):
+        """Test that changing the cap mid-frame keeps the queued tail"""
+        renderer = self.make_renderer(fps=10, max_lines_per_sec=40)
+        for i in range(4):
+            renderer.push(f"line {i}")
+        renderer.set_rate_cap(100)
+        renderer.flush()
+
+        shown = self.buffer.getvalue().splitlines()
+        self.assertEqual([line.strip() for line in shown],
+                         [f"{StreamRenderer.PREFIX.strip()} line {i}" for i in range(4)])
+
+
+class TestStreamParsers(unittest.TestCase):
+    """Test cases for incremental output parsers"""
+
+    def test_nmap_emits_per_host(self):
+        """Test that nmap findings carry the host they were reported for"""
+        parser = NmapStreamParser()
+        self.assertEqual(parser.feed("Nmap scan report for 10.0.0.1")[0].value, "10.0.0.1")
+
+        port, service = parser.feed("22/tcp   open  ssh     OpenSSH 8.2p1 Ubuntu")
+        self.assertEqual((port.finding_type, port.port, port.host),
+                         (FindingType.PORT, 22, "10.0.0.1"))
+        self.assertEqual((service.service, service.version), ("ssh", "OpenSSH 8.2p1 Ubuntu"))
+
+        parser.feed("Nmap scan report for web.local (10.0.0.2)")
+        self.assertEqual(parser.feed("80/tcp open http")[0].host, "web.local")
+        self.assertEqual(parser.feed("443/tcp closed https"), [])
+
+    def test_feed_chunk_buffers_partial_lines(self):
+        """Test that chunked input is split on line boundaries"""
+        parser = GobusterStreamParser()
+        self.assertEqual(parser.feed_chunk("/admin (Status: 3"), [])
+        findings = parser.feed_chunk("01)\n/index.php (Status: 200)")
+        self.assertEqual([f.value for f in findings], ["/admin"])
+        self.assertEqual(parser.close()[0].finding_type, FindingType.FILE)
+
+    def test_parser_lookup(self):
+        """Test parser selection from the command executable"""
+        self.assertIsInstance(get_stream_parser("sudo masscan 10.0.0.0/8 -p 80"),
+                              get_stream_parser("masscan x").__class__)
+        self.assertIsNone(get_stream_parser("whatweb example.com"))
+
+
+class TestIndicatorMatcher(unittest.TestCase):
+    """Test cases for combined success/fail indicator matching"""
+
+    def test_match_kinds(self):
+        """Test that literal indicators are found and fail wins on a line"""
+        matcher = IndicatorMatcher(['open', 'Host is up'], ['Host seems down', '(0 hosts up)'])
+        self.assertEqual(matcher.match("22/tcp open ssh"), (IndicatorMatcher.SUCCESS, 'open'))
+        self.assertEqual(matcher.match("Nmap done: 1 IP address (0 hosts up)"),
+                         (IndicatorMatcher.FAIL, '(0 hosts up)'))
+        self.assertEqual(matcher.match("open, but Host seems down"),
+                         (IndicatorMatcher.FAIL, 'Host seems down'))
+        self.assertIsNone(matcher.match("Starting Nmap"))
+
+    def test_compile_is_shared(self):
+        """Test that compile() reuses matchers and empty ones are falsy"""
+        self.assertIs(IndicatorMatcher.compile(('a',), ('b',)),
+                      IndicatorMatcher.compile(('a',), ('b',)))
+        self.assertFalse(IndicatorMatcher())
+        self.assertIsNone(IndicatorMatcher().match("anything"))
+
+
+@unittest.skipIf(sys.platform == 'win32', "POSIX commands required")
+class TestBackgroundProcesses(unittest.IsolatedAsyncioTestCase):
+    """Test cases running real background processes"""
+
+    async def test_runs_to_completion(self):
+        """Test that queued processes all run and release their slots"""
+        manager = BackgroundTaskManager(max_concurrent=1)
+        engine = AsyncEngine(Console(file=StringIO()))
+        engine.task_manager = manager
+        ids = [await engine.execute_background(f"echo{i}", f"echo {i}") for i in range(3)]
+
+        for task_id in ids:
+            await engine.wait_for_task(task_id, timeout=5)
+
+        for i, task_id in enumerate(ids):
+            self.assertEqual(manager.get_task(task_id).status, TaskStatus.COMPLETED)
+            self.assertEqual(manager.get_task_output(task_id), str(i))
+
+    async def test_execute_streams_findings(self):
+        """Test that findings reach the callback while output is read"""
+        engine = AsyncEngine(Console(file=StringIO()))
+        seen = []
+
+        async def on_finding(finding):
+            seen.append((finding.host, finding.port))
+
+        result = await engine.execute(
+            "printf 'Discovered open port 22/tcp on 10.0.0.5\\nnoise\\n'",
+            stream_output=False,
+            parser=get_stream_parser("masscan"),
+            on_finding=on_finding,
+        )
+
+        self.assertTrue(result['success'])
+        self.assertEqual(seen, [("10.0.0.5", 22)])
+        self.assertEqual(len(result['findings']), 1)
+
+    async def test_concurrent_identical_execute_shares_process(self):
+        """Test that a second identical execute() waits for the first run"""
+        engine = AsyncEngine(Console(file=StringIO()))
+        command = f"{sys.executable} -c 'import os, time; time.sleep(0.3); print(os.getpid())'"
+        first, second = await asyncio.gather(
+            engine.execute(command, stream_output=False),
+            engine.execute(command, stream_output=False),
+        )
+
+        self.assertTrue(second['shared'])
+        self.assertNotIn('shared', first)
+        self.assertEqual(first['output'].getvalue(), second['output'].getvalue())
+        self.assertEqual(engine.singleflight_stats()['execute'],
+                         {'hits': 1, 'misses': 1, 'in_flight': 0})
+
+        third = await engine.execute(command, stream_output=False)
+        self.assertNotEqual(third['output'].getvalue(), first['output'].getvalue())
+
+    async def test_shared_findings_arrive_live(self):
+        """Test that an attached caller gets findings while the run is going"""
+        engine = AsyncEngine(Console(file=StringIO()))
+        command = (f"{sys.executable} -u -c 'import time; "
+                   "print(\"Discovered open port 22/tcp on 10.0.0.5\"); time.sleep(0.5)'")
+        loop = asyncio.get_running_loop()
+        seen = []
+
+        async def attached():
+            await asyncio.sleep(0.1)
+            return await engine.execute(
+                command, stream_output=False, parser=get_stream_parser("masscan"),
+                on_finding=lambda finding: seen.append((finding.port, loop.time())))
+
+        first, second = await asyncio.gather(
+            engine.execute(command, stream_output=False, parser=get_stream_parser("masscan")),
+            attached(),
+        )
+        done = loop.time()
+
+        self.assertTrue(second['shared'])
+        self.assertEqual([port for port, _ in seen], [22])
+        self.assertLess(seen[0][1], done - 0.2)
+
+    async def test_late_attach_replays_from_capture(self):
+        """Test that a caller attaching late renders the lines already captured"""
+        buffer = StringIO()
+        engine = AsyncEngine(Console(file=buffer, width=120), raw_output=True)
+        command = (f"{sys.executable} -u -c 'import time; "
+                   "[print(\"line\", i) for i in range(5)]; time.sleep(0.3); print(\"end\")'")
+
+        async def attached():
+            await asyncio.sleep(0.15)
+            return await engine.execute(command)
+
+        first, second = await asyncio.gather(
+            engine.execute(command, stream_output=False), attached())
+
+        self.assertTrue(second['shared'])
+        shown = [line.strip() for line in buffer.getvalue().splitlines() if "│" in line]
+        self.assertEqual(shown, [f"│ line {i}" for i in range(5)] + ["│ end"])
+
+    async def test_abandoned_run_is_taken_over(self):
+        """Test that an attached caller runs the command if the first caller goes away"""
+        engine = AsyncEngine(Console(file=StringIO()))
+        command = f"{sys.executable} -c 'import time; time.sleep(0.3); print(\"ok\")'"
+        first = asyncio.ensure_future(engine.execute(command, stream_output=False))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(engine.execute(command, stream_output=False))
+        await asyncio.sleep(0.05)
+        first.cancel()
+
+        result = await second
+        self.assertTrue(result['success'])
+        self.assertEqual(result['output'].getvalue(), "ok")
+
+    async def test_fail_condition_terminates(self):
+        """Test that a fail condition stops the process as it appears"""
+        engine = AsyncEngine(Console(file=StringIO()))
+        seen = []
+        command = (f"{sys.executable} -u -c "
+                   "'import time; print(\"Note: Host seems down\"); time.sleep(10)'")
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        result = await engine.execute(
+            command, stream_output=False,
+            indicators=IndicatorMatcher.compile(('open',), ('Host seems down',)),
+            on_indicator=lambda kind, indicator: seen.append((kind, indicator)),
+        )
+
+        self.assertLess(loop.time() - start, 5)
+        self.assertFalse(result['success'])
+        self.assertEqual(result['failed_on'], 'Host seems down')
+        self.assertEqual(seen, [(IndicatorMatcher.FAIL, 'Host seems down')])
+
+    async def test_success_indicator_keeps_exit_code(self):
+        """Test that a matched success indicator does not hide a non-zero exit"""
+        engine = AsyncEngine(Console(file=StringIO()))
+        result = await engine.execute(
+            f"{sys.executable} -c 'import sys; print(\"Failed to open socket\"); sys.exit(1)'",
+            stream_output=False,
+            indicators=IndicatorMatcher.compile(('open',), ()),
+        )
+        self.assertFalse(result['success'])
+        self.assertEqual(result['matched'], 'open')
+
+
+
+class TestExecuteDag(unittest.IsolatedAsyncioTestCase):
+    """Test cases for dependency-ordered parallel execution"""
+
+    async def asyncSetUp(self):
+        self.engine = AsyncEngine(Console(file=StringIO()))
+
+    async def test_independent_tasks_overlap(self):
+        """Test that the run takes about the critical path, in dependency order"""
+        order = []
+        tasks = [
+            ChainTask("a", "sleep 0.3"),
+            ChainTask("b", "sleep 0.3"),
+            ChainTask("c", "sleep 0.3"),
+            ChainTask("d", "echo done", depends_on=["a", "b"]),
+        ]
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        results = await self.engine.execute_dag(
+            tasks, on_done=lambda task, result: order.append(task.name))
+
+        self.assertLess(loop.time() - start, 0.8)
+        self.assertEqual(list(results), ["a", "b", "c", "d"])
+        self.assertEqual(results["d"]['output'].getvalue(), "done")
+        self.assertGreater(order.index("d"), max(order.index("a"), order.index("b")))
+
+    async def test_failure_skips_dependents(self):
+        """Test that dependents of a failed task are skipped, others run"""
+        tasks = [
+            ChainTask("scan", "false"),
+            ChainTask("enum", "echo enum", depends_on=["scan"]),
+            ChainTask("deep", "echo deep", depends_on=["enum"]),
+            ChainTask("other", "echo other"),
+        ]
+        results = await self.engine.execute_dag(tasks)
+        self.assertFalse(results["scan"]['success'])
+        self.assertTrue(results["enum"]['skipped'])
+        self.assertTrue(results["deep"]['skipped'])
+        self.assertTrue(results["other"]['success'])
+
+    async def test_command_built_from_results(self):
+        """Test that callable commands see earlier results and may skip"""
+        tasks = [
+            ChainTask("first", "echo 8080"),
+            ChainTask("second",
+                      lambda results: f"echo port {results['first']['output'].getvalue()}",
+                      depends_on=["first"]),
+            ChainTask("nothing", lambda results: None),
+        ]
+        results = await self.engine.execute_dag(tasks)
+        self.assertEqual(results["second"]['output'].getvalue(), "port 8080")
+        self.assertTrue(results["nothing"]['skipped'])
+
+    async def test_skip_with_reason(self):
+        """Test that ChainSkip skips the task and its dependents"""
+        def needs_ports(results):
+            raise ChainSkip("no value for {ports}")
+
+        results = await self.engine.execute_dag([
+            ChainTask("scan", needs_ports),
+            ChainTask("report", "echo report", depends_on=["scan"]),
+        ])
+        self.assertEqual(results["scan"]['errors'], "no value for {ports}")
+        self.assertTrue(results["report"]['skipped'])
+
+    async def test_success_indicator_releases_dependents(self):
+        """Test that dependents start once a running task reports success"""
+        order = []
+        slow = (f"{sys.executable} -u -c "
+                "'import time; print(\"VULNERABLE\"); time.sleep(0.5)'")
+        tasks = [
+            ChainTask("scan", slow, indicators=IndicatorMatcher.compile(('VULNERABLE',), ()),
+                      release_on_success=True),
+            ChainTask("exploit", "echo exploit", depends_on=["scan"]),
+        ]
+        results = await self.engine.execute_dag(
+            tasks, on_done=lambda task, result: order.append(task.name))
+
+        self.assertEqual(order, ["exploit", "scan"])
+        self.assertTrue(results["scan"]['success'])
+        self.assertEqual(results["exploit"]['output'].getvalue(), "exploit")
+
+    async def test_failure_prompt_stops_run(self):
+        """Test that a refused failure prompt skips everything not started"""
+        asked = []
+
+        def on_failure(task, result):
+            asked.append((task.name, result['success']))
+            return False
+
+        tasks = [
+            ChainTask("scan", "false"),
+            ChainTask("other", f"{sys.executable} -c 'import time; time.sleep(0.2)'"),
+            ChainTask("report", "echo report", depends_on=["other"]),
+        ]
+        results = await self.engine.execute_dag(tasks, max_concurrent=1,
+                                                on_failure=on_failure)
+        self.assertEqual(asked, [("scan", False)])
+        self.assertEqual(results["other"]['errors'], "Stopped by user")
+        self.assertTrue(results["report"]['skipped'])
+
+    async def test_failure_prompt_while_others_run(self):
+        """Test that every failure prompts with its own task and result"""
+        asked = []
+
+        def on_failure(task, result):
+            asked.append((task.name, result['exit_code']))
+            return True
+
+        tasks = [
+            ChainTask("ok", "true"),
+            ChainTask("bad", f"{sys.executable} -c 'import sys; sys.exit(3)'"),
+            ChainTask("slow", f"{sys.executable} -c 'import time; time.sleep(0.3)'"),
+            ChainTask("late", "false", depends_on=["ok"]),
+        ]
+        results = await self.engine.execute_dag(tasks, on_failure=on_failure)
+        self.assertCountEqual(asked, [("bad", 3), ("late", 1)])
+        self.assertTrue(results["slow"]['success'])
+
+    async def test_streamed_output_is_labelled(self):
+        """Test that streamed lines carry the task label"""
+        buffer = StringIO()
+        engine = AsyncEngine(Console(file=buffer, width=120), raw_output=True)
+        await engine.execute_dag([ChainTask("scan", "echo hello", label="1")],
+                                 stream_output=True)
+        self.assertIn("  1 │ hello", buffer.getvalue())
+
+    async def test_invalid_graphs(self):
+        """Test rejection of cycles and unknown dependencies"""
+        with self.assertRaises(ValueError):
+            await self.engine.execute_dag([ChainTask("a", "true", ["b"]),
+                                           ChainTask("b", "true", ["a"])])
+        with self.assertRaises(ValueError):
+            await self.engine.execute_dag([ChainTask("a", "true", ["missing"])])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Unit tests for in-process fast paths
+Author: Tajaa
+"""
+
+import shutil
+import subprocess
+import sys
+import unittest
+
+from core.engine import AsyncEngine
+from core.fastpath import Unsupported, jq_identity, run_fast_batch, run_fast_path
+from core.pipeline import Pipeline
+
+
+JWT = "eyJhbGciOiJIUzI1NiJ9.eyJzdWIiOiIxMjM0IiwiYWRtaW4iOnRydWV9.sig"
+
+COMMANDS = [
+    "echo 'aGVsbG8=' | base64 -d",
+    "echo 'eyJhIjoxfQ' | base64 -d",
+    "echo -n 'hello world' | base64",
+    "echo 'MZXW6===' | base32 -d",
+    "echo '41 42 43' | xxd -r -p",
+    "echo 'Hello, World' | tr 'A-Za-z' 'N-ZA-Mn-za-m'",
+    f"echo '{JWT}' | cut -d. -f2 | base64 -d 2>/dev/null | jq .",
+]
+
+
+class TestFastPath(unittest.TestCase):
+    """Test cases for native pipeline stages"""
+
+    def test_matches(self):
+        """Test that known shapes run natively and others do not"""
+        self.assertIsNotNone(run_fast_path(Pipeline.parse(COMMANDS[0])))
+        self.assertIsNone(run_fast_path(Pipeline.parse("echo -e 'aGk=' | base64 -d")))
+        self.assertIsNone(run_fast_path(Pipeline.parse("cat f | base64 -d")))
+        self.assertIsNone(run_fast_path(Pipeline.parse("echo 'aGk=' | base64 -d > out")))
+
+    def test_invalid_input_falls_back(self):
+        """Test that input the native code can't mirror runs the real tool"""
+        self.assertIsNone(run_fast_path(Pipeline.parse("echo 'not base64!' | base64 -d")))
+
+    @unittest.skipIf(sys.platform == 'win32' or not all(
+        shutil.which(tool) for tool in ('bash', 'base64', 'base32', 'xxd', 'jq')),
+        "needs coreutils, xxd and jq")
+    def test_same_output_as_tools(self):
+        """Test byte-for-byte agreement with the real pipelines"""
+        for command in COMMANDS:
+            fast = run_fast_path(Pipeline.parse(command))
+            real = subprocess.run(['bash', '-c', command], capture_output=True)
+            self.assertEqual((fast.stdout, fast.stderr, fast.returncode),
+                             (real.stdout, real.stderr, real.returncode), command)
+
+    def test_jq_unreproducible_input_falls_back(self):
+        """Test that JSON jq would print differently is left to jq"""
+        for data in (b'12345678901234567890', b'[9007199254740993]', b'-0', b'1.5',
+                     b'{"a": "\\u007f"}', b'"\\ud800"', b'[' * 257 + b']' * 257):
+            with self.assertRaises(Unsupported, msg=data):
+                jq_identity(data)
+        self.assertEqual(jq_identity(b'[-9007199254740992, "\\u0001\\u2028"]')[0],
+                         b'[\n  -9007199254740992,\n  "\\u0001\xe2\x80\xa8"\n]\n')
+
+    @unittest.skipIf(not shutil.which('jq'), "needs jq")
+    def test_jq_edge_cases_match(self):
+        """Test that JSON the jq fast path accepts prints exactly as jq does"""
+        for data in (b'9007199254740992', b'{"a": 1, "a": 2, "b": []}', b'"\\u0000\\t\\u00e9"',
+                     b'[' * 256 + b']' * 256, b'{"\\u0080": {}}'):
+            real = subprocess.run(['jq', '.'], input=data, capture_output=True)
+            self.assertEqual(jq_identity(data), (real.stdout, real.stderr, real.returncode))
+
+    def test_batch(self):
+        """Test decoding many values with one parse"""
+        results = run_fast_batch("echo '{data}' | base64 -d", "data",
+                                 ["aGk=", "b2s=", "%%%"])
+        self.assertEqual([r.stdout if r else None for r in results], [b"hi", b"ok", None])
+        self.assertIsNone(run_fast_batch("nmap {target}", "target", ["a"]))
+
+
+class TestEngineFastPath(unittest.IsolatedAsyncioTestCase):
+    """Test cases for fast paths through the engine"""
+
+    async def test_execute(self):
+        """Test that execute returns native results like a process"""
+        result = await AsyncEngine().execute("echo 'aGVsbG8=' | base64 -d", stream_output=False)
+        self.assertEqual(result['output'].getvalue(), "hello")
+        self.assertTrue(result['success'])
+
+    async def test_execute_batch(self):
+        """Test batch results come back in order"""
+        results = await AsyncEngine().execute_batch(
+            "echo '{data}' | base64 -d", "data", ["aGk=", "b2s="])
+        self.assertEqual([r['output'].getvalue() for r in results], ["hi", "ok"])
+
+
+if __name__ == '__main__':
+    unittest.main()
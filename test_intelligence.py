@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Tajaa intelligence module
+Author: Tajaa
+"""
+
+import unittest
+
+from core.database import FindingType
+from core.intelligence import AttackChainOrchestrator, ChainContext, FuzzySearchEngine, ToolInfo
+from core.parsers import IndicatorMatcher, NmapStreamParser, StreamFinding, get_stream_parser
+
+
+class TestFuzzySearchEngine(unittest.TestCase):
+    """Test cases for fuzzy tool search"""
+
+    def setUp(self):
+        self.engine = FuzzySearchEngine()
+        self.engine.register_tool(ToolInfo(
+            id="nmap", name="Nmap", category="recon",
+            description="Network mapper and port scanner", tags=["ports"],
+            command="nmap -sV {target}"))
+        self.engine.register_tool(ToolInfo(
+            id="gobuster", name="Gobuster", category="web",
+            description="Directory and DNS busting tool", tags=["bruteforce"]))
+        self.engine.register_tool(ToolInfo(
+            id="sqlmap", name="SQLMap", category="web",
+            description="Automatic SQL injection tool", tags=["database"]))
+
+    def test_name_match_is_case_insensitive(self):
+        """Test that mixed-case tool names match lower-case queries"""
+        results = self.engine.search("NMAP")
+        self.assertEqual(results[0][0].id, "nmap")
+        self.assertEqual(results[0][1], 100)
+
+    def test_description_and_tag_matches(self):
+        """Test that description and tag words find their tool"""
+        results = self.engine.search("injection")
+        self.assertEqual(results[0][0].id, "sqlmap")
+
+        results = [tool.id for tool, _ in self.engine.search("bruteforce")]
+        self.assertIn("gobuster", results)
+
+    def test_choices_rebuilt_after_register(self):
+        """Test that newly registered tools are searchable"""
+        self.assertEqual(self.engine.search("hydra", threshold=90), [])
+        self.engine.register_tool(ToolInfo(
+            id="hydra", name="Hydra", category="password",
+            description="Online login cracker"))
+        results = self.engine.search("hydra", threshold=90)
+        self.assertEqual([tool.id for tool, _ in results], ["hydra"])
+
+    def test_prefix_lookup(self):
+        """Test exact and prefix answers from the word index"""
+        self.assertEqual(self.engine.lookup("gob"), {"gobuster": 75})
+        self.assertEqual(self.engine.lookup("gobuster"), {"gobuster": 90})
+        self.assertEqual(set(self.engine.lookup("web")), {"gobuster", "sqlmap"})
+        self.assertEqual(self.engine.lookup("web sqlm"), {"sqlmap": 75})
+        self.assertEqual(self.engine.lookup("zzz"), {})
+
+    def test_reregister_drops_stale_words(self):
+        """Test that re-registering a tool replaces its indexed words"""
+        self.engine.register_tool(ToolInfo(
+            id="gobuster", name="Feroxbuster", category="web",
+            description="Recursive content discovery"))
+        self.assertEqual(self.engine.lookup("gob"), {})
+        self.assertEqual(self.engine.lookup("ferox"), {"gobuster": 75})
+        self.assertEqual(self.engine.lookup("bruteforce"), {})
+        self.assertEqual(set(self.engine.lookup("web")), {"gobuster", "sqlmap"})
+
+    def test_command_and_placeholders_indexed(self):
+        """Test that command flags are indexed but placeholders are not"""
+        self.assertEqual(set(self.engine.lookup("sv")), {"nmap"})
+        self.assertEqual(self.engine.lookup("target"), {})
+
+    def test_prefix_narrows_search(self):
+        """Test that partial words find their tool before it is fully typed"""
+        results = self.engine.search("sqlm")
+        self.assertEqual([tool.id for tool, _ in results], ["sqlmap"])
+
+    def test_typo_falls_back_to_fuzzy(self):
+        """Test that queries missing the index still match fuzzily"""
+        results = self.engine.search("nmpa")
+        self.assertEqual(results[0][0].id, "nmap")
+
+    def test_limit(self):
+        """Test that results are capped at the limit"""
+        self.assertLessEqual(len(self.engine.search("tool", limit=2, threshold=0)), 2)
+
+
+
+class TestAttackChainDependencies(unittest.TestCase):
+    """Test cases for attack chain step dependencies"""
+
+    def setUp(self):
+        self.chains = AttackChainOrchestrator()
+
+    def test_independent_steps(self):
+        """Test that steps needing only chain inputs have no dependencies"""
+        deps = self.chains.get_chain("SMB Enum").dependencies()
+        self.assertTrue(all(not d for d in deps.values()))
+
+    def test_inferred_from_produced_params(self):
+        """Test that consumers of a produced param wait for its producer"""
+        deps = self.chains.get_chain("Network Enum").dependencies()
+        self.assertEqual(deps["Service Detection"], ["Full Port Scan"])
+        self.assertEqual(deps["Vulnerability Scripts"], ["Full Port Scan"])
+        self.assertEqual(deps["Full Port Scan"], [])
+
+    def test_explicit_dependencies(self):
+        """Test that declared depends_on is used as-is"""
+        deps = self.chains.get_chain("SQLi Attack").dependencies()
+        self.assertEqual(deps["Database Enumeration"], ["SQLi Detection"])
+        self.assertEqual(deps["Dump Data"], ["Database Enumeration"])
+
+    def test_sqlmap_indicators(self):
+        """Test that sqlmap's negative verdict is a fail, not a success"""
+        step = self.chains.get_chain("SQLi Attack").steps[1]
+        matcher = IndicatorMatcher(step.success_indicators, step.fail_conditions)
+        self.assertIsNone(matcher.match("GET parameter 'id' does not seem to be injectable"))
+        self.assertEqual(matcher.match("[CRITICAL] all tested parameters do not appear "
+                                       "to be injectable.")[0], IndicatorMatcher.FAIL)
+        self.assertEqual(matcher.match("GET parameter 'id' is vulnerable. Do you want...")[0],
+                         IndicatorMatcher.SUCCESS)
+
+
+class TestChainContext(unittest.TestCase):
+    """Test cases for binding step findings into later step templates"""
+
+    def setUp(self):
+        self.chain = AttackChainOrchestrator().get_chain("Network Enum")
+        self.steps = {step.name: step for step in self.chain.steps}
+
+    def test_ports_from_earlier_step(self):
+        """Test that service detection scans only the discovered ports"""
+        context = ChainContext(target="10.0.0.1", url="10.0.0.1")
+        self.assertEqual(context.missing(self.steps["Service Detection"]), ["ports"])
+
+        parser = NmapStreamParser()
+        for line in ("Nmap scan report for 10.0.0.1", "22/tcp   open  ssh",
+                     "80/tcp   open  http", "81/tcp   open  hosts2-ns"):
+            context.bind(parser.feed(line))
+
+        self.assertEqual(context.missing(self.steps["Service Detection"]), [])
+        self.assertEqual(context.render(self.steps["Service Detection"]),
+                         "nmap -sC -sV -p 22,80-81 10.0.0.1")
+        self.assertEqual(context.hosts, ["10.0.0.1"])
+
+    def test_unbound_inputs_are_missing(self):
+        """Test that params neither given nor discovered are reported"""
+        context = ChainContext(target="10.0.0.1", network="")
+        self.assertEqual(context.missing(self.steps["Host Discovery"]), ["network"])
+
+    def test_urls_joined_to_base(self):
+        """Test that discovered paths become URLs under the target URL"""
+        context = ChainContext(url="http://example.com/")
+        context.bind([StreamFinding(FindingType.URL, "/admin"),
+                      StreamFinding(FindingType.FILE, "/admin")])
+        self.assertEqual(context.values()['urls'], "http://example.com/admin")
+
+    def test_database_from_sqlmap_listing(self):
+        """Test that Dump Data gets a database found by Database Enumeration"""
+        steps = {step.name: step
+                 for step in AttackChainOrchestrator().get_chain("SQLi Attack").steps}
+        url = "http://example.com/item.php?id=1"
+        context = ChainContext(target=url, url=url)
+        self.assertEqual(context.missing(steps["Dump Data"]), ["database"])
+
+        parser = get_stream_parser(context.render(steps["Database Enumeration"]))
+        for line in ("[12:00:01] [INFO] fetching database names", "available databases [3]:",
+                     "[*] information_schema", "[*] shop", "[*] mysql", "",
+                     "[*] ending @ 12:00:02 /2026-10-17/"):
+            context.bind(parser.feed(line))
+
+        self.assertEqual(context.databases, ["information_schema", "shop", "mysql"])
+        self.assertEqual(context.render(steps["Dump Data"]),
+                         f"sqlmap -u '{url}' --batch -D shop --dump")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Unit tests for native pipeline execution
+Author: Tajaa
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.pipeline import (
+    DEVNULL, STDOUT, HeadSink, Pipeline, PipelineError, TeeSink, spawn_pipeline, tokenize
+)
+
+
+class TestPipelineParsing(unittest.TestCase):
+    """Test cases for command parsing"""
+
+    def test_quoting(self):
+        """Test that quotes group words and operators inside them are literal"""
+        self.assertEqual(tokenize("grep 'a | b' \"c d\" e\\ f"), [
+            ('word', 'grep'), ('word', 'a | b'), ('word', 'c d'), ('word', 'e f'),
+        ])
+
+    def test_stages_and_redirections(self):
+        """Test pipes and file descriptor redirections"""
+        pipeline = Pipeline.parse("cmd1 < in.txt 2>/dev/null | cmd2 -x 2>&1 > out.txt")
+        first, second = pipeline.stages
+        self.assertEqual(first.argv, ["cmd1"])
+        self.assertEqual(first.stdin, "in.txt")
+        self.assertEqual(first.stderr, DEVNULL)
+        self.assertEqual(second.argv, ["cmd2", "-x"])
+        self.assertEqual(second.stderr, STDOUT)
+        self.assertEqual(second.stdout, ("out.txt", False))
+
+    def test_trailing_builtins(self):
+        """Test that trailing tee and head become built-in sinks"""
+        pipeline = Pipeline.parse("strings bin | grep flag | tee -a out.txt | head -50")
+        self.assertEqual([s.argv[0] for s in pipeline.stages], ["strings", "grep"])
+        self.assertEqual(pipeline.sinks, [TeeSink(["out.txt"], True), HeadSink(50)])
+
+        # A lone head reading a file is a normal command
+        self.assertEqual(Pipeline.parse("head -5 file").sinks, [])
+
+    def test_unsupported_syntax(self):
+        """Test that shell-only syntax raises a clear error"""
+        for command in ("a && b", "a; b", "a &", "echo $HOME", "echo $(id)",
+                        "echo `id`", "a |", "echo 'open"):
+            with self.assertRaises(PipelineError, msg=command):
+                Pipeline.parse(command)
+
+
+@unittest.skipIf(sys.platform == 'win32', "POSIX pipelines")
+class TestPipelineExecution(unittest.IsolatedAsyncioTestCase):
+    """Test cases for running pipelines"""
+
+    async def _run(self, command):
+        process = await spawn_pipeline(command)
+        lines = []
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                break
+            lines.append(line.decode().rstrip())
+        errors = []
+        while True:
+            line = await process.stderr.readline()
+            if not line:
+                break
+            errors.append(line.decode().rstrip())
+        await process.wait()
+        return lines, errors, process.returncode
+
+    async def test_pipe_between_stages(self):
+        """Test that stage output flows into the next stage"""
+        lines, _, code = await self._run("printf 'b\\na\\n' | sort")
+        self.assertEqual(lines, ["a", "b"])
+        self.assertEqual(code, 0)
+
+    async def test_head_closes_upstream(self):
+        """Test that head stops an endless producer"""
+        lines, _, code = await self._run("yes | head -n 3")
+        self.assertEqual(lines, ["y", "y", "y"])
+        self.assertEqual(code, 0)
+
+    async def test_tee_and_stderr(self):
+        """Test built-in tee and the shared stderr pipe"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "out.txt"
+            lines, errors, _ = await self._run(
+                f"sh -c 'echo out; echo err >&2' | tee {path}")
+            self.assertEqual(lines, ["out"])
+            self.assertEqual(errors, ["err"])
+            self.assertEqual(path.read_text(), "out\n")
+
+    async def test_fds_are_closed(self):
+        """Test that no pipe ends leak into the parent"""
+        before = len(os.listdir('/proc/self/fd')) if os.path.exists('/proc/self/fd') else 0
+        await self._run("seq 3 | cat | cat")
+        after = len(os.listdir('/proc/self/fd')) if os.path.exists('/proc/self/fd') else 0
+        self.assertEqual(before, after)
+
+
+if __name__ == '__main__':
+    unittest.main()
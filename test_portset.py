@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the port set type
+Author: Tajaa
+"""
+
+import pickle
+import unittest
+
+from core.portset import PortSet
+from utils.helpers import parse_ports
+
+
+class TestPortSet(unittest.TestCase):
+    """Test cases for PortSet"""
+
+    def test_round_trip(self):
+        """Test that range strings parse and format back"""
+        ports = PortSet.parse("8000-8100, 22,80,443,444")
+        self.assertEqual(str(ports), "22,80,443-444,8000-8100")
+        self.assertEqual(len(ports), 105)
+        self.assertEqual(PortSet.parse(str(ports)), ports)
+        self.assertEqual(str(PortSet()), "")
+
+    def test_set_operations(self):
+        """Test union, difference and membership"""
+        a = PortSet.parse("1-100")
+        b = PortSet([50, 200])
+        self.assertEqual(str(a | b), "1-100,200")
+        self.assertEqual(str(a - b), "1-49,51-100")
+        self.assertEqual(str(a & b), "50")
+        self.assertIn(50, a)
+        self.assertNotIn(0, a)
+        self.assertNotIn("x", a)
+        self.assertTrue(PortSet([50]).issubset(a))
+
+    def test_iteration_is_sorted(self):
+        """Test that iteration yields ascending ports"""
+        self.assertEqual(list(PortSet([443, 22, 80, 65535, 1])), [1, 22, 80, 443, 65535])
+        self.assertEqual(list(PortSet.parse("1-65535").ranges()), [(1, 65535)])
+        self.assertEqual(list(PortSet.parse("1-3,5,7-8,65535").ranges()),
+                         [(1, 3), (5, 5), (7, 8), (65535, 65535)])
+        alternating = PortSet(range(1, 65536, 2))
+        self.assertEqual(list(alternating), list(range(1, 65536, 2)))
+
+    def test_format_limit(self):
+        """Test truncated formatting for display"""
+        self.assertEqual(PortSet.parse("1,3,5,7").format(limit=2), "1,3")
+
+    def test_invalid(self):
+        """Test rejection of bad ports"""
+        for spec in ("0", "70000", "80-", "abc", "90-80"):
+            with self.assertRaises(ValueError):
+                PortSet.parse(spec)
+        with self.assertRaises(ValueError):
+            PortSet([0])
+        for port in (0, 70000):
+            with self.assertRaises(ValueError):
+                PortSet([22]).discard(port)
+
+    def test_coerce_and_pickle(self):
+        """Test accepted input forms and pickling"""
+        self.assertEqual(PortSet.coerce([22, 80]), PortSet.coerce("22,80"))
+        self.assertEqual(PortSet.coerce(None), PortSet())
+        ports = PortSet.parse("22,8000-8100")
+        self.assertEqual(pickle.loads(pickle.dumps(ports)), ports)
+
+    def test_parse_ports_helper(self):
+        """Test that the lenient helper skips bad parts and clips ranges"""
+        self.assertEqual(str(parse_ports("0-5,abc,9,70000")), "1-5,9")
+        self.assertEqual(len(parse_ports("1-65535")), 65535)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Unit tests for session persistence
+Author: Tajaa
+"""
+
+import asyncio
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from core.session import SessionManager
+
+
+class SessionTestCase(unittest.IsolatedAsyncioTestCase):
+    """Base class providing a session manager over a temp directory"""
+
+    async def asyncSetUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.session_dir = Path(self.temp_dir.name)
+        self.managers = []
+        self.manager = self._manager()
+
+    def _manager(self, **kwargs):
+        manager = SessionManager(session_dir=self.session_dir, flush_delay=60, **kwargs)
+        self.managers.append(manager)
+        return manager
+
+    async def asyncTearDown(self):
+        for manager in self.managers:
+            await manager.close_session()
+        self.temp_dir.cleanup()
+
+    def _journal(self, name):
+        path = self.session_dir / f"{name}.journal"
+        return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+class TestSessionJournal(SessionTestCase):
+    """Test cases for the append-only session journal"""
+
+    async def test_mutations_are_buffered(self):
+        """Test that mutations are journaled on flush, not rewritten"""
+        state = await self.manager.create_session("s1")
+        snapshot = (self.session_dir / "s1.json").read_text()
+
+        self.manager.add_command("nmap 10.0.0.1")
+        self.manager.cache_ports("10.0.0.1", [80, 22])
+        self.assertEqual(str(state.discovered_ports["10.0.0.1"]), "22,80")
+        self.assertEqual(self._journal("s1"), [])
+
+        self.manager.flush()
+        self.assertEqual([r['op'] for r in self._journal("s1")], ["command", "ports"])
+        self.assertEqual((self.session_dir / "s1.json").read_text(), snapshot)
+
+    async def test_flush_timer(self):
+        """Test that buffered deltas are written after the flush delay"""
+        self.manager.flush_delay = 0.01
+        await self.manager.create_session("s1")
+        self.manager.add_command("whoami")
+        self.manager.add_command("id")
+        await asyncio.sleep(0.05)
+        self.assertEqual([r['args'] for r in self._journal("s1")], [["whoami"], ["id"]])
+
+    async def test_replay_after_crash(self):
+        """Test that load_session recovers deltas missing from the snapshot"""
+        await self.manager.create_session("s1")
+        self.manager.set_active_target("10.0.0.1", 3)
+        self.manager.add_tool_usage("nmap")
+        self.manager.cache_services("10.0.0.1", [{'port': 22, 'name': 'ssh'}])
+        self.manager.flush()
+        with open(self.session_dir / "s1.journal", 'a') as f:
+            f.write('{"seq": 4, "op": "tool", "ar')   # Torn write
+
+        state = await self._manager().load_session("s1")
+        self.assertEqual(state.active_target, "10.0.0.1")
+        self.assertEqual(state.tool_history, ["nmap"])
+        self.assertEqual(state.discovered_services["10.0.0.1"][0]['name'], "ssh")
+
+        # Recovered deltas were folded into the snapshot
+        self.assertEqual((self.session_dir / "s1.journal").read_text(), "")
+        self.assertEqual(json.loads((self.session_dir / "s1.json").read_text())['journal_seq'], 3)
+
+    async def test_stale_journal_not_reapplied(self):
+        """Test that deltas already in the snapshot are skipped"""
+        await self.manager.create_session("s1")
+        self.manager.add_command("id")
+        self.manager.flush()
+        journal = (self.session_dir / "s1.journal").read_text()
+        self.manager._save_session()
+
+        # Crash between snapshot and journal truncation
+        (self.session_dir / "s1.journal").write_text(journal)
+        state = await self._manager().load_session("s1")
+        self.assertEqual(state.command_history, ["id"])
+
+    async def test_compaction(self):
+        """Test that the journal is folded into a snapshot periodically"""
+        self.manager = self._manager(compact_every=3)
+        await self.manager.create_session("s1")
+        for i in range(4):
+            self.manager.add_command(f"cmd {i}")
+            self.manager.flush()
+
+        self.assertEqual([r['seq'] for r in self._journal("s1")], [4])
+        data = json.loads((self.session_dir / "s1.json").read_text())
+        self.assertEqual(data['command_history'], ["cmd 0", "cmd 1", "cmd 2"])
+
+        state = await self._manager().load_session("s1")
+        self.assertEqual(state.command_history, [f"cmd {i}" for i in range(4)])
+
+    async def test_legacy_port_lists(self):
+        """Test that port lists from older snapshots merge into range strings"""
+        await self.manager.create_session("s1")
+        data = json.loads((self.session_dir / "s1.json").read_text())
+        data['discovered_ports'] = {"10.0.0.1": [22, 80, 81]}
+        (self.session_dir / "s1.json").write_text(json.dumps(data))
+
+        manager = self._manager()
+        state = await manager.load_session("s1")
+        self.assertEqual(manager.get_cached_ports("10.0.0.1"), [22, 80, 81])
+        manager.cache_ports("10.0.0.1", "82-90")
+        self.assertEqual(str(state.discovered_ports["10.0.0.1"]), "22,80-90")
+
+        # The live state keeps PortSets; snapshots store range strings
+        manager._save_session()
+        data = json.loads((self.session_dir / "s1.json").read_text())
+        self.assertEqual(data['discovered_ports'], {"10.0.0.1": "22,80-90"})
+
+
+class TestSessionIndex(SessionTestCase):
+    """Test cases for the session index"""
+
+    async def test_index_tracks_saves(self):
+        """Test that snapshots keep the index current"""
+        await self.manager.create_session("old")
+        await self.manager.create_session("new")
+        self.manager.set_active_target("10.0.0.5")
+        self.manager._save_session()
+
+        sessions = self._manager().list_sessions()
+        self.assertEqual([s['name'] for s in sessions], ["new", "old"])
+        self.assertEqual(sessions[0]['target'], "10.0.0.5")
+        self.assertEqual(sessions[0]['size'], (self.session_dir / "new.json").stat().st_size)
+
+    async def test_index_tracks_journal_flushes(self):
+        """Test that journaled activity reaches the index, throttled"""
+        await self.manager.create_session("old")
+        await self.manager.create_session("new")
+        await self.manager.load_session("old")
+        self.manager.set_active_target("10.0.0.7")
+        self.manager.flush()
+
+        # Within index_interval of the last snapshot the index is untouched
+        sessions = self._manager().list_sessions()
+        self.assertEqual([s['name'] for s in sessions], ["new", "old"])
+
+        self.manager.index_interval = 0
+        self.manager.add_command("nmap 10.0.0.7")
+        self.manager.flush()
+        sessions = self._manager().list_sessions()
+        self.assertEqual([s['name'] for s in sessions], ["old", "new"])
+        self.assertEqual(sessions[0]['last_active'], self._journal("old")[-1]['t'])
+        self.assertEqual(sessions[0]['target'], "10.0.0.7")
+
+        # A rebuilt index reads the journal tail as well
+        (self.session_dir / SessionManager.INDEX_NAME).unlink()
+        sessions = self._manager().list_sessions()
+        self.assertEqual([s['name'] for s in sessions], ["old", "new"])
+
+    async def test_listing_reads_only_the_index(self):
+        """Test that session files are not opened for listing"""
+        await self.manager.create_session("s1")
+        (self.session_dir / "s1.json").write_text("not json")
+        self.assertEqual([s['name'] for s in self._manager().list_sessions()], ["s1"])
+
+    async def test_rebuild(self):
+        """Test rebuilding a missing or stale index"""
+        await self.manager.create_session("s1")
+        await self.manager.create_session("s2")
+        (self.session_dir / SessionManager.INDEX_NAME).unlink()
+
+        manager = self._manager()
+        self.assertEqual({s['name'] for s in manager.list_sessions()}, {"s1", "s2"})
+        self.assertEqual(manager.rebuild_index(), 2)
+
+    async def test_delete_and_resume(self):
+        """Test that deleted sessions leave the index and resume picks the newest"""
+        await self.manager.create_session("s1")
+        await self.manager.create_session("s2")
+        self.assertTrue(self.manager.delete_session("s2"))
+
+        state = await self._manager().resume_latest()
+        self.assertEqual(state.name, "s1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Unit tests for compiled command templates
+Author: Tajaa
+"""
+
+import shlex
+import unittest
+
+from core.plugin import NmapPlugin
+from core.template import CommandTemplate
+
+
+class TestCommandTemplate(unittest.TestCase):
+    """Test cases for template compilation and rendering"""
+
+    def test_placeholders(self):
+        """Test that placeholders are listed once, in order"""
+        template = CommandTemplate.compile("ssh -L {port}:{host}:{port} {user}@{host}")
+        self.assertEqual(template.placeholders, ["port", "host", "user"])
+
+    def test_compile_is_cached(self):
+        """Test that a template string is parsed only once"""
+        self.assertIs(CommandTemplate.compile("nmap {target}"),
+                      CommandTemplate.compile("nmap {target}"))
+
+    def test_unquoted_values_are_one_word(self):
+        """Test that values cannot inject extra shell words"""
+        command = CommandTemplate.compile("nmap -p {ports} {target}").render(
+            {"ports": "22,80", "target": "10.0.0.1; rm -rf /"})
+        self.assertEqual(shlex.split(command), ["nmap", "-p", "22,80", "10.0.0.1; rm -rf /"])
+
+    def test_raw_options(self):
+        """Test that option strings are split into arguments"""
+        command = CommandTemplate.compile("nmap {options} {target}").render(
+            {"options": "-sC -sV", "target": "host"})
+        self.assertEqual(command, "nmap -sC -sV host")
+
+    def test_quoted_contexts(self):
+        """Test escaping inside single and double quotes"""
+        template = CommandTemplate.compile("curl '{url}?q={query}' -H \"X: {header}\"")
+        command = template.render({"url": "http://a", "query": "it's", "header": 'say "$hi"'})
+        self.assertEqual(shlex.split(command),
+                         ["curl", "http://a?q=it's", "-H", 'X: say "$hi"'])
+
+    def test_escaped_braces(self):
+        """Test that doubled braces render as literal braces"""
+        template = CommandTemplate.compile("awk '{{print $5}}' {file}")
+        self.assertEqual(template.placeholders, ["file"])
+        self.assertEqual(template.render({"file": "out"}), "awk '{print $5}' out")
+
+    def test_validate(self):
+        """Test detection of unknown placeholders and unused parameters"""
+        template = CommandTemplate.compile("hydra -l {user} {target}")
+        self.assertEqual(template.validate(["user", "target"]), [])
+        self.assertEqual(template.validate(["target", "wordlist"]), [
+            "unknown placeholder {user}",
+            "parameter 'wordlist' not used in command",
+        ])
+
+    def test_plugin_build_command(self):
+        """Test that plugins render through the compiled template"""
+        plugin = NmapPlugin()
+        plugin.set_param("target", "10.0.0.1")
+        self.assertEqual(plugin.build_command(), "nmap -sC -sV -p - 10.0.0.1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -13,6 +13,8 @@ from pathlib import Path
 from datetime import datetime
 from typing import Optional, List, Dict, Any, Tuple
 
+from core.portset import PortSet  # re-exported for utils callers
+
 
 def is_valid_ip(ip: str) -> bool:
     """Check if string is a valid IP address."""
@@ -63,32 +65,13 @@ def resolve_hostname(hostname: str) -> Optional[str]:
         return None
 
 
-def parse_ports(port_string: str) -> List[int]:
+def parse_ports(port_string: str) -> PortSet:
     """
-    Parse port string into list of ports.
+    Parse port string into a PortSet (iterates in ascending order).
     Supports: single (80), range (1-100), comma-separated (22,80,443)
+    Invalid parts are skipped and ranges are clipped to 1-65535.
     """
-    ports = set()
-
-    for part in port_string.split(','):
-        part = part.strip()
-        if '-' in part:
-            try:
-                start, end = part.split('-')
-                for p in range(int(start), int(end) + 1):
-                    if is_valid_port(p):
-                        ports.add(p)
-            except ValueError:
-                continue
-        else:
-            try:
-                p = int(part)
-                if is_valid_port(p):
-                    ports.add(p)
-            except ValueError:
-                continue
-
-    return sorted(ports)
+    return PortSet.parse(port_string, strict=False)
 
 
 def sanitize_filename(filename: str) -> str: